@@ -6,12 +6,13 @@ The Arbitrage class provides a client that finds an arbitrage
  *  complete-digraph representation of the exchange table and then finding
  *  a negative cycle in the digraph.
  *
- *  This implementation uses the Bellman-Ford algorithm to find a
+ *  This implementation uses the Bellman-Ford algorithm (BellmanFordSPFA,
+ *  which detects the cycle by subtree disassembly) to find a
  *  negative cycle in the complete digraph.
  *  The running time is proportional to V 3in the
  *  worst case, where V is the number of currencies.
 """
-from graphs.bellman_ford_sp import BellmanFordSP
+from graphs.bellman_ford_spfa import BellmanFordSPFA
 from graphs.edge_weighted_digraph import EdgeWeightedDigraph
 from graphs.directed_edge import DirectedEdge
 import math
@@ -35,16 +36,12 @@ class Arbitrage:
             for w in range(V):
                 e = DirectedEdge(v, w, -math.log(rates[v][w]))
                 g.add_edge(e)
-        # print(g)
-        spt = BellmanFordSP(g, 0)
-        # print(spt)
-        print(spt.negative_cycle().queue)
-        print(spt.has_negative_cycle())
+        spt = BellmanFordSPFA(g, 0)
         if spt.has_negative_cycle():
-            print('hit')
             stake = 1000.0
-            for e in spt.negative_cycle().queue:
-                print(e)
+            cycle = spt.negative_cycle()
+            while not cycle.empty():
+                e = cycle.get()
                 print(f'{stake} {names[e.tail()]}')
                 stake *= math.exp(-e.weight())
                 print(f'= {stake}\n {names[e.head()]}')
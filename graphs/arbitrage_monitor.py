@@ -0,0 +1,222 @@
+"""
+arbitrage_monitor.py
+Streaming arbitrage detection.
+The ArbitrageMonitor class watches a stream of currency quote ticks
+ *  and reports arbitrage opportunities as they appear. Like Arbitrage, it
+ *  models the exchange table as a complete digraph with an edge v->w of
+ *  weight -ln(rate(v, w)) per pair of distinct currencies, so an
+ *  opportunity is a negative cycle.
+ *
+ *  Unlike Arbitrage, the digraph and the shortest-paths labels stay alive
+ *  between ticks: each batch of ticks becomes one BellmanFordSPFA.update(),
+ *  which re-scans only the currencies whose outgoing quotes got better and
+ *  the parts of the shortest-paths tree below quotes that got worse.
+ *  While an opportunity is open the engine holds no valid labels, so the
+ *  next batch is solved from scratch.
+ *
+ *  Every weight is raised by a small threshold, so a cycle of k exchanges
+ *  is reported only if its log-profit exceeds k * threshold. This keeps
+ *  rounding error on break-even cycles from showing up as arbitrage.
+ *  The callback is called with an Opportunity each time a batch leaves
+ *  open a cycle that differs from the one reported last.
+"""
+import math
+import random
+import time
+from collections import namedtuple
+
+from graphs.bellman_ford_spfa import BellmanFordSPFA
+from graphs.csr_graph import CSREdgeWeightedDigraph
+
+Opportunity = namedtuple('Opportunity', ['currencies', 'rate'])
+Opportunity.__doc__ = """
+An arbitrage cycle: exchanging through {currencies} (first currency
+repeated at the end) multiplies a stake by {rate} > 1.
+"""
+
+
+def _complete(rates, weight):
+    """
+    Builds the complete CSR digraph of an exchange table, without self-loops.
+    """
+    V = len(rates)
+    tails, heads, weights = list(), list(), list()
+    for v in range(V):
+        if len(rates[v]) != V:
+            raise ValueError('exchange table must be square')
+        for w in range(V):
+            if v != w:
+                tails.append(v)
+                heads.append(w)
+                weights.append(weight(rates[v][w]))
+    return CSREdgeWeightedDigraph.from_edges(V, tails, heads, weights)
+
+
+class ArbitrageMonitor:
+
+    def __init__(self, names, rates, callback=None, threshold=1e-9):
+        """
+        :param names: the currency names
+        :param rates: the exchange table; rates[v][w] is the price of v in w
+        :param callback: called with each new Opportunity, or None
+        :param threshold: log-profit per exchange a cycle must beat
+        """
+        if len(names) != len(rates) or len(names) == 0:
+            raise ValueError('need one row of rates per currency')
+        if threshold < 0:
+            raise ValueError('threshold must be non-negative')
+        self._names = list(names)
+        self._index = {name: v for v, name in enumerate(self._names)}
+        self._callback = callback
+        self._threshold = threshold
+        self._spt = BellmanFordSPFA(_complete(rates, self.__weight), 0)
+        self._current = None
+        self._key = None
+        self.__report()
+
+    @classmethod
+    def from_file(cls, path, callback=None, threshold=1e-9):
+        """
+        Reads an exchange table in the format of resources/rates.txt:
+        the number of currencies, then one line per currency with its
+        name followed by its rates.
+        """
+        with open(path) as f:
+            V = int(f.readline())
+            names, rates = list(), list()
+            for _ in range(V):
+                fields = f.readline().split()
+                names.append(fields[0])
+                rates.append([float(x) for x in fields[1:]])
+        return cls(names, rates, callback, threshold)
+
+    def __weight(self, rate):
+        if not rate > 0:
+            raise ValueError(f'exchange rate {rate} is not positive')
+        return -math.log(rate) + self._threshold
+
+    def __vertex(self, currency):
+        if isinstance(currency, int):
+            if currency < 0 or currency >= len(self._names):
+                raise ValueError(f'currency {currency} is not between 0 and {len(self._names) - 1}')
+            return currency
+        if currency not in self._index:
+            raise ValueError(f'unknown currency {currency}')
+        return self._index[currency]
+
+    def update(self, ticks):
+        """
+        Applies a batch of quote ticks.
+        :param ticks: iterable of (base, quote, rate), currencies by name or index
+        :returns: the open Opportunity after the batch, or None
+        """
+        changes = [(self.__vertex(base), self.__vertex(quote), self.__weight(rate))
+                   for base, quote, rate in ticks]
+        self._spt.update(changes)
+        return self.__report()
+
+    def tick(self, base, quote, rate):
+        """
+        Applies a single quote tick.
+        """
+        return self.update([(base, quote, rate)])
+
+    def opportunity(self):
+        """
+        :returns: the open Opportunity, or None
+        """
+        return self._current
+
+    def __report(self):
+        if not self._spt.has_negative_cycle():
+            self._current = self._key = None
+            return None
+        edges = list()
+        cycle = self._spt.negative_cycle()
+        while not cycle.empty():
+            edges.append(cycle.get())
+        vertices = [e.tail() for e in edges]
+        # the same cycle may come back starting at another currency
+        start = vertices.index(min(vertices))
+        key = tuple(vertices[start:] + vertices[:start])
+        log_rate = -sum(e.weight() - self._threshold for e in edges)
+        self._current = Opportunity([self._names[v] for v in key + key[:1]], math.exp(log_rate))
+        if key != self._key:
+            self._key = key
+            if self._callback is not None:
+                self._callback(self._current)
+        return self._current
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'currencies={len(self._names)}, ' \
+               f'opportunity={self._current})>'
+
+
+def _percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+def _benchmark(currencies=60, batches=400, batch_size=10, spread=0.002, seed=11):
+    """
+    Replays a random-walk quote stream through an ArbitrageMonitor and
+    through the from-scratch path (rebuild the digraph and run
+    BellmanFordSPFA on every batch), and prints latency percentiles.
+    About one batch in twenty carries a mispriced quote that opens an
+    arbitrage until a later tick on the same pair replaces it.
+    """
+    rnd = random.Random(seed)
+    prices = [math.exp(rnd.uniform(-3, 3)) for _ in range(currencies)]
+
+    def quote(v, w):
+        return prices[w] / prices[v] * (1 - spread) * math.exp(rnd.uniform(-spread / 4, spread / 4))
+
+    rates = [[1.0 if v == w else quote(v, w) for w in range(currencies)] for v in range(currencies)]
+    names = [f'C{v:03d}' for v in range(currencies)]
+    found = list()
+    monitor = ArbitrageMonitor(names, rates, found.append)
+    weight = lambda rate: -math.log(rate) + 1e-9
+    incremental, scratch = list(), list()
+    for _ in range(batches):
+        ticks = list()
+        for _ in range(batch_size):
+            v, w = rnd.sample(range(currencies), 2)
+            prices[v] *= math.exp(rnd.gauss(0, spread / 10))
+            ticks.append((v, w, quote(v, w)))
+        if rnd.random() < 0.05:
+            v, w = rnd.sample(range(currencies), 2)
+            ticks.append((v, w, rates[w][v] ** -1 * (1 + 10 * spread)))
+        for v, w, rate in ticks:
+            rates[v][w] = rate
+
+        start = time.perf_counter()
+        opened = monitor.update(ticks)
+        incremental.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        spt = BellmanFordSPFA(_complete(rates, weight), 0)
+        scratch.append(time.perf_counter() - start)
+        assert (opened is not None) == spt.has_negative_cycle()
+
+    print(f'{currencies} currencies, {batches} batches of {batch_size} ticks, '
+          f'{len(found)} opportunities reported')
+    for name, samples in (('incremental', incremental), ('from scratch', scratch)):
+        print(f'{name:13} p50 {_percentile(samples, 0.50) * 1e3:8.3f} ms   '
+              f'p99 {_percentile(samples, 0.99) * 1e3:8.3f} ms   '
+              f'max {max(samples) * 1e3:8.3f} ms')
+
+
+def main():
+    monitor = ArbitrageMonitor.from_file('../resources/rates.txt', print)
+    print(monitor)
+    # the USD->CHF->CAD->USD loop stops paying; the callback sees the next one
+    monitor.update([('USD', 'CHF', 1.050), ('CHF', 'CAD', 0.950)])
+    # quotes that leave the open cycle in place are not reported again
+    monitor.tick('EUR', 'GBP', 0.890)
+    print(monitor)
+    _benchmark()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+"""
+bellman_ford_spfa.py
+Queue-based Bellman-Ford with subtree disassembly.
+The BellmanFordSPFA class solves the single-source shortest paths
+ *  problem in edge-weighted digraphs with arbitrary (possibly negative)
+ *  weights, or finds a negative cycle reachable from the source. It has
+ *  the API of BellmanFordSP.
+ *
+ *  This implementation differs from BellmanFordSP in four ways:
+ *    1. the FIFO of vertices to scan is a ring buffer in an array('i'),
+ *       with a bytearray of queue states instead of Queue nodes;
+ *    2. the order of the queue follows the small-label-first (SLF) and
+ *       large-label-last (LLL) heuristics: a vertex whose label is below
+ *       the label at the front is pushed to the front, and a vertex whose
+ *       label is above the queue average is sent to the back when popped;
+ *    3. negative cycles are found by Tarjan's subtree disassembly. The
+ *       shortest-paths tree is kept as a preorder thread with depths; when
+ *       v->w improves w, the subtree of w is cut out and its vertices
+ *       leave the queue, and if v is in that subtree, v->w closes a
+ *       negative cycle. This replaces rebuilding the tree as a digraph and
+ *       running EdgeWeightedDirectedCycle every V relaxations;
+ *    4. update() changes edge weights and re-scans only the vertices that
+ *       the changes affect instead of starting over.
+ *
+ *  The digraph is frozen to CSR form on construction, so the engine owns
+ *  its weights and update() never modifies the caller's digraph.
+ *  The constructor takes O(E V) time in the worst case and usually far
+ *  less; it uses Theta(V) extra space besides the CSR copy.
+"""
+import math
+from array import array
+from queue import LifoQueue
+
+from graphs.csr_graph import CSRDigraph, CSREdgeWeightedDigraph
+from graphs.directed_edge import DirectedEdge
+from graphs.edge_list_loader import load_edge_weighted_digraph
+
+
+class _RingQueue:
+    """
+    Double-ended queue of at most {capacity} vertices in a circular array.
+    """
+
+    def __init__(self, capacity):
+        self._items = array('i', bytes(4 * max(1, capacity)))
+        self._first = 0
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def peek(self):
+        return self._items[self._first]
+
+    def push_back(self, v):
+        self._items[(self._first + self._n) % len(self._items)] = v
+        self._n += 1
+
+    def push_front(self, v):
+        self._first = (self._first - 1) % len(self._items)
+        self._items[self._first] = v
+        self._n += 1
+
+    def pop_front(self):
+        v = self._items[self._first]
+        self._first = (self._first + 1) % len(self._items)
+        self._n -= 1
+        return v
+
+    def clear(self):
+        self._first = self._n = 0
+
+
+class BellmanFordSPFA:
+    # queue states: a STALE vertex is still in the ring buffer but was cut
+    # out of the tree, and is skipped when it reaches the front
+    _OFF, _ACTIVE, _STALE = 0, 1, 2
+
+    def __init__(self, g, s, slf=True, lll=True):
+        """
+        :param g: the edge-weighted digraph (Bag-based or CSR)
+        :param s: the source vertex
+        :param slf: use the small-label-first heuristic
+        :param lll: use the large-label-last heuristic
+        """
+        if not isinstance(g, CSREdgeWeightedDigraph):
+            g = g.freeze()
+        V = g.get_V()
+        self._V = V
+        self._offsets, self._targets = g.offsets, g.targets
+        self._weights = array('d', g.weights)
+        self._reverse = None
+        self._s = s
+        self.__validate_vertex(s)
+        self._slf, self._lll = slf, lll
+        self._dist_to = [math.inf] * V
+        self._edge_to = array('i', [-1]) * V  # CSR index of the tree edge into v
+        self._parent = array('i', [-1]) * V
+        # the shortest-paths tree as a preorder thread
+        self._succ = array('i', [-1]) * V
+        self._pred = array('i', [-1]) * V
+        self._depth = array('i', bytes(4 * V))
+        self._in_tree = bytearray(V)
+        self._state = bytearray(V)
+        self._queue = _RingQueue(V)
+        self._queue_sum, self._queue_count = 0.0, 0
+        self._cycle = None
+        self._scans = 0
+        self.__start()
+        assert self.__check()
+
+    def __start(self):
+        V, s = self._V, self._s
+        for v in range(V):
+            self._dist_to[v] = math.inf
+            self._edge_to[v] = self._parent[v] = self._succ[v] = self._pred[v] = -1
+            self._in_tree[v] = self._state[v] = 0
+        self._queue.clear()
+        self._queue_sum, self._queue_count = 0.0, 0
+        self._cycle = None
+        self._dist_to[s] = 0.0
+        self._in_tree[s] = 1
+        self._depth[s] = 0
+        self.__push(s)
+        self.__run()
+
+    def __push(self, v):
+        """
+        Queues v, or reactivates it if it is still in the ring buffer.
+        """
+        state = self._state[v]
+        if state == self._ACTIVE:
+            return
+        self._state[v] = self._ACTIVE
+        self._queue_sum += self._dist_to[v]
+        self._queue_count += 1
+        if state == self._STALE:
+            return
+        queue = self._queue
+        if self._slf and len(queue) and self._dist_to[v] < self._dist_to[queue.peek()]:
+            queue.push_front(v)
+        else:
+            queue.push_back(v)
+
+    def __pop(self):
+        queue, state, dist_to = self._queue, self._state, self._dist_to
+        rotations = len(queue)
+        while len(queue):
+            v = queue.peek()
+            if state[v] == self._STALE:
+                queue.pop_front()
+                state[v] = self._OFF
+                continue
+            # large label last: send labels above the average to the back
+            if self._lll and rotations > 0 and dist_to[v] * self._queue_count > self._queue_sum:
+                queue.push_back(queue.pop_front())
+                rotations -= 1
+                continue
+            queue.pop_front()
+            state[v] = self._OFF
+            self._queue_sum -= dist_to[v]
+            self._queue_count -= 1
+            return v
+        return None
+
+    def __run(self):
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        dist_to, state = self._dist_to, self._state
+        while True:
+            v = self.__pop()
+            if v is None:
+                return
+            self._scans += 1
+            dv = dist_to[v]
+            for i in range(offsets[v], offsets[v + 1]):
+                w = targets[i]
+                d = dv + weights[i]
+                if d < dist_to[w]:
+                    if not self.__reattach(v, w, i):
+                        return
+                    if state[w] == self._ACTIVE:
+                        self._queue_sum += d - dist_to[w]
+                    dist_to[w] = d
+                    self.__push(w)
+
+    def __reattach(self, v, w, i):
+        """
+        Makes v->w (CSR index i) the tree edge into w after cutting out the
+        subtree of w. Returns False, with the cycle recorded, if v is in it.
+        """
+        succ, pred, depth, in_tree = self._succ, self._pred, self._depth, self._in_tree
+        if v == w:
+            self._cycle = [(v, i)]
+            return False
+        if in_tree[w]:
+            x, dw = succ[w], depth[w]
+            while x != -1 and depth[x] > dw:
+                if x == v:
+                    self.__record_cycle(v, w, i)
+                    return False
+                # x keeps its stale parent until it is reattached, so that
+                # a cycle found further down the subtree can still be traced
+                in_tree[x] = 0
+                if self._state[x] == self._ACTIVE:
+                    self._state[x] = self._STALE
+                    self._queue_sum -= self._dist_to[x]
+                    self._queue_count -= 1
+                x = succ[x]
+            # splice w and its former subtree out of the thread
+            p = pred[w]
+            if p != -1:
+                succ[p] = x
+            if x != -1:
+                pred[x] = p
+        # thread w in right after v
+        nxt = succ[v]
+        succ[w], pred[w] = nxt, v
+        if nxt != -1:
+            pred[nxt] = w
+        succ[v] = w
+        depth[w] = depth[v] + 1
+        in_tree[w] = 1
+        self._parent[w], self._edge_to[w] = v, i
+        return True
+
+    def __record_cycle(self, v, w, i):
+        # w is an ancestor of v: the tree path w ~> v plus v->w
+        cycle = [(v, i)]
+        x = v
+        while x != w:
+            cycle.append((self._parent[x], self._edge_to[x]))
+            x = self._parent[x]
+        cycle.reverse()
+        self._cycle = cycle
+
+    def __edge_index(self, v, w):
+        return [i for i in range(self._offsets[v], self._offsets[v + 1]) if self._targets[i] == w]
+
+    def __predecessors(self, w):
+        if self._reverse is None:
+            tails = array('i', bytes(4 * len(self._targets)))
+            for v in range(self._V):
+                for i in range(self._offsets[v], self._offsets[v + 1]):
+                    tails[i] = v
+            self._reverse = CSRDigraph.from_edges(self._V, self._targets, tails)
+        return self._reverse.adj_items(w)
+
+    def update(self, changes):
+        """
+        Changes edge weights and brings the shortest paths up to date.
+        Only vertices whose distance can change are re-scanned: the tails
+        of edges that got lighter, and the vertices leading into the
+        subtrees below tree edges that got heavier (those subtrees are
+        relabeled from scratch). After a negative cycle has been found,
+        the whole computation is redone.
+        :param changes: iterable of (v, w, weight); every edge v->w gets {weight}
+        :raises ValueError: if a digraph has no edge v->w
+        """
+        rescan, invalid = set(), list()
+        for v, w, weight in changes:
+            self.__validate_vertex(v)
+            self.__validate_vertex(w)
+            indices = self.__edge_index(v, w)
+            if not indices:
+                raise ValueError(f'there is no edge {v}->{w}')
+            for i in indices:
+                old, self._weights[i] = self._weights[i], weight
+                if weight < old:
+                    rescan.add(v)
+                elif weight > old and self._edge_to[w] == i:
+                    invalid.append(w)
+        if self._cycle is not None:
+            self.__start()
+            return self
+        removed = list()
+        for w in invalid:
+            if self._in_tree[w]:
+                removed.extend(self.__cut(w))
+        for x in removed:
+            for u in self.__predecessors(x):
+                rescan.add(u)
+        for v in rescan:
+            if self._in_tree[v] and self._dist_to[v] < math.inf:
+                self.__push(v)
+        self.__run()
+        return self
+
+    def __cut(self, w):
+        """
+        Removes the subtree of w from the tree and unlabels its vertices.
+        """
+        succ, pred, depth = self._succ, self._pred, self._depth
+        removed = [w]
+        x, dw = succ[w], depth[w]
+        while x != -1 and depth[x] > dw:
+            removed.append(x)
+            x = succ[x]
+        p = pred[w]
+        if p != -1:
+            succ[p] = x
+        if x != -1:
+            pred[x] = p
+        for y in removed:
+            self._in_tree[y] = 0
+            self._dist_to[y] = math.inf
+            self._parent[y] = self._edge_to[y] = succ[y] = pred[y] = -1
+        return removed
+
+    def has_negative_cycle(self):
+        return self._cycle is not None
+
+    def negative_cycle(self):
+        """
+        Returns the edges of a negative cycle reachable from the source,
+        in cycle order from the top of the stack, or None.
+        """
+        if self._cycle is None:
+            return None
+        cycle = LifoQueue()
+        for v, i in reversed(self._cycle):
+            cycle.put(DirectedEdge(v, self._targets[i], self._weights[i]))
+        return cycle
+
+    def dist_to(self, v):
+        self.__validate_vertex(v)
+        if self.has_negative_cycle():
+            raise Exception('Negative cost cycle exists')
+        return self._dist_to[v]
+
+    def has_path_to(self, v):
+        self.__validate_vertex(v)
+        return self._dist_to[v] < math.inf
+
+    def path_to(self, v):
+        self.__validate_vertex(v)
+        if self.has_negative_cycle():
+            raise Exception('Negative cost cycle exists')
+        if not self.has_path_to(v):
+            return None
+        path = LifoQueue()
+        while self._edge_to[v] != -1:
+            i = self._edge_to[v]
+            path.put(DirectedEdge(self._parent[v], v, self._weights[i]))
+            v = self._parent[v]
+        return path
+
+    def scans(self):
+        """
+        :returns: the number of vertex scans done so far
+        """
+        return self._scans
+
+    def __validate_vertex(self, v):
+        n = self._V
+        if v < 0 or v >= n:
+            raise AttributeError(f'vertex {v} is not between 0 and {n - 1}')
+
+    def __check(self):
+        if self.has_negative_cycle():
+            weight = sum(self._weights[i] for _, i in self._cycle)
+            # a zero-weight cycle can look negative after rounding
+            if weight > 1e-12:
+                print(f'error: weight of negative cycle = {weight}')
+                return False
+            return True
+        for v in range(self._V):
+            if self._dist_to[v] == math.inf:
+                continue
+            for i in range(self._offsets[v], self._offsets[v + 1]):
+                if self._dist_to[v] + self._weights[i] < self._dist_to[self._targets[i]]:
+                    print(f'edge {v}->{self._targets[i]} is not relaxed')
+                    return False
+        return True
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(\n' \
+               f'_dist_to={self._dist_to}, \n' \
+               f'_edge_to={list(self._edge_to)})>'
+
+
+def main():
+    g = load_edge_weighted_digraph("../resources/tinyEWDn.txt")
+    s = 0
+    sp = BellmanFordSPFA(g, s)
+    for t in range(g.get_V()):
+        if sp.has_path_to(t):
+            print(f'{s} to {t} ({sp.dist_to(t):5.2f})  ', end="")
+            q = sp.path_to(t)
+            while not q.empty():
+                print(q.get(), end="   ")
+            print()
+        else:
+            print(f'{s} to {t} no path')
+    print(f'{sp.scans()} scans')
+
+    # make 5->1 negative enough to close the cycle 1->3->6->4->5->1
+    sp.update([(5, 1, -1.5)])
+    print('negative cycle:')
+    q = sp.negative_cycle()
+    while not q.empty():
+        print(q.get())
+
+    g = load_edge_weighted_digraph("../resources/tinyEWDnc.txt")
+    sp = BellmanFordSPFA(g, s)
+    print('negative cycle:')
+    q = sp.negative_cycle()
+    while not q.empty():
+        print(q.get())
+
+
+if __name__ == '__main__':
+    main()
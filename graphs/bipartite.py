@@ -11,7 +11,8 @@ The Bipartite class represents a data type for
  *  bi-partition; if not, the odd_cycle operation determines a
  *  cycle with an odd number of edges.
  *
- *  This implementation uses depth-first search.
+ *  This implementation uses depth-first search with an explicit stack
+ *  (IterativeDFS).
  *  The constructor takes Theta V + E) time in
  *  the worst case, where V is the number of vertices and E
  *  is the number of edges.
@@ -19,25 +20,24 @@ The Bipartite class represents a data type for
  *  It uses Theta V) extra space (not including the graph).
 """
 from graphs.graph import Graph
+from graphs.iterative_dfs import IterativeDFS
 from collections import deque
 
 
 class Bipartite:
 
-    _cycle = list()
-
     def __init__(self, g):
         """
         :param g: the Graph
         """
         self._g = g
         self.__set_is_bipartite(True)
+        self._cycle = None
         self._color = [False for _ in range(g.get_V())]
-        self._marked = [False for _ in range(g.get_V())]
-        self._edge_to = [0 for _ in range(g.get_V())]
-        for v in range(g.get_V()):
-            if not self._marked[v]:
-                self.__dfs(g, v)
+        dfs = IterativeDFS(g, parents=True)
+        self._marked = dfs.get_marked()
+        self._edge_to = dfs.get_edge_to()
+        dfs.search_all(tree_edge=self.__tree_edge, non_tree_edge=self.__non_tree_edge)
 
         assert self.__check(g)
 
@@ -63,27 +63,23 @@ class Bipartite:
         self._is_bipartite = bip
         return
 
-    def __dfs(self, g, v):
-        self.get_marked()[v] = True
-
-        for w in g.adj_vertices(v):
-            if self.get_cycle() is not None:
-                return
-            # found uncolored vertex, so recur
-            if not self.get_marked()[w.item]:
-                self.get_edge_to()[w.item] = v
-                self.get_color()[w] = not self.get_color()[v]
-                self.__dfs(g, w)
-            # if v-w create an odd-length cycle, find it
-            elif self.get_color()[w] == self.get_color()[v]:
-                self.__set_is_bipartite(False)
-                cycle = self.get_cycle()
-                cycle.append(w)
-                x = v
-                while x != w:
-                    cycle.append(x)
-                    x = self.get_edge_to()[x]
-                cycle.append(w)
+    def __tree_edge(self, v, w):
+        # found uncolored vertex: give it the other color
+        self._color[w] = not self._color[v]
+
+    def __non_tree_edge(self, v, w):
+        if self._color[w] != self._color[v]:
+            return False
+        # v-w creates an odd-length cycle: w, ..., v, w
+        self.__set_is_bipartite(False)
+        self._cycle = deque()
+        self._cycle.appendleft(w)
+        x = v
+        while x != w:
+            self._cycle.appendleft(x)
+            x = self._edge_to[x]
+        self._cycle.appendleft(w)
+        return True
 
     def __is_bipartite(self):
         return self.get_is_bipartite()
@@ -99,8 +95,8 @@ class Bipartite:
 
     def __check(self, g):
         if self.get_is_bipartite():
-            for v in range(g.get_V):
-                for w in g.adj_vertices(v):
+            for v in range(g.get_V()):
+                for w in g.adj_items(v):
                     if self.get_color()[v] == self.get_color()[w]:
                         print(
                             f'edge {v}-{w} with {v} and {w} in same side of '
@@ -127,7 +123,7 @@ class Bipartite:
                f'g={self.get_g()}, ' \
                f'cycle={self.get_cycle()}, ' \
                f'is_bi_partite={self.get_is_bipartite()})>' \
-               f'edge_to={self.get_edge_to()}' \
+               f'edge_to={list(self.get_edge_to())}' \
                f'color={self.get_color()}\n'
 
     
@@ -56,12 +56,12 @@ class BreadthFirstPaths:
         print(queue)
         while queue:
             v = queue.pop()
-            for w in g.adj_vertices(v):
-                if not self.get_marked()[w.item]:
-                    self.get_edge_to()[w.item] = v
-                    self.get_dist_to()[w.item] = self.get_dist_to()[v] + 1
-                    self.get_marked()[w.item] = True
-                    queue.appendleft(w.item)
+            for w in g.adj_items(v):
+                if not self.get_marked()[w]:
+                    self.get_edge_to()[w] = v
+                    self.get_dist_to()[w] = self.get_dist_to()[v] + 1
+                    self.get_marked()[w] = True
+                    queue.appendleft(w)
 
     def has_path_to(self, v):
         self.validate_vertex(v)
@@ -14,7 +14,8 @@ vertices in the connected component: two vertices have the same component
 identifier if and only if they are in the same connected component.
 
 
-This implementation uses depth-first search.
+This implementation uses depth-first search with an explicit stack
+(IterativeDFS).
 The constructor takes Theta;(V + E) time,
 where V is the number of vertices and E is the
 number of edges.
@@ -24,6 +25,7 @@ It uses Theta;(V) extra space (not including the graph).
 """
 from collections import deque
 from graphs.graph import Graph
+from graphs.iterative_dfs import IterativeDFS
 
 
 class CC:
@@ -34,12 +36,13 @@ class CC:
         """
         self._g = g
         self._id = [0 for _ in range(g.get_V())]
-        self._marked = [False for _ in range(g.get_V())]
         self._size = [0 for _ in range(g.get_V())]
         self._count = 0
+        dfs = IterativeDFS(g)
+        self._marked = dfs.get_marked()
         for v in range(g.get_V()):
             if not self.get_marked()[v]:
-                self.__dfs(g, v)
+                dfs.search(v, pre=self.__visit)
                 self._count += 1
 
     def get_g(self):
@@ -57,13 +60,9 @@ class CC:
     def get_count(self):
         return self._count
 
-    def __dfs(self, g, v):
-        self.get_marked()[v] = True
-        self.get_id()[v] = self.get_count()
-        self.get_size()[self.get_count()] += 1
-        for w in g.adj_vertices(v):
-            if not self.get_marked()[w.item]:
-                self.__dfs(g, w.item)
+    def __visit(self, v):
+        self._id[v] = self._count
+        self._size[self._count] += 1
 
     # Returns the component id of the connected component containing vertex v
     def id(self, v):
@@ -92,7 +91,7 @@ class CC:
                f'id={self.get_id()}, \n' \
                f'size={self.get_size()}\n' \
                f'count={self.get_count()}\n' \
-               f'marked={self.get_marked()})>'
+               f'marked={list(self.get_marked())})>'
 
 
 def main():
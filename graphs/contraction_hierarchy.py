@@ -0,0 +1,399 @@
+"""
+contraction_hierarchy.py
+Contraction hierarchies for repeated shortest-path queries on a
+ *  static edge-weighted digraph with non-negative weights.
+The ContractionHierarchy class preprocesses the digraph once: vertices
+ *  are contracted one at a time in order of increasing importance, and
+ *  whenever removing v would destroy a shortest path u->v->w, a shortcut
+ *  edge u->w of the same length is added. The importance of v is its
+ *  edge difference (shortcuts added minus edges removed) plus the number
+ *  of neighbours already contracted, recomputed lazily when v reaches
+ *  the top of the priority queue. A witness search (Dijkstra from u that
+ *  avoids v, bounded by the candidate length and a settle limit) decides
+ *  whether a shortcut is needed; hitting the limit only adds a spare
+ *  shortcut, never a wrong answer.
+ *
+ *  The result is the rank of every vertex plus, for every vertex, the
+ *  edges to higher-ranked vertices in both directions, all held in flat
+ *  arrays. A shortcut keeps the ids of the two edges it replaces, so any
+ *  path can be unpacked into edges of the original digraph. save() and
+ *  load() write and read the arrays in a versioned binary file.
+ *
+ *  The ContractionHierarchySP class answers queries: a forward search
+ *  from s and a backward search from t, each relaxing only edges that go
+ *  up in rank, meet at the highest vertex of a shortest path. Each
+ *  search settles a few hundred vertices even on large road networks.
+"""
+import heapq
+import math
+import os
+import random
+import struct
+import sys
+import tempfile
+from array import array
+from queue import LifoQueue
+
+from graphs.dijkstra_sp import DijkstraSP
+from graphs.directed_edge import DirectedEdge
+from graphs.edge_list_loader import load_edge_weighted_digraph
+from graphs.edge_weighted_digraph import EdgeWeightedDigraph
+
+_MAGIC = b'CHIX'
+_HEADER = struct.Struct('<4sBB2xqqqq')
+
+
+class ContractionHierarchy:
+    VERSION = 1
+    WITNESS_SETTLE_LIMIT = 200
+
+    def __init__(self, g=None, witness_settle_limit=WITNESS_SETTLE_LIMIT):
+        """
+        Preprocesses the edge-weighted digraph {g}.
+        :param g: the edge-weighted digraph, or None for an empty hierarchy
+                  to be filled by load()
+        :param witness_settle_limit: vertices a witness search may settle
+        """
+        self._V = 0
+        self._rank = array('i')
+        # edge arrays; child1/child2 are the ids of the two halves of a
+        # shortcut, or -1 for an edge of the original digraph
+        self._tail, self._head = array('i'), array('i')
+        self._weight = array('d')
+        self._child1, self._child2 = array('i'), array('i')
+        # up_out: edges v->w with rank[w] > rank[v], grouped by v
+        # up_in:  edges u->v with rank[u] > rank[v], grouped by v
+        self._up_out_offsets, self._up_out = array('q', [0]), array('i')
+        self._up_in_offsets, self._up_in = array('q', [0]), array('i')
+        self._limit = witness_settle_limit
+        if g is not None:
+            self.__preprocess(g)
+
+    def get_V(self):
+        return self._V
+
+    def rank(self, v):
+        self._validate_vertex(v)
+        return self._rank[v]
+
+    def shortcut_count(self):
+        return sum(1 for c in self._child1 if c >= 0)
+
+    def _validate_vertex(self, v):
+        if v < 0 or v >= self._V:
+            raise AttributeError(f'vertex {v} is not between 0 and {self._V - 1}')
+
+    def __new_edge(self, v, w, weight, child1=-1, child2=-1):
+        self._tail.append(v)
+        self._head.append(w)
+        self._weight.append(weight)
+        self._child1.append(child1)
+        self._child2.append(child2)
+        return len(self._tail) - 1
+
+    def __preprocess(self, g):
+        V = self._V = g.get_V()
+        # keep the lightest of any parallel edges; self-loops never lie on a shortest path
+        lightest = [dict() for _ in range(V)]
+        for v in range(V):
+            for e in g.adj_items(v):
+                if e.weight() < 0:
+                    raise ValueError(f'edge {e} has negative weight')
+                w = e.head()
+                if w != v and e.weight() < lightest[v].get(w, math.inf):
+                    lightest[v][w] = e.weight()
+        out = [dict() for _ in range(V)]  # out[v][w] = id of the current edge v->w
+        into = [dict() for _ in range(V)]  # into[w][v] = the same id
+        for v in range(V):
+            for w, weight in lightest[v].items():
+                out[v][w] = into[w][v] = self.__new_edge(v, w, weight)
+        del lightest
+
+        up_out, up_in = [None] * V, [None] * V
+        contracted_neighbours = [0] * V
+        pq = [(self.__contract(v, out, into, contracted_neighbours, False), v) for v in range(V)]
+        heapq.heapify(pq)
+        self._rank = array('i', bytes(4 * V))
+        order = 0
+        while pq:
+            _, v = heapq.heappop(pq)
+            # lazy update: re-queue v if it is no longer the least important
+            priority = self.__contract(v, out, into, contracted_neighbours, False)
+            if pq and priority > pq[0][0]:
+                heapq.heappush(pq, (priority, v))
+                continue
+            self.__contract(v, out, into, contracted_neighbours, True)
+            self._rank[v] = order
+            order += 1
+            # every remaining neighbour of v will be ranked above it
+            up_out[v] = list(out[v].values())
+            up_in[v] = list(into[v].values())
+            for w in out[v]:
+                del into[w][v]
+                contracted_neighbours[w] += 1
+            for u in into[v]:
+                del out[u][v]
+                contracted_neighbours[u] += 1
+            out[v], into[v] = None, None
+        self.__pack(up_out, self._up_out_offsets, self._up_out)
+        self.__pack(up_in, self._up_in_offsets, self._up_in)
+
+    @staticmethod
+    def __pack(lists, offsets, entries):
+        for ids in lists:
+            entries.extend(ids)
+            offsets.append(len(entries))
+
+    def __contract(self, v, out, into, contracted_neighbours, commit):
+        """
+        Finds the shortcuts that contracting {v} needs and adds them if
+        {commit}; returns the importance (edge difference) of {v}.
+        """
+        weight = self._weight
+        shortcuts = 0
+        outs = list(out[v].items())
+        for u, uv in list(into[v].items()):
+            targets = [(w, vw) for w, vw in outs if w != u]
+            if not targets:
+                continue
+            max_len = weight[uv] + max(weight[vw] for _, vw in targets)
+            dist = self.__witness(out, u, v, max_len)
+            for w, vw in targets:
+                length = weight[uv] + weight[vw]
+                if dist.get(w, math.inf) <= length:
+                    continue  # a path u->w that avoids v is as short
+                shortcuts += 1
+                if commit:
+                    uw = out[u].get(w)
+                    if uw is None or length < weight[uw]:
+                        out[u][w] = into[w][u] = self.__new_edge(u, w, length, uv, vw)
+        return shortcuts - len(outs) - len(into[v]) + contracted_neighbours[v]
+
+    def __witness(self, out, source, skip, max_len):
+        """
+        Bounded Dijkstra from {source} that never enters {skip}.
+        The returned distances are upper bounds of paths that avoid {skip}.
+        """
+        weight = self._weight
+        dist = {source: 0.0}
+        pq = [(0.0, source)]
+        settled = 0
+        while pq:
+            d, x = heapq.heappop(pq)
+            if d > dist[x]:
+                continue
+            if d > max_len or settled >= self._limit:
+                break
+            settled += 1
+            for y, xy in out[x].items():
+                if y == skip:
+                    continue
+                nd = d + weight[xy]
+                if nd < dist.get(y, math.inf):
+                    dist[y] = nd
+                    heapq.heappush(pq, (nd, y))
+        return dist
+
+    def unpack(self, edge_id):
+        """
+        Expands an edge of the hierarchy into edges of the original digraph.
+        :returns: a list of DirectedEdge objects from tail to head
+        """
+        edges = list()
+        stack = [edge_id]
+        while stack:
+            i = stack.pop()
+            if self._child1[i] < 0:
+                edges.append(DirectedEdge(self._tail[i], self._head[i], self._weight[i]))
+            else:
+                stack.append(self._child2[i])
+                stack.append(self._child1[i])
+        return edges
+
+    def __columns(self):
+        return (self._rank, self._tail, self._head, self._weight, self._child1, self._child2,
+                self._up_out_offsets, self._up_out, self._up_in_offsets, self._up_in)
+
+    def save(self, path):
+        """
+        Writes the hierarchy to {path}.
+        """
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, self.VERSION, sys.byteorder == 'big',
+                                 self._V, len(self._tail), len(self._up_out), len(self._up_in)))
+            for column in self.__columns():
+                column.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a hierarchy written by save().
+        :raises ValueError: if the file is not a hierarchy of this version
+        """
+        ch = cls()
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f'{path} is not a contraction hierarchy')
+            magic, version, big_endian, V, m, n_out, n_in = _HEADER.unpack(header)
+            if magic != _MAGIC or version != cls.VERSION:
+                raise ValueError(f'{path} is not a version {cls.VERSION} contraction hierarchy')
+            ch._V = V
+            ch._up_out_offsets, ch._up_in_offsets = array('q'), array('q')
+            sizes = (V, m, m, m, m, m, V + 1, n_out, V + 1, n_in)
+            for column, n in zip(ch.__columns(), sizes):
+                column.fromfile(f, n)
+                if bool(big_endian) != (sys.byteorder == 'big'):
+                    column.byteswap()
+        return ch
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'V={self._V}, ' \
+               f'edges={len(self._tail)}, ' \
+               f'shortcuts={self.shortcut_count()})>'
+
+
+class ContractionHierarchySP:
+
+    def __init__(self, ch: ContractionHierarchy):
+        """
+        :param ch: the preprocessed contraction hierarchy
+        """
+        self._ch = ch
+        self._s = self._t = None
+        self._dist = math.inf
+        self._meet = None
+        self._settled = 0
+        self._edge_to = (dict(), dict())
+
+    def search(self, s, t):
+        """
+        Computes a shortest path from {s} to {t}.
+        :returns: this object
+        """
+        ch = self._ch
+        ch._validate_vertex(s)
+        ch._validate_vertex(t)
+        weight, tail, head = ch._weight, ch._tail, ch._head
+        # side 0 searches up from s along up_out, side 1 up from t along up_in
+        sides = ((ch._up_out_offsets, ch._up_out, head), (ch._up_in_offsets, ch._up_in, tail))
+        dist = ({s: 0.0}, {t: 0.0})
+        edge_to = (dict(), dict())
+        settled = (set(), set())
+        pqs = ([(0.0, s)], [(0.0, t)])
+        mu, meet = math.inf, None
+        while True:
+            # a side is done once its smallest key cannot improve mu
+            live = [i for i in (0, 1) if pqs[i] and pqs[i][0][0] < mu]
+            if not live:
+                break
+            i = min(live, key=lambda side: pqs[side][0][0])
+            d, v = heapq.heappop(pqs[i])
+            if v in settled[i]:
+                continue
+            settled[i].add(v)
+            other = dist[1 - i].get(v)
+            if other is not None and d + other < mu:
+                mu, meet = d + other, v
+            offsets, ids, far_end = sides[i]
+            for k in range(offsets[v], offsets[v + 1]):
+                e = ids[k]
+                w = far_end[e]
+                nd = d + weight[e]
+                if nd < dist[i].get(w, math.inf):
+                    dist[i][w] = nd
+                    edge_to[i][w] = e
+                    heapq.heappush(pqs[i], (nd, w))
+        self._s, self._t = s, t
+        self._dist, self._meet = mu, meet
+        self._edge_to = edge_to
+        self._settled = len(settled[0]) + len(settled[1])
+        return self
+
+    def __validate_target(self, v):
+        self._ch._validate_vertex(v)
+        if v != self._t:
+            raise ValueError(f'the last search was to {self._t}, not {v}')
+
+    def dist_to(self, v):
+        self.__validate_target(v)
+        return self._dist
+
+    def has_path_to(self, v):
+        return self.dist_to(v) < math.inf
+
+    def path_to(self, v):
+        """
+        Returns the original edges of a shortest path as a stack,
+        first edge on top, like DijkstraSP.path_to().
+        """
+        if not self.has_path_to(v):
+            return None
+        ch = self._ch
+        forward, backward = self._edge_to
+        ids = list()
+        x = self._meet
+        while x in forward:
+            ids.append(forward[x])
+            x = ch._tail[forward[x]]
+        ids.reverse()
+        x = self._meet
+        while x in backward:
+            ids.append(backward[x])
+            x = ch._head[backward[x]]
+        path = LifoQueue()  # stack
+        for e in reversed([e for i in ids for e in ch.unpack(i)]):
+            path.put(e)
+        return path
+
+    def settled_count(self):
+        return self._settled
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'_s={self._s}, ' \
+               f'_t={self._t}, ' \
+               f'_dist={self._dist}, ' \
+               f'settled={self._settled})>'
+
+
+def main():
+    # verify against DijkstraSP on random digraphs
+    rnd = random.Random(17)
+    for trial in range(20):
+        V = rnd.randint(2, 150)
+        g = EdgeWeightedDigraph(V)
+        for _ in range(rnd.randint(V, 5 * V)):
+            g.add_edge(DirectedEdge(rnd.randrange(V), rnd.randrange(V), round(rnd.uniform(0, 10), 2)))
+        ch = ContractionHierarchy(g)
+        query = ContractionHierarchySP(ch)
+        dijkstra = DijkstraSP(g)
+        for s in rnd.sample(range(V), min(V, 10)):
+            dijkstra.search(s)
+            for t in range(V):
+                query.search(s, t)
+                expected = dijkstra.dist_to(t)
+                assert abs(query.dist_to(t) - expected) < 1e-9 or query.dist_to(t) == expected == math.inf
+                if query.has_path_to(t):
+                    path = list(reversed(query.path_to(t).queue))
+                    assert abs(sum(e.weight() for e in path) - expected) < 1e-9
+    print('ContractionHierarchySP agrees with DijkstraSP on 20 random digraphs')
+
+    g = load_edge_weighted_digraph('../resources/tinyEWD.txt')
+    ch = ContractionHierarchy(g)
+    print(ch)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tinyEWD.ch')
+        ch.save(path)
+        loaded = ContractionHierarchy.load(path)
+    query = ContractionHierarchySP(loaded)
+    query.search(0, 6)
+    print(f'0 to 6 ({query.dist_to(6)})')
+    q = query.path_to(6)
+    while not q.empty():
+        print(q.get())
+
+
+if __name__ == '__main__':
+    main()
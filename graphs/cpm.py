@@ -3,67 +3,342 @@ cpm.py
 Critical path method
 The CPM class provides a client that solves the
  *  parallel precedence-constrained job scheduling problem
- *  via the critical path method. It reduces the problem
- *  to the longest-paths problem in edge-weighted DAGs.
- *  It builds an edge-weighted digraph (which must be a DAG)
- *  from the job-scheduling problem specification,
- *  finds the longest-paths tree, and computes the longest-paths
- *  lengths (which are precisely the start times for each job).
+ *  via the critical path method. Job j takes duration(j) time and must
+ *  finish before each of its successors starts. CPM computes the
+ *  earliest start of every job (the length of the longest path to it in
+ *  the precedence DAG), the finish time of the whole project, the latest
+ *  start of every job that does not delay the project, the slack between
+ *  the two, and a critical path: a chain of jobs with no slack.
  *
- *  This implementation uses AcyclicLP to find a longest
- *  path in a DAG.
- *  The program takes Theta(V + E) time in
- *  the worst case, where V is the number of jobs and
- *  E is the number of precedence constraints.
+ *  This implementation works on the jobs directly instead of reducing
+ *  them to a 2n + 2 vertex EdgeWeightedDigraph for AcyclicLP. The job
+ *  file is read a line at a time, tokens separated by any whitespace,
+ *  and the successor lists go straight into CSR arrays (the jobs arrive
+ *  in order, so no sort is needed). A topological order comes from
+ *  Kahn's algorithm; earliest starts are pushed forward along it and
+ *  latest finishes pulled backward along it, over array('d') columns.
+ *  The constructor takes Theta(n + m) time, where n is the number of
+ *  jobs and m the number of precedence constraints, and 40 bytes per job
+ *  plus 4 per constraint (twice that once a what-if change has built the
+ *  predecessor lists).
+ *
+ *  set_durations() handles what-if changes. The earliest starts are
+ *  recomputed only for the jobs downstream of a changed job, in
+ *  topological order, each from its predecessors. The latest starts are
+ *  recomputed only for the changed jobs and the jobs upstream of them if
+ *  the project finish time is unchanged, and by a full backward pass
+ *  otherwise.
 """
-from graphs.acyclic_lp import AcyclicLP
-from graphs.directed_edge import DirectedEdge
-from graphs.edge_weighted_digraph import EdgeWeightedDigraph
+import random
+import time
+from array import array
 
 
 class CPM:
 
+    def __init__(self, durations, offsets, successors):
+        """
+        :param durations: durations[j] = the duration of job j
+        :param offsets: the successors of job j are successors[offsets[j]:offsets[j + 1]]
+        :param successors: the successor lists, concatenated
+        :raises ValueError: if the precedence constraints have a cycle
+        """
+        n = len(durations)
+        if len(offsets) != n + 1 or offsets[n] != len(successors):
+            raise ValueError('offsets do not match durations and successors')
+        for s in successors:
+            if s < 0 or s >= n:
+                raise ValueError(f'job {s} is not between 0 and {n - 1}')
+        self._n = n
+        self._duration = array('d', durations)
+        self._offsets = array('q', offsets)
+        self._successors = array('i', successors)
+        self._pred_offsets = self._predecessors = None
+        self.__order()
+        self._start = array('d', bytes(8 * n))
+        self.__forward(self._order)
+        self._finish = max((self._start[j] + d for j, d in enumerate(self._duration)), default=0.0)
+        self._latest = array('d', bytes(8 * n))  # latest start
+        self.__backward_all()
+
+    @classmethod
+    def from_jobs(cls, jobs):
+        """
+        :param jobs: an iterable of (duration, successors) in job order
+        """
+        durations, offsets, successors = array('d'), array('q', [0]), array('i')
+        for duration, after in jobs:
+            durations.append(duration)
+            successors.extend(after)
+            offsets.append(len(successors))
+        return cls(durations, offsets, successors)
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Reads a job file: the number of jobs, then one line per job with its
+        duration, its number of successors and the successors.
+        """
+        def jobs(f):
+            for number, line in enumerate(f, 2):
+                tokens = line.split()
+                if not tokens:
+                    continue
+                m = int(tokens[1])
+                if len(tokens) != m + 2:
+                    raise ValueError(f'line {number}: expected {m} successors, found {len(tokens) - 2}')
+                yield float(tokens[0]), map(int, tokens[2:])
+
+        with open(path) as f:
+            n = int(f.readline())
+            cpm = cls.from_jobs(jobs(f))
+        if cpm.size() != n:
+            raise ValueError(f'expected {n} jobs, found {cpm.size()}')
+        return cpm
+
+    def __order(self):
+        n, offsets, successors = self._n, self._offsets, self._successors
+        indegree = array('i', bytes(4 * n))
+        for s in successors:
+            indegree[s] += 1
+        order = array('i', (j for j in range(n) if indegree[j] == 0))
+        i = 0
+        while i < len(order):
+            j = order[i]
+            i += 1
+            for k in range(offsets[j], offsets[j + 1]):
+                s = successors[k]
+                indegree[s] -= 1
+                if indegree[s] == 0:
+                    order.append(s)
+        if len(order) < n:
+            raise ValueError('precedence constraints are not acyclic')
+        self._order = order
+        self._rank = array('i', bytes(4 * n))
+        for r, j in enumerate(order):
+            self._rank[j] = r
+
+    def __predecessors(self):
+        if self._predecessors is None:
+            n, offsets, successors = self._n, self._offsets, self._successors
+            pred_offsets = array('q', bytes(8 * (n + 1)))
+            for s in successors:
+                pred_offsets[s + 1] += 1
+            for j in range(n):
+                pred_offsets[j + 1] += pred_offsets[j]
+            cursor = pred_offsets[:-1]
+            predecessors = array('i', bytes(4 * len(successors)))
+            for j in range(n):
+                for k in range(offsets[j], offsets[j + 1]):
+                    s = successors[k]
+                    predecessors[cursor[s]] = j
+                    cursor[s] += 1
+            self._pred_offsets, self._predecessors = pred_offsets, predecessors
+        return self._pred_offsets, self._predecessors
+
+    def __forward(self, jobs):
+        """
+        Sets the earliest start of {jobs}, given in topological order, from
+        their predecessors.
+        """
+        start, duration = self._start, self._duration
+        if len(jobs) == self._n:
+            # every job: push each finish time forward along the edges
+            offsets, successors = self._offsets, self._successors
+            for j in jobs:
+                start[j] = 0.0
+            for j in jobs:
+                finish = start[j] + duration[j]
+                for k in range(offsets[j], offsets[j + 1]):
+                    s = successors[k]
+                    if start[s] < finish:
+                        start[s] = finish
+        else:
+            pred_offsets, predecessors = self.__predecessors()
+            for j in jobs:
+                best = 0.0
+                for k in range(pred_offsets[j], pred_offsets[j + 1]):
+                    p = predecessors[k]
+                    if best < start[p] + duration[p]:
+                        best = start[p] + duration[p]
+                start[j] = best
+
+    def __backward(self, jobs):
+        """
+        Sets the latest start of {jobs}, given in reverse topological order,
+        from their successors.
+        """
+        latest, duration = self._latest, self._duration
+        offsets, successors = self._offsets, self._successors
+        finish = self._finish
+        for j in jobs:
+            best = finish
+            for k in range(offsets[j], offsets[j + 1]):
+                if latest[successors[k]] < best:
+                    best = latest[successors[k]]
+            latest[j] = best - duration[j]
+
+    def __backward_all(self):
+        self.__backward(reversed(self._order))
+        self._latest_finish_time = self._finish
+
+    def __reachable(self, jobs, offsets, adj):
+        marked = set(jobs)
+        stack = list(marked)
+        while stack:
+            j = stack.pop()
+            for k in range(offsets[j], offsets[j + 1]):
+                s = adj[k]
+                if s not in marked:
+                    marked.add(s)
+                    stack.append(s)
+        return sorted(marked, key=self._rank.__getitem__)
+
+    def set_durations(self, changes):
+        """
+        Changes the durations of some jobs and updates the schedule.
+        :param changes: a dict from job to its new duration
+        :returns: the number of jobs whose earliest start was recomputed
+        """
+        for j in changes:
+            self.__validate_job(j)
+        if not changes:
+            return 0
+        start, duration = self._start, self._duration
+        downstream = self.__reachable(changes, self._offsets, self._successors)
+        # only the downstream jobs finish at a different time, so the rest
+        # need to be scanned only if one of them ended the project and the
+        # downstream jobs now end sooner
+        before = max(start[j] + duration[j] for j in downstream)
+        for j, d in changes.items():
+            duration[j] = d
+        self.__forward(downstream)
+        after = max(start[j] + duration[j] for j in downstream)
+        if after >= self._finish:
+            self._finish = after
+        elif before == self._finish:
+            self._finish = max((start[j] + d for j, d in enumerate(duration)), default=0.0)
+        if self._finish == self._latest_finish_time:
+            pred_offsets, predecessors = self.__predecessors()
+            self.__backward(reversed(self.__reachable(changes, pred_offsets, predecessors)))
+        else:
+            self.__backward_all()
+        return len(downstream)
+
+    def set_duration(self, j, duration):
+        return self.set_durations({j: duration})
+
+    def size(self):
+        """
+        :returns: the number of jobs
+        """
+        return self._n
+
+    def duration(self, j):
+        self.__validate_job(j)
+        return self._duration[j]
+
+    def earliest_start(self, j):
+        self.__validate_job(j)
+        return self._start[j]
+
+    def earliest_finish(self, j):
+        self.__validate_job(j)
+        return self._start[j] + self._duration[j]
+
+    def latest_start(self, j):
+        self.__validate_job(j)
+        return self._latest[j]
+
+    def latest_finish(self, j):
+        self.__validate_job(j)
+        return self._latest[j] + self._duration[j]
+
+    def slack(self, j):
+        """
+        :returns: how long job {j} can be delayed without delaying the project
+        """
+        self.__validate_job(j)
+        return self._latest[j] - self._start[j]
+
+    def is_critical(self, j):
+        return self.slack(j) <= self.__epsilon()
+
+    def __epsilon(self):
+        return 1e-9 * max(1.0, abs(self._finish))
+
+    def finish_time(self):
+        return self._finish
+
+    def critical_path(self):
+        """
+        :returns: the jobs of a critical path, in order
+        """
+        epsilon = self.__epsilon()
+        start, duration, latest = self._start, self._duration, self._latest
+        offsets, successors = self._offsets, self._successors
+        path = list()
+        candidates = (j for j in self._order if start[j] <= epsilon and latest[j] - start[j] <= epsilon)
+        j = next(candidates, None)
+        while j is not None:
+            path.append(j)
+            finish = start[j] + duration[j]
+            j = next((s for s in successors[offsets[j]:offsets[j + 1]]
+                      if abs(start[s] - finish) <= epsilon and latest[s] - start[s] <= epsilon), None)
+        return path
+
+    def __validate_job(self, j):
+        if j < 0 or j >= self._n:
+            raise ValueError(f'job {j} is not between 0 and {self._n - 1}')
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'jobs={self._n}, ' \
+               f'constraints={len(self._successors)}, ' \
+               f'finish_time={self._finish})>'
+
     @staticmethod
-    def run():
-        with open("../resources/jobsPC.txt", ) as f:
-            values = "".join(f.readlines()).splitlines()
-            print(values)
-            n = int(values[0])
-            source, sink = 2*n, 2*n + 1
-            durations = list()
-            for x in values[1:]:
-                durations.append(float(x.split(' ')[0]))
-            precedent = list()
-            print(values[1:])
-            for prec in values[1:]:
-                if prec.split('  ')[-1] == '0':
-                    precedent.append([])
-                else:
-                    precedent.append("".join(prec.split('  ')[-1]).split(' '))
-
-            print(n, durations, precedent)
-            g = EdgeWeightedDigraph(2*n + 2)
-            for i in range(n):
-                g.add_edge(DirectedEdge(source, i, 0.0))
-                g.add_edge(DirectedEdge(i + n, sink, 0.0))
-                g.add_edge(DirectedEdge(i, i+n, durations[i]))
-
-                m = len(precedent[i])
-                for j in range(m):
-                    p = int(precedent[i][j])
-                    g.add_edge(DirectedEdge(n + i, p, 0.0))
-            print(g)
-        lp = AcyclicLP(g, source)
-        print('job start finish')
-        print('----------------')
-        for i in range(n):
-            print(f'{i}, {lp.dist_to(i)}, {lp.dist_to(i+n)}')
-        print(f'finish time {lp.dist_to(sink)}')
+    def run(file_name="../resources/jobsPC.txt"):
+        cpm = CPM.from_file(file_name)
+        print('job start finish slack')
+        print('----------------------')
+        for i in range(cpm.size()):
+            print(f'{i}, {cpm.earliest_start(i)}, {cpm.earliest_finish(i)}, {cpm.slack(i)}')
+        print(f'finish time {cpm.finish_time()}')
+        print(f'critical path {cpm.critical_path()}')
+        return cpm
+
+
+def _random_jobs(n, degree=3, window=1000, seed=0):
+    """
+    Generates n jobs whose successors are up to {degree} of the next
+    {window} jobs, a layered build-graph shape.
+    """
+    rnd = random.Random(seed)
+    for j in range(n):
+        after = {rnd.randrange(j + 1, min(n, j + window) + 1) for _ in range(rnd.randrange(degree + 1))} \
+            if j < n - 1 else set()
+        yield float(rnd.randrange(1, 100)), sorted(s for s in after if s < n)
+
+
+def _benchmark(n=200000):
+    start = time.perf_counter()
+    cpm = CPM.from_jobs(_random_jobs(n))
+    print(f'{cpm}: built and scheduled in {time.perf_counter() - start:.2f} s')
+    path = cpm.critical_path()
+    for j in (path[len(path) // 2], n - 10):
+        start = time.perf_counter()
+        touched = cpm.set_duration(j, cpm.duration(j) + 50)
+        print(f'job {j} +50: finish {cpm.finish_time()}, {touched} jobs downstream, '
+              f'{time.perf_counter() - start:.3f} s')
 
 
 def main():
-    CPM.run()
+    cpm = CPM.run()
+    cpm.set_duration(0, 60.0)
+    print(f'job 0 takes 60.0 instead: finish time {cpm.finish_time()}, critical path {cpm.critical_path()}')
+    _benchmark()
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
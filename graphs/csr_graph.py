@@ -0,0 +1,326 @@
+"""
+csr_graph.py
+Frozen graphs in compressed sparse row (CSR) form.
+The CSRGraph, CSRDigraph, CSREdgeWeightedGraph and CSREdgeWeightedDigraph
+ *  classes represent immutable versions of Graph, Digraph,
+ *  EdgeWeightedGraph and EdgeWeightedDigraph.
+ *  The vertices adjacent from v are stored contiguously in
+ *  targets[offsets[v]:offsets[v + 1]], and in the edge-weighted classes
+ *  weights[i] is the weight of the edge ending at targets[i].
+ *
+ *  Each graph is produced from an existing graph with freeze() or
+ *  built directly from parallel edge arrays with from_edges().
+ *  This implementation uses array('q') offsets, array('i') targets and
+ *  array('d') weights, so it takes 4 bytes per adjacency entry
+ *  (12 when weighted) plus 8 bytes per vertex instead of a Bag node
+ *  per entry. An undirected edge is stored once in each direction and,
+ *  by convention, a self-loop v-v appears twice in the adjacency of v.
+ *  All instance methods take Theta(1) time, except iterating over the
+ *  adjacency of a vertex, which takes time proportional to its degree.
+ *  Building from E edges takes Theta(E + V) time (counting sort by tail).
+"""
+from array import array
+
+from graphs.bag import Bag
+from graphs.directed_edge import DirectedEdge
+from graphs.edge import Edge
+
+
+def _build(v, tails, heads, weights=None):
+    """
+    Counting-sorts the edges tails[i]->heads[i] by tail into CSR arrays.
+    Edges with the same tail keep their input order.
+    :returns: the offsets, targets and weights (None if unweighted) arrays
+    """
+    m = len(tails)
+    if len(heads) != m or (weights is not None and len(weights) != m):
+        raise ValueError('edge arrays must have the same length')
+    if m > 0:
+        lo, hi = min(min(tails), min(heads)), max(max(tails), max(heads))
+        if lo < 0 or hi >= v:
+            raise ValueError(f'vertex {lo if lo < 0 else hi} is not between 0 and {v - 1}')
+    offsets = array('q', bytes(8 * (v + 1)))
+    for t in tails:
+        offsets[t + 1] += 1
+    for i in range(v):
+        offsets[i + 1] += offsets[i]
+    cursor = offsets[:-1]
+    targets = array('i', bytes(4 * m))
+    out_weights = None if weights is None else array('d', bytes(8 * m))
+    for i in range(m):
+        t = tails[i]
+        p = cursor[t]
+        targets[p] = heads[i]
+        if out_weights is not None:
+            out_weights[p] = weights[i]
+        cursor[t] = p + 1
+    return offsets, targets, out_weights
+
+
+def _symmetric(ends_a, ends_b, weights=None):
+    """
+    Doubles an undirected edge list into both directions.
+    """
+    tails = array('i', ends_a)
+    tails.extend(ends_b)
+    heads = array('i', ends_b)
+    heads.extend(ends_a)
+    both = None
+    if weights is not None:
+        both = array('d', weights)
+        both.extend(weights)
+    return tails, heads, both
+
+
+class _CSR:
+    """
+    Shared storage and accessors of the CSR graph classes.
+    """
+
+    def __init__(self, v, offsets, targets, weights=None):
+        if v < 0:
+            raise ValueError('Number of vertices must be non-negative')
+        if len(offsets) != v + 1 or offsets[v] != len(targets):
+            raise ValueError('offsets must have V + 1 entries ending at len(targets)')
+        if weights is not None and len(weights) != len(targets):
+            raise ValueError('weights and targets must have the same length')
+        self.V = v
+        self._offsets = offsets
+        self._targets = targets
+        self._weights = weights
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    @property
+    def targets(self):
+        return self._targets
+
+    @property
+    def weights(self):
+        return self._weights
+
+    def get_V(self):
+        """
+        :returns: the number of vertices in this graph
+        """
+        return self.V
+
+    def _validate_vertex(self, v):
+        """
+        Throw a ValueError exception if 0 <= v < V
+        :param v: vertex v
+        """
+        if v < 0 or v >= self.V:
+            raise ValueError(f'vertex {v} is not between 0 and {self.V - 1}')
+
+    def _span(self, v):
+        self._validate_vertex(v)
+        return self._offsets[v], self._offsets[v + 1]
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'V={self.get_V()}, ' \
+               f'E={self.get_E()}, ' \
+               f'entries={len(self._targets)})>'
+
+
+class CSRDigraph(_CSR):
+
+    def __init__(self, v, offsets, targets):
+        super().__init__(v, offsets, targets)
+        self._indegree = None
+
+    @classmethod
+    def from_edges(cls, v, tails, heads):
+        """
+        Builds a digraph with V vertices and the edges tails[i]->heads[i].
+        :param v: the number of vertices
+        :param tails: sequence of edge tails
+        :param heads: sequence of edge heads
+        """
+        offsets, targets, _ = _build(v, tails, heads)
+        return cls(v, offsets, targets)
+
+    def get_E(self):
+        """
+        :returns: the number of edges in this digraph
+        """
+        return len(self._targets)
+
+    def adj_items(self, v):
+        """
+        Returns the vertices adjacent from vertex {v}.
+        :param v: the vertex
+        :returns: an array of the vertices adjacent from {v}
+        """
+        lo, hi = self._span(v)
+        return self._targets[lo:hi]
+
+    def outdegree(self, v=0):
+        lo, hi = self._span(v)
+        return hi - lo
+
+    def indegree(self, v=0):
+        self._validate_vertex(v)
+        if self._indegree is None:
+            indegree = array('i', bytes(4 * self.V))
+            for w in self._targets:
+                indegree[w] += 1
+            self._indegree = indegree
+        return self._indegree[v]
+
+    def _tails(self):
+        tails = array('i', bytes(4 * len(self._targets)))
+        for v in range(self.V):
+            for i in range(self._offsets[v], self._offsets[v + 1]):
+                tails[i] = v
+        return tails
+
+    def reverse(self):
+        """
+        :returns: the reverse of this digraph, also in CSR form
+        """
+        return CSRDigraph.from_edges(self.V, self._targets, self._tails())
+
+
+class CSRGraph(_CSR):
+
+    @classmethod
+    def from_edges(cls, v, ends_a, ends_b):
+        """
+        Builds a graph with V vertices and the edges ends_a[i]-ends_b[i].
+        :param v: the number of vertices
+        :param ends_a: sequence of one endpoint of each edge
+        :param ends_b: sequence of the other endpoint of each edge
+        """
+        tails, heads, _ = _symmetric(ends_a, ends_b)
+        offsets, targets, _ = _build(v, tails, heads)
+        return cls(v, offsets, targets)
+
+    def get_E(self):
+        """
+        :returns: the number of edges in this graph
+        """
+        return len(self._targets) // 2
+
+    def adj_items(self, v):
+        """
+        Returns the vertices adjacent to vertex {v}.
+        :param v: the vertex
+        :returns: an array of the vertices adjacent to {v}
+        """
+        lo, hi = self._span(v)
+        return self._targets[lo:hi]
+
+    def degree(self, v):
+        lo, hi = self._span(v)
+        return hi - lo
+
+
+class CSREdgeWeightedDigraph(CSRDigraph):
+
+    def __init__(self, v, offsets, targets, weights):
+        _CSR.__init__(self, v, offsets, targets, weights)
+        self._indegree = None
+
+    @classmethod
+    def from_edges(cls, v, tails, heads, weights):
+        """
+        Builds an edge-weighted digraph with V vertices and the
+        edges tails[i]->heads[i] of weight weights[i].
+        """
+        offsets, targets, out_weights = _build(v, tails, heads, weights)
+        return cls(v, offsets, targets, out_weights)
+
+    def adj_items(self, v):
+        """
+        Returns the edges incident from vertex {v}.
+        The DirectedEdge objects are created on the fly and are not stored.
+        :param v: the vertex
+        :returns: a generator of the edges incident from {v}
+        """
+        lo, hi = self._span(v)
+        targets, weights = self._targets, self._weights
+        return (DirectedEdge(v, targets[i], weights[i]) for i in range(lo, hi))
+
+    def edges(self):
+        adj_list = Bag()
+        for v in range(self.V):
+            for e in self.adj_items(v):
+                adj_list.add(e)
+        return adj_list
+
+    def reverse(self):
+        """
+        :returns: the reverse of this edge-weighted digraph
+        """
+        return CSREdgeWeightedDigraph.from_edges(self.V, self._targets, self._tails(), self._weights)
+
+
+class CSREdgeWeightedGraph(_CSR):
+
+    @classmethod
+    def from_edges(cls, v, ends_a, ends_b, weights):
+        """
+        Builds an edge-weighted graph with V vertices and the
+        edges ends_a[i]-ends_b[i] of weight weights[i].
+        """
+        tails, heads, both = _symmetric(ends_a, ends_b, weights)
+        offsets, targets, out_weights = _build(v, tails, heads, both)
+        return cls(v, offsets, targets, out_weights)
+
+    def get_E(self):
+        """
+        :returns: the number of edges in this graph
+        """
+        return len(self._targets) // 2
+
+    def adj_items(self, v):
+        """
+        Returns the edges incident to vertex {v}.
+        The Edge objects are created on the fly and are not stored.
+        :param v: the vertex
+        :returns: a generator of the edges incident to {v}
+        """
+        lo, hi = self._span(v)
+        targets, weights = self._targets, self._weights
+        return (Edge(v, targets[i], weights[i]) for i in range(lo, hi))
+
+    def degree(self, v):
+        lo, hi = self._span(v)
+        return hi - lo
+
+    def edges(self):
+        adj_list = Bag()
+        targets, weights = self._targets, self._weights
+        for v in range(self.V):
+            self_loops = 0
+            for i in range(self._offsets[v], self._offsets[v + 1]):
+                w = targets[i]
+                if w > v:
+                    adj_list.add(Edge(v, w, weights[i]))
+                # add only one copy of each self loop
+                elif w == v:
+                    if self_loops % 2 == 0:
+                        adj_list.add(Edge(v, w, weights[i]))
+                    self_loops += 1
+        return adj_list
+
+
+def main():
+    g = CSRGraph.from_edges(4, [0, 0, 1, 2], [1, 2, 2, 3])
+    print(g)
+    print(f'adjacent vertices of 2 are: {list(g.adj_items(2))}')
+    print(f'degree of 2 is: {g.degree(2)}')
+
+    d = CSREdgeWeightedDigraph.from_edges(3, [0, 0, 1], [1, 2, 2], [0.5, 1.5, 0.25])
+    print(d)
+    for v in range(d.get_V()):
+        print(f'{v}: ' + ' '.join(str(e) for e in d.adj_items(v)))
+    print(f'reverse: {d.reverse()}')
+
+
+if __name__ == '__main__':
+    main()
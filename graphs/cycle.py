@@ -5,7 +5,8 @@ The Cycle class represents a data type for
  *  The has_cycle operation determines whether the graph has
  *  a cycle and, if so, the cycle operation returns one.
  *
- *  This implementation uses depth-first search.
+ *  This implementation uses depth-first search with an explicit stack
+ *  (IterativeDFS).
  *  The constructor takes Theta(V + E) time in the
  *  worst case, where V is the number of vertices and
  *  E is the number of edges.
@@ -16,26 +17,26 @@ The Cycle class represents a data type for
  *  It uses Theta(V) extra space (not including the graph).
 """
 from graphs.graph import Graph
+from graphs.iterative_dfs import IterativeDFS
 from collections import deque
 
 
 class Cycle:
-    _cycle = None
 
     def __init__(self, g):
         """
         :param g: the Graph
         """
+        self._g = g
+        self._cycle = None
+        self._dfs = IterativeDFS(g, parents=True)
+        self._marked = self._dfs.get_marked()
+        self._edge_to = self._dfs.get_edge_to()
         if self.__has_self_loop(g):
             return
         if self.__has_parallel_edges(g):
             return
-        self._g = g
-        self._marked = [False for _ in range(g.get_V())]
-        self._edge_to = [False for _ in range(g.get_V())]
-        for v in range(g.get_V()):
-            if not self._marked[v]:
-                self.__dfs(g, -1, v)
+        self._dfs.search_all(non_tree_edge=self.__non_tree_edge)
 
     def get_g(self):
         return self._g
@@ -51,7 +52,7 @@ class Cycle:
 
     def __has_self_loop(self, g):
         for v in range(g.get_V()):
-            for w in g.adj_vertices(v):
+            for w in g.adj_items(v):
                 if v == w:
                     self._cycle = deque()
                     self._cycle.append(v)
@@ -62,36 +63,32 @@ class Cycle:
     def __has_parallel_edges(self, g):
         marked = [False for _ in range(g.get_V())]
         for v in range(g.get_V()):
-            for w in g.adj_vertices(v):
-                if marked[w.item]:
+            for w in g.adj_items(v):
+                if marked[w]:
+                    self._cycle = deque()
                     self._cycle.append(v)
-                    self._cycle.append(w.item)
+                    self._cycle.append(w)
                     self._cycle.append(v)
                     return True
-                marked[w.item] = True
-            for w in g.adj_vertices(v):
-                marked[w.item] = False
+                marked[w] = True
+            for w in g.adj_items(v):
+                marked[w] = False
 
         return False
 
-    def __dfs(self, g, u, v):
-        self.get_marked()[v] = True
-        for w in g.adj_vertices(v):
-            # short circuit if cycle already found
-            if self.get_cycle() is not None:
-                return
-            if not self.get_marked()[w.item]:
-                self.get_edge_to()[w.item] = v
-                self.__dfs(g, v, w.item)
-            # check for cycle (but disregard reverse of edge leading to v)
-            elif w.item != u:
-                x = v
-                while x != w.item:
-                    self._cycle = deque()
-                    self._cycle.append(x)
-                    x = self.get_edge_to()[x]
-                self._cycle.append(w)
-                self._cycle.append(v)
+    def __non_tree_edge(self, v, w):
+        # check for cycle (but disregard reverse of edge leading to v)
+        if w == self._edge_to[v]:
+            return False
+        # the cycle reads v, w, then the tree path back down to v
+        self._cycle = deque()
+        x = v
+        while x != w:
+            self._cycle.appendleft(x)
+            x = self._edge_to[x]
+        self._cycle.appendleft(w)
+        self._cycle.appendleft(v)
+        return True
 
     def has_cycle(self):
         return self.get_cycle() is not None
@@ -100,8 +97,8 @@ class Cycle:
         return f'<{self.__class__.__name__}(\n' \
                f'g={self.get_g()}, \n' \
                f'cycle={self.get_cycle()}\n' \
-               f'edge_to={self.get_edge_to()}\n' \
-               f'marked={self.get_marked()})>'
+               f'edge_to={list(self.get_edge_to())}\n' \
+               f'marked={list(self.get_marked())})>'
 
 
 def main():
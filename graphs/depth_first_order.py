@@ -5,62 +5,43 @@ Compute preorder and postorder for a digraph or edge-weighted digraph.
  *  determining depth-first search ordering of the vertices in a digraph
  *  or edge-weighted digraph, including preorder, postorder, and reverse postorder.
  *
- *  This implementation uses depth-first search.
+ *  This implementation uses depth-first search with an explicit stack
+ *  (IterativeDFS).
  *  Each constructor takes Theta(V + E) time,
  *  where V is the number of vertices and E is the
  *  number of edges.
  *  Each instance method takes Theta(1) time.
  *  It uses Theta(V) extra space (not including the digraph).
 """
-from graphs.directed_edge import DirectedEdge
 from graphs.digraph import Digraph
-from graphs.edge_weighted_digraph import EdgeWeightedDigraph
-from queue import Queue, LifoQueue
+from graphs.iterative_dfs import IterativeDFS
 
 
 class DepthFirstOrder:
-    _pre_counter, _post_counter = 0, 0
 
     def __init__(self, g):
+        """
+        :param g: the digraph or edge-weighted digraph (Bag-based or CSR)
+        """
         self._pre = [0 for _ in range(g.get_V())]  # pre[v]    = preorder  number of v
         self._post = [0 for _ in range(g.get_V())]  # post[v]   = postorder number of v
-        self._postorder = Queue()  # queue
-        self._preorder = Queue()  # queue
-        self._marked = [False for _ in range(g.get_V())]
-        for v in range(g.get_V()):
-            if not self._marked[v]:
-                self.__dfs(g, v)
+        self._preorder = list()
+        self._postorder = list()
+        dfs = IterativeDFS(g)
+        self._marked = dfs.get_marked()
+        dfs.search_all(pre=self.__visit_pre, post=self.__visit_post)
 
         # assert self.__check()
 
-    def __dfs(self, g, v):
-        if isinstance(g, Digraph):
-            self._marked[v] = True
-            self._pre_counter += 1
-            self._pre[v] = self._pre_counter
-            self._preorder.put(v)
-            for w in g.adj_vertices(v):
-                if not self._marked[w.item]:
-                    self.__dfs(g, w.item)
-            self._postorder.put(v)
-            self._post_counter += 1
-            self._post[v] = self._post_counter
-        else:
-            self._marked[v] = True
-            #  Preorder: Put the vertex on a queue before the recursive calls
-            self._pre_counter += 1
-            self._pre[v] = self._pre_counter
-            self._preorder.put(v)
-            for e in g.adj_vertices(v):
-                #       tail()   weight        head()
-                # e  =   v   -------------->   w
-                w = e.item.head()
-                if not self._marked[w]:
-                    self.__dfs(g, w)
-            # Postorder: Put the vertex on a queue after the recursive calls.
-            self._postorder.put(v)
-            self._post_counter += 1
-            self._post[v] = self._post_counter
+    def __visit_pre(self, v):
+        #  Preorder: number the vertex before following its edges
+        self._preorder.append(v)
+        self._pre[v] = len(self._preorder)
+
+    def __visit_post(self, v):
+        # Postorder: number the vertex after following its edges
+        self._postorder.append(v)
+        self._post[v] = len(self._postorder)
 
     def pre(self, v):
         self._validate_vertex(v)
@@ -71,10 +52,10 @@ class DepthFirstOrder:
         return self._post[v]
 
     def preorder_vertices(self):
-        return list(self._preorder.queue)
+        return list(self._preorder)
 
     def postorder_vertices(self):
-        return list(self._postorder.queue)
+        return list(self._postorder)
 
     def _validate_vertex(self, v):
         n = len(self._marked)
@@ -82,14 +63,8 @@ class DepthFirstOrder:
             raise ValueError(f'vertex {v} is not between 0 and {n - 1}')
 
     def reverse_post(self):
-        # Reverse postorder: Put the vertex on a stack after the recursive calls.
-        reverse = LifoQueue()  # stack
-        for v in self.postorder_vertices():
-            reverse.put(v)
-        rp = list()
-        while not reverse.empty():
-            rp.append(reverse.get())
-        return rp
+        # Reverse postorder: the postorder read from the end
+        return self._postorder[::-1]
 
     def __check(self):
         r = 0
@@ -112,11 +87,9 @@ class DepthFirstOrder:
         return f'<{self.__class__.__name__}(' \
                f'_pre={self._pre}' \
                f'_post={self._post}' \
-               f'_preorder={self._preorder.queue}' \
-               f'_postorder={self._postorder.queue}' \
-               f'_marked={self._marked}' \
-               f'_pre_counter={self._pre_counter}' \
-               f'_post_counter={self._post_counter} ' \
+               f'_preorder={self._preorder}' \
+               f'_postorder={self._postorder}' \
+               f'_marked={list(self._marked)}' \
                f')>'
 
 
@@ -10,7 +10,8 @@
  *  paths from a source vertex s to every other vertex
  *  in an undirected graph.
  *
- *  This implementation uses depth-first search.
+ *  This implementation uses depth-first search with an explicit stack
+ *  (IterativeDFS), so long paths do not hit the recursion limit.
  *  The constructor takes Theta;(V + E) time in the
  *  worst case, where V is the number of vertices and
  *  E is the number of edges.
@@ -20,6 +21,7 @@
 """
 from collections import deque 
 from graphs.graph import Graph
+from graphs.iterative_dfs import IterativeDFS
 
 
 class DepthFirstPaths:
@@ -32,11 +34,11 @@ class DepthFirstPaths:
         """
         self._g = g
         self._s = s
-        self._edge_to = [0 for _ in range(g.get_V())]
-        self._marked = [False for _ in range(g.get_V())]
+        dfs = IterativeDFS(g, parents=True)
+        self._edge_to = dfs.get_edge_to()
+        self._marked = dfs.get_marked()
         self._validate_vertex(s)
-        # self.__non_recursive(g, s)
-        self._dfs(g, s)
+        dfs.search(s)
 
     def get_g(self):
         return self._g
@@ -50,18 +52,6 @@ class DepthFirstPaths:
     def get_marked(self):
         return self._marked
 
-    def _dfs(self, g, v):
-        """
-        depth first search from v
-        :param g: g the graph
-        :param v: v the source vertex
-        """
-        self.get_marked()[v] = True
-        for w in g.adj_vertices(v):
-            if not self.get_marked()[w.item]:
-                self.get_edge_to()[w.item] = v
-                self._dfs(g, w.item)
-
     def has_path_to(self, v):
         """
         is there a path between the source vertex s and vertex :param v:?
@@ -69,7 +59,7 @@ class DepthFirstPaths:
         :returns: True if there is a path, False otherwise
         """
         self._validate_vertex(v)
-        return self.get_marked()[v]
+        return self.get_marked()[v] == 1
 
     def path_to(self, v):
         """
@@ -93,25 +83,8 @@ class DepthFirstPaths:
         if v < 0 or v >= marked_len:
             raise AttributeError(f'vertex {v} is not between 0 and {marked_len-1}')
 
-    def __non_recursive(self, g, s):
-        self._validate_vertex(s)
-        stack = deque()
-        self.get_marked()[s] = True
-        stack.append(s)
-        while stack:
-            v = stack.pop()
-            for w in g.adj[v]:
-                if w.next is not None:
-                    w = w.next
-                    if not self.get_marked()[w.item]:
-                        self.get_marked()[w.item] = True
-                        self.get_edge_to()[w.item] = v
-                        stack.append(w.item)
-                else:
-                    stack.pop()
-
     def __repr__(self):
-        return f'<DepthFirstPaths(s = {self.get_s()}, marked={self.get_marked()}, edge_to = {self.get_edge_to()})>'
+        return f'<DepthFirstPaths(s = {self.get_s()}, marked={list(self.get_marked())}, edge_to = {list(self.get_edge_to())})>'
 
 
 def main():
@@ -2,6 +2,8 @@
 depth_first_search.py
 Run depth first search on an undirected graph.
  *  Runs in O(E + V) time.
+ *  The search runs on IterativeDFS, so it uses an explicit stack
+ *  instead of recursion.
 
  ../resources/tinyG.txt
  *  13 vertices, 13 edges
@@ -21,43 +23,30 @@ Run depth first search on an undirected graph.
 """
 from graphs.bag import Bag
 from graphs.graph import Graph
+from graphs.iterative_dfs import IterativeDFS
 
 
 class DepthFirstSearch:
-    _count = 0
 
     def __init__(self, g, s):
         """
         :param g: the graph
         :param s: the source vertex
         """
-        self._marked = [False for _ in range(g.get_V())]
         self.g = g
+        self._dfs = IterativeDFS(g)
+        self._marked = self._dfs.get_marked()
         if isinstance(s, Bag):
-            assert isinstance(s, Bag)
             self.__validate_vertices(s)
             for v in s:
-                if not self._marked[v.item]:
-                    self.__dfs(g, v.item)
+                self._dfs.search(v.item)
         else:
             self.__validate_vertex(s)
-            self.__dfs(g, s)
+            self._dfs.search(s)
 
     def get_g(self):
         return self.g
 
-    def __dfs(self, g, v):
-        """
-        :param g: the Graph
-        :param v: the vertex
-        """
-        self._count += 1
-        self._marked[v] = True
-        for w in g.adj_vertices(v):
-            # print('item', w.item, w)
-            if not self._marked[w.item]:
-                self.__dfs(g, w.item)
-
     def marked(self, v):
         """
         Is there a path between the source vertex s and vertex v?
@@ -65,7 +54,7 @@ class DepthFirstSearch:
         :return:  True if there is a path, False otherwise
         """
         self.__validate_vertex(v)
-        return self._marked[v]
+        return self._marked[v] == 1
 
     def __validate_vertex(self, v):
         """
@@ -85,7 +74,7 @@ class DepthFirstSearch:
             self.__validate_vertex(v.item)
 
     def count(self):
-        return self._count
+        return self._dfs.count()
 
 
 def main(s):
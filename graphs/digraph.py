@@ -22,8 +22,10 @@ The Digraph class represents a directed graph of vertices
  *  and V vertices takes Theta(E + V) time.
  *
 """
+from array import array
 from graphs.graph import Graph
 from graphs.bag import Bag
+from graphs.csr_graph import CSRDigraph
 from collections import deque, defaultdict
 
 
@@ -79,6 +81,16 @@ class Digraph:
         self._validate_vertex(v)
         return self.adj[v]
 
+    def adj_items(self, v):
+        """
+        Returns the vertices adjacent from the vertex {v} as ints instead of Bag nodes.
+        CSRDigraph has the same method, so clients written against it accept both.
+        :param v: v the vertex
+        :returns: the vertices adjacent from vertex {v}
+        """
+        self._validate_vertex(v)
+        return (node.item for node in self.adj[v])
+
     def get_indegree(self):
         return self._indegree
 
@@ -100,6 +112,19 @@ class Digraph:
                 reverse.add_edge(w.item, v)
         return reverse
 
+    def freeze(self):
+        """
+        Returns an immutable compressed sparse row copy of this digraph.
+        The adjacency of each vertex keeps its Bag iteration order.
+        :returns: a CSRDigraph
+        """
+        offsets, targets = array('q', [0]), array('i')
+        for v in range(self.get_V()):
+            for node in self.adj[v]:
+                targets.append(node.item)
+            offsets.append(len(targets))
+        return CSRDigraph(self.get_V(), offsets, targets)
+
     def __repr__(self):
         return f'<{self.__class__.__name__}(' \
                f'V={self.get_V()}, ' \
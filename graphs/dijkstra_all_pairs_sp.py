@@ -13,11 +13,27 @@ The DijkstraAllPairsSP class represents a data type for solving the
  *  Each instance method takes Theta(1) time.
  *  It uses Theta(V2) extra space (not including the
  *  edge-weighted digraph).
+ *
+ *  The ParallelDijkstraAllPairsSP class computes the same distances on a
+ *  pool of processes. The digraph is frozen to CSR form and its arrays
+ *  are placed in shared memory once, so every worker reads the same copy
+ *  instead of unpickling the graph per task. Source vertices are handed
+ *  out in contiguous shards; each worker reuses one DijkstraSP across its
+ *  sources and writes each distance row straight into a V-by-V float32
+ *  matrix, held in shared memory or in a memory-mapped file. stream()
+ *  instead returns rows to a callback in the parent as they finish, so
+ *  the matrix never has to exist. Paths are not kept in either mode.
 """
 import math
+import mmap
+import multiprocessing
+import os
+from array import array
+from multiprocessing import shared_memory
 
-from graphs.directed_edge import DirectedEdge
-from graphs.edge_weighted_digraph import EdgeWeightedDigraph
+from graphs.csr_graph import CSREdgeWeightedDigraph
+from graphs.edge_list_loader import load_edge_weighted_digraph
+from graphs.shared_array import attach, share
 from graphs.dijkstra_sp import DijkstraSP
 
 
@@ -54,19 +70,211 @@ class DijkstraAllPairsSP:
                f'_all={self._all}\n)>'
 
 
+# state of a pool worker: the shared digraph, its solver and the result matrix
+_worker = dict()
+
+
+def _init_worker(v, columns, matrix):
+    """
+    Attaches a pool worker to the shared digraph and the result matrix.
+    """
+    blocks, views = zip(*(attach(c) for c in columns))
+    g = CSREdgeWeightedDigraph(v, *views)
+    _worker['blocks'] = blocks
+    _worker['views'] = views
+    _worker['sp'] = DijkstraSP(g)
+    _worker['v'] = v
+    _worker['matrix'] = None
+    if matrix is not None:
+        kind, where = matrix
+        if kind == 'shm':
+            block, rows = attach((where, 'f', v * v))
+            _worker['matrix_block'] = block
+        else:
+            f = open(where, 'r+b')
+            block = mmap.mmap(f.fileno(), 0)
+            f.close()
+            _worker['matrix_block'] = block
+            rows = memoryview(block).cast('f')
+        _worker['matrix'] = rows
+
+
+def _close_worker():
+    """
+    Detaches from shared memory; views must be released before their blocks close.
+    """
+    del _worker['sp']
+    for view in _worker.pop('views'):
+        view.release()
+    if _worker['matrix'] is not None:
+        _worker.pop('matrix').release()
+        _worker.pop('matrix_block').close()
+    for block in _worker.pop('blocks'):
+        block.close()
+    _worker.clear()
+
+
+def _solve(shard):
+    """
+    Runs Dijkstra from every source in range(lo, hi). Rows are written to
+    the shared matrix if there is one and returned otherwise.
+    """
+    lo, hi = shard
+    sp, v, matrix = _worker['sp'], _worker['v'], _worker['matrix']
+    rows = list()
+    for s in range(lo, hi):
+        row = array('f', sp.search(s).distances())
+        if matrix is not None:
+            matrix[s * v:(s + 1) * v] = row
+        else:
+            rows.append((s, row.tobytes()))
+    return rows
+
+
+class ParallelDijkstraAllPairsSP:
+
+    def __init__(self, g, processes=None, path=None, shard_size=None):
+        """
+        Computes all-pairs shortest-path distances on a process pool.
+        :param g: the edge-weighted digraph (Bag-based or CSR)
+        :param processes: the number of worker processes, default os.cpu_count();
+                          1 runs in this process without a pool
+        :param path: a file to hold the float32 distance matrix, or None to
+                     keep it in (anonymous) shared memory
+        :param shard_size: the number of sources per task
+        """
+        self._V = g.get_V()
+        n = self._V
+        self._path = path
+        if path is None:
+            self._block = shared_memory.SharedMemory(create=True, size=max(1, 4 * n * n))
+            target = ('shm', self._block.name)
+        else:
+            with open(path, 'wb') as f:
+                f.truncate(max(1, 4 * n * n))
+            target = ('file', path)
+        try:
+            ParallelDijkstraAllPairsSP.__run(g, target, None, processes, shard_size)
+        except BaseException:
+            # a failed run must not leave a V^2 block in /dev/shm or a partial matrix on disk
+            if path is None:
+                self._block.close()
+                self._block.unlink()
+            elif os.path.exists(path):
+                os.remove(path)
+            raise
+        if path is None:
+            # the mapping stays valid after the name is removed
+            self._block.unlink()
+            buf = self._block.buf
+        else:
+            self._file = open(path, 'r+b')
+            self._block = mmap.mmap(self._file.fileno(), 0)
+            buf = memoryview(self._block)
+        self._matrix = buf[:4 * n * n].cast('f')
+
+    @staticmethod
+    def stream(g, callback, processes=None, shard_size=None):
+        """
+        Computes all-pairs shortest-path distances without storing them.
+        :param g: the edge-weighted digraph (Bag-based or CSR)
+        :param callback: called as callback(s, row) in this process for every
+                         source s, in completion order, with row an array('f')
+                         of the distances from s
+        :param processes: the number of worker processes
+        :param shard_size: the number of sources per task
+        """
+        ParallelDijkstraAllPairsSP.__run(g, None, callback, processes, shard_size)
+
+    @staticmethod
+    def __run(g, target, callback, processes, shard_size):
+        if not isinstance(g, CSREdgeWeightedDigraph):
+            g = g.freeze()
+        v = g.get_V()
+        processes = processes or os.cpu_count() or 1
+        if shard_size is None:
+            # several shards per worker keeps the pool balanced
+            shard_size = max(1, v // (8 * processes))
+        shards = [(lo, min(v, lo + shard_size)) for lo in range(0, v, shard_size)]
+        blocks, columns = zip(*(share(c) for c in (g.offsets, g.targets, g.weights)))
+        try:
+            if processes == 1:
+                _init_worker(v, columns, target)
+                try:
+                    ParallelDijkstraAllPairsSP.__collect(map(_solve, shards), callback)
+                finally:
+                    _close_worker()
+            else:
+                with multiprocessing.Pool(processes, _init_worker, (v, columns, target)) as pool:
+                    ParallelDijkstraAllPairsSP.__collect(pool.imap_unordered(_solve, shards), callback)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    @staticmethod
+    def __collect(results, callback):
+        for rows in results:
+            for s, data in rows:
+                row = array('f')
+                row.frombytes(data)
+                callback(s, row)
+
+    def dist(self, s, t):
+        self.__validate_vertex(s)
+        self.__validate_vertex(t)
+        return self._matrix[s * self._V + t]
+
+    def has_path(self, s, t):
+        return self.dist(s, t) < math.inf
+
+    def row(self, s):
+        """
+        :returns: a float32 memoryview of the distances from {s}
+        """
+        self.__validate_vertex(s)
+        return self._matrix[s * self._V:(s + 1) * self._V]
+
+    def close(self):
+        """
+        Releases the distance matrix; the file, if any, is kept.
+        """
+        if self._matrix is None:
+            return
+        self._matrix.release()
+        self._matrix = None
+        self._block.close()
+        if self._path is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __validate_vertex(self, v):
+        n = self._V
+        if v < 0 or v >= n:
+            raise AttributeError(f'vertex {v} is not between 0 and {n - 1}')
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(V={self._V}, path={self._path})>'
+
+
 def main():
-    with open("../resources/tinyEWD.txt", ) as f:
-        values = "".join(f.readlines()).splitlines()
-        V, E = int(values[0]), int(values[1])
-        g = EdgeWeightedDigraph(V)
-        for line in values[2:]:
-            vertices = line.split(' ')
-            v, w, weight = int(vertices[0]), int(vertices[1]), float(vertices[2])
-            e = DirectedEdge(v, w, weight)
-            g.add_edge(e)
+    g = load_edge_weighted_digraph("../resources/tinyEWD.txt")
 
     dijkstra = DijkstraAllPairsSP(g)
     print(dijkstra)
 
+    with ParallelDijkstraAllPairsSP(g, processes=2) as parallel:
+        for s in range(g.get_V()):
+            print(' '.join(f'{parallel.dist(s, t):6.2f}' for t in range(g.get_V())))
+            assert all(abs(parallel.dist(s, t) - dijkstra.dist(s, t)) < 1e-6 for t in range(g.get_V()))
+
+    ParallelDijkstraAllPairsSP.stream(g, lambda s, row: print(s, max(row)), processes=2)
+
+
 if __name__ == '__main__':
     main()
@@ -7,14 +7,27 @@ Dijkstra's algorithm. Computes the shortest path tree.
  *  where the edge weights are non-negative.
  *
  *  This implementation uses Dijkstra's algorithm with a
- *  binary heap. The constructor takes
+ *  binary heap and lazy deletion: an improved distance is pushed as a
+ *  new entry and stale entries are skipped when they are popped, which
+ *  replaces decrease-key. The constructor takes
  *  Theta(E log V) time in the worst case,
  *  where V is the number of vertices and E is
  *  the number of edges. Each instance method takes Theta(1) time.
  *  It uses Theta(V) extra space (not including the
  *  edge-weighted digraph).
+ *
+ *  A search can be given a target vertex or a set of target vertices, in
+ *  which case it stops as soon as every target is settled. Only settled
+ *  vertices have final distances after such a search; the others hold
+ *  upper bounds. The same object can run any number of searches with
+ *  search(s, target); each one resets only the vertices the previous
+ *  search touched, so point-to-point queries do not pay Theta(V) apiece.
+ *  CSREdgeWeightedDigraph inputs are relaxed straight from their arrays.
 """
+from bisect import bisect_right
+from graphs.csr_graph import CSREdgeWeightedDigraph
 from graphs.directed_edge import DirectedEdge
+from graphs.edge_list_loader import load_edge_weighted_digraph
 from graphs.edge_weighted_digraph import EdgeWeightedDigraph
 from queue import LifoQueue
 import math
@@ -23,62 +36,152 @@ import heapq
 
 class DijkstraSP:
 
-    def __init__(self, g: EdgeWeightedDigraph, s: int):
-        for e in g.edges():
-            edge_weight = e.item.item.weight()
-            if edge_weight < 0:
-                raise ValueError(f'edge {e} has negative weight')
+    def __init__(self, g: EdgeWeightedDigraph, s: int = None, target=None):
+        """
+        :param g: the edge-weighted digraph
+        :param s: the source vertex, or None to only allocate the solver
+        :param target: a vertex or an iterable of vertices at which to stop
+        """
         self._g = g
-        self._s = s
+        self._csr = isinstance(g, CSREdgeWeightedDigraph)
+        if self._csr and len(g.weights) > 0 and min(g.weights) < 0:
+            raise ValueError(f'edge weight {min(g.weights)} is negative')
+        self._s = None
         self._edge_to = [None] * g.get_V()
         self._dist_to = [math.inf] * g.get_V()
-        self._dist_to[s] = 0.0
         self._spt = [False] * g.get_V()
-        self._on_queue = [False] * g.get_V()
-        self.__validate_vertex(s)
-
+        self._touched = list()
         self._pq = list()
-        heapq.heappush(self._pq, (self._dist_to[s], s))
-        self._on_queue[s] = True
-
-        while len(self._pq) > 0:
-            current_distance, v = heapq.heappop(self._pq)
-            self._on_queue[v] = False
-            for e in g.adj_vertices(v):
-                self.__relax(e)
-
-    def __relax(self, e):
-        v, w = e.item.tail(), e.item.head()
+        if s is not None:
+            self.search(s, target)
+
+    def search(self, s, target=None):
+        """
+        Computes shortest paths from {s}, discarding the previous search.
+        :param s: the source vertex
+        :param target: a vertex or an iterable of vertices at which to stop
+        :returns: this object
+        """
+        self.__validate_vertex(s)
+        targets = None
+        if target is not None:
+            targets = {target} if isinstance(target, int) else set(target)
+            for t in targets:
+                self.__validate_vertex(t)
+        self.__reset()
+        self._s = s
+        self._dist_to[s] = 0.0
+        self._touched.append(s)
+        self._pq.append((0.0, s))
+        if self._csr:
+            self.__run_csr(targets)
+        else:
+            self.__run(targets)
+        return self
+
+    def __reset(self):
+        for v in self._touched:
+            self._dist_to[v] = math.inf
+            self._edge_to[v] = None
+            self._spt[v] = False
+        self._touched.clear()
+        self._pq.clear()
+
+    def __run(self, targets):
+        g, pq, spt = self._g, self._pq, self._spt
+        remaining = len(targets) if targets else 0
+        while pq:
+            current_distance, v = heapq.heappop(pq)
+            if spt[v]:
+                continue  # stale entry left behind by a later, shorter push
+            spt[v] = True
+            if remaining and v in targets:
+                remaining -= 1
+                if remaining == 0:
+                    return
+            for e in g.adj_items(v):
+                self.__relax(e, current_distance)
+
+    def __relax(self, e, dist_v):
+        w = e.head()
+        if e.weight() < 0:
+            raise ValueError(f'edge {e} has negative weight')
         # optimality condition: dist_to[w] <= dist_to[v] + e.weight()
-        if self._dist_to[w] > self._dist_to[v] + e.item.weight():
+        if self._dist_to[w] > dist_v + e.weight():
             # if the edge v->w gives a shorter path to w from v,
             # then update dist_to[w] and edge_to[w]
-            self._dist_to[w] = self._dist_to[v] + e.item.weight()
-            self._edge_to[w] = e.item
-
-            if self._on_queue[w]:
-                # decrease-key: heapq._siftdown(pq, startpos, pos)
-                print(w, self._pq)
-            else:
-                heapq.heappush(self._pq, (self._dist_to[w], w))
+            if self._dist_to[w] == math.inf:
+                self._touched.append(w)
+            self._dist_to[w] = dist_v + e.weight()
+            self._edge_to[w] = e
+            heapq.heappush(self._pq, (self._dist_to[w], w))
+
+    def __run_csr(self, targets):
+        # same loop as __run over the raw arrays; edge_to holds edge indices
+        offsets, heads, weights = self._g.offsets, self._g.targets, self._g.weights
+        dist_to, edge_to, spt = self._dist_to, self._edge_to, self._spt
+        pq, touched = self._pq, self._touched
+        heappush, heappop, inf = heapq.heappush, heapq.heappop, math.inf
+        remaining = len(targets) if targets else 0
+        while pq:
+            current_distance, v = heappop(pq)
+            if spt[v]:
+                continue
+            spt[v] = True
+            if remaining and v in targets:
+                remaining -= 1
+                if remaining == 0:
+                    return
+            for i in range(offsets[v], offsets[v + 1]):
+                w = heads[i]
+                d = current_distance + weights[i]
+                if d < dist_to[w]:
+                    if dist_to[w] == inf:
+                        touched.append(w)
+                    dist_to[w] = d
+                    edge_to[w] = i
+                    heappush(pq, (d, w))
+
+    def __edge(self, w):
+        e = self._edge_to[w]
+        if self._csr and e is not None:
+            offsets = self._g.offsets
+            # the tail is the last vertex whose adjacency starts at or before e
+            v = bisect_right(offsets, e) - 1
+            return DirectedEdge(v, w, self._g.weights[e])
+        return e
 
     def dist_to(self, v):
         self.__validate_vertex(v)
         return self._dist_to[v]
 
+    def distances(self):
+        """
+        :returns: a copy of dist_to for every vertex (math.inf if unreached)
+        """
+        return list(self._dist_to)
+
     def has_path_to(self, v):
         self.__validate_vertex(v)
         return self._dist_to[v] < math.inf
 
+    def is_settled(self, v):
+        """
+        Is the distance to {v} final? Always true for reachable vertices
+        unless the last search stopped early at its targets.
+        """
+        self.__validate_vertex(v)
+        return self._spt[v]
+
     def path_to(self, v):
         self.__validate_vertex(v)
         if not self.has_path_to(v):
             return None
         path = LifoQueue()  # stack
-        e = self._edge_to[v]
+        e = self.__edge(v)
         while e is not None:
             path.put(e)
-            e = self._edge_to[e.tail()]
+            e = self.__edge(e.tail())
         return path
 
     def __validate_vertex(self, v):
@@ -95,15 +198,7 @@ class DijkstraSP:
 
 
 def main():
-    with open("../resources/tinyEWD.txt", ) as f:
-        values = "".join(f.readlines()).splitlines()
-        V, E = int(values[0]), int(values[1])
-        g = EdgeWeightedDigraph(V)
-        for line in values[2:]:
-            vertices = line.split(' ')
-            v, w, weight = int(vertices[0]), int(vertices[1]), float(vertices[2])
-            e = DirectedEdge(v, w, weight)
-            g.add_edge(e)
+    g = load_edge_weighted_digraph("../resources/tinyEWD.txt")
     s = 0
     dijkstra = DijkstraSP(g, s)
     print(dijkstra)
@@ -118,6 +213,12 @@ def main():
         else:
             print(f'{s} to {t} no path\n')
 
+    # reuse the solver for point-to-point queries on the frozen digraph
+    sp = DijkstraSP(g.freeze())
+    for s, t in ((0, 6), (3, 1), (7, 4)):
+        sp.search(s, target=t)
+        print(f'{s} to {t} ({sp.dist_to(t)}): ' + ' '.join(str(e) for e in sp.path_to(t).queue[::-1]))
+
 
 if __name__ == '__main__':
     main()
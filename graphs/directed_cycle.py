@@ -1,30 +1,35 @@
 """
 directed_cycle.py
 Finds a directed cycle in a digraph.
-
+The DirectedCycle class represents a data type for determining
+ *  whether a digraph has a directed cycle and, if so, finding one.
+ *
+ *  This implementation uses depth-first search with an explicit stack
+ *  (IterativeDFS): a vertex is on the search stack between its pre and
+ *  post hooks, and an edge to a vertex on the stack closes a cycle.
+ *  The constructor takes Theta(V + E) time in the worst case.
 """
 from graphs.digraph import Digraph
+from graphs.iterative_dfs import IterativeDFS
 from collections import deque
 
 
 class DirectedCycle:
 
-    _cycle = None  # stack
-
     def __init__(self, g):
         self._g = g
-        self._marked = [False for _ in range(g.get_V())]
-        self._on_stack = [False for _ in range(g.get_V())]  # is there vertex on the stack?
-        self._edge_to = [0 for _ in range(g.get_V())]
-        for v in range(g.get_V()):
-            if not self._marked[v] and self._cycle is None:
-                self.__dfs(g, v)
+        self._cycle = None  # stack
+        dfs = IterativeDFS(g, parents=True)
+        self._marked = dfs.get_marked()
+        self._edge_to = dfs.get_edge_to()
+        self._on_stack = bytearray(g.get_V())  # is there vertex on the stack?
+        dfs.search_all(pre=self.__push, post=self.__pop, non_tree_edge=self.__non_tree_edge)
 
     def get_g(self):
         return self._g
 
     def get_cycle(self):
-        if list(self._cycle) is not None:
+        if self._cycle is not None:
             return list(self._cycle)
         return None
 
@@ -34,29 +39,25 @@ class DirectedCycle:
     def get_marked(self):
         return self._marked
 
-    def __dfs(self, g, v):
-        self._marked[v] = True
-        self._on_stack[v] = True
-        for w in g.adj_vertices(v):
-            # directed cycle found
-            if self._cycle is not None:
-                return
-            # found new vertex, recur
-            elif not self._marked[w.item]:
-                self._edge_to[w.item] = v
-                self.__dfs(g, w.item)
-            # trace back directed cycle
-            elif self._on_stack[w.item]:
-                self._cycle = deque()
-                x = v
-                while x != w.item:
-                    self._cycle.append(x)
-                    x = self._edge_to[x]
-                self._cycle.append(w.item)
-                self._cycle.append(v)
-                assert self.__check()
-
-        self._on_stack[v] = False
+    def __push(self, v):
+        self._on_stack[v] = 1
+
+    def __pop(self, v):
+        self._on_stack[v] = 0
+
+    def __non_tree_edge(self, v, w):
+        if not self._on_stack[w]:
+            return False
+        # trace back directed cycle: v, w, ..., v
+        self._cycle = deque()
+        x = v
+        while x != w:
+            self._cycle.appendleft(x)
+            x = self._edge_to[x]
+        self._cycle.appendleft(w)
+        self._cycle.appendleft(v)
+        assert self.__check()
+        return True
 
     def has_cycle(self):
         return self._cycle is not None
@@ -81,8 +82,8 @@ class DirectedCycle:
         return f'<{self.__class__.__name__}(\n' \
                f'g={self.get_g()}, \n' \
                f'cycle={self._cycle}\n' \
-            f'edge_to={self.get_edge_to()}\n' \
-        f'marked={self.get_marked()})>'
+               f'edge_to={list(self.get_edge_to())}\n' \
+               f'marked={list(self.get_marked())})>'
 
 
 def main():
@@ -9,7 +9,8 @@ The DirectedDFS class represents a data type for
  *  (or set of source vertices) in a digraph. For versions that find the paths,
  *  see DepthFirstDirectedPaths and BreadthFirstDirectedPaths.
  *
- *  This implementation uses depth-first search.
+ *  This implementation uses depth-first search with an explicit stack
+ *  (IterativeDFS).
  *  The constructor takes time proportional to V + E
  *  (in the worst case),
  *  where V is the number of vertices and E is the number of edges.
@@ -18,45 +19,33 @@ The DirectedDFS class represents a data type for
 """
 from graphs.bag import Bag
 from graphs.digraph import Digraph
+from graphs.iterative_dfs import IterativeDFS
 
 
 class DirectedDFS:
-    _count = 0
 
     def __init__(self, g, s):
         """
         :param g: the graph
         :param s: the source vertex
         """
-        # print(s)
+        self.g = g
+        self._dfs = IterativeDFS(g)
+        self._marked = self._dfs.get_marked()
         if isinstance(s, Bag):
-            assert isinstance(s, Bag)
-            self._marked = [False for _ in range(g.get_V())]
-            self.g = g
             self.__validate_vertices(s)
             for v in s:
-                if not self._marked[v.item]:
-                    self.__dfs(g, v.item)
+                self._dfs.search(v.item)
         else:
-            self._marked = [False for _ in range(g.get_V())]
-            self.g = g
             self.__validate_vertex(s)
-            self.__dfs(g, s)
+            self._dfs.search(s)
 
     def get_g(self):
         return self.g
 
-    def __dfs(self, g, v):
-        self._count += 1
-        self._marked[v] = True
-        for w in g.adj_vertices(v):
-            # print('item', w.item, w)
-            if not self._marked[w.item]:
-                self.__dfs(g, w.item)
-
     def marked(self, v):
         self.__validate_vertex(v)
-        return self._marked[v]
+        return self._marked[v] == 1
 
     def __validate_vertex(self, v):
         marked_vertices = len(self._marked)
@@ -72,7 +61,7 @@ class DirectedDFS:
             self.__validate_vertex(v.item)
 
     def count(self):
-        return self._count
+        return self._dfs.count()
 
     def __repr__(self):
         return f'<{self.__class__.__name__}(g={self.get_g()}, count={self.count()})>'
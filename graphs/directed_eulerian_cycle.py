@@ -6,48 +6,36 @@ The DirectedEulerianCycle class represents a data type
  *  An Eulerian cycle is a cycle (not necessarily simple) that
  *  uses every edge in the digraph exactly once.
  *
- *  This implementation uses a nonrecursive depth-first search.
+ *  This implementation uses Hierholzer's algorithm (see hierholzer.py):
+ *  a nonrecursive depth-first search over the CSR arrays of the
+ *  reverse digraph with one adjacency cursor per vertex. A digraph
+ *  whose edges are not connected is detected by the search itself
+ *  leaving edges unused.
  *  The constructor takes Theta(E + V) time in the worst
  *  case, where E is the number of edges and V is the
  *  number of vertices
  *  Each instance method takes Theta(1) time.
- *  It uses Theta(V) extra space (not including the digraph).
+ *  It uses Theta(E + V) extra space (not including the digraph).
+ *  stream() yields the cycle in order without storing it.
 """
 from graphs.digraph import Digraph
-from graphs.graph import Graph
-from graphs.breadth_first_paths import BreadthFirstPaths
-from collections import deque
+from graphs.hierholzer import Hierholzer
 
 
 class DirectedEulerianCycle:
 
-    _cycle = None
-
     def __init__(self, g):
         self._g = g
-        self.__run(g)
-
-    def __run(self, g):
-        if g.get_E() == 0:
-            return
-        for v in range(g.get_V()):
-            if g.outdegree(v) != g.indegree(v):
-                return
-        adj = [g.adj_vertices(v) for v in range(g.get_V())]
-        s = DirectedEulerianCycle.__non_isolated_vertex(g)
-        stack = deque()
-        stack.append(s)
-        self._cycle = deque()
-        while stack:
-            v = stack.pop()
-            while next(adj[v], None) is not None:
-                stack.append(v)
-                v = next(adj[v])
-            self._cycle.append(v)
-        if len(self._cycle) != g.get_E() + 1:
-            self._cycle = None
+        engine = Hierholzer(g)
+        self._cycle = engine.vertices()
 
-        assert self.__certify_solution(g)
+    @staticmethod
+    def stream(g):
+        """
+        Yields the vertices of an Eulerian cycle of {g} one at a time.
+        :raises ValueError: if {g} has no Eulerian cycle
+        """
+        return Hierholzer(g).tour()
 
     def cycle(self):
         return self._cycle
@@ -55,56 +43,6 @@ class DirectedEulerianCycle:
     def has_eulerian_cycle(self):
         return self._cycle is not None
 
-    @staticmethod
-    def __non_isolated_vertex(g):
-        for v in range(g.get_V()):
-            if g.outdegree(v) > 0:
-                return v
-        return -1
-
-    @staticmethod
-    def __satisfies_necessary_and_sufficient_conditions(g):
-        """
-        Determines whether a digraph has an Eulerian cycle using necessary
-        and sufficient conditions (without computing the cycle itself):
-           - at least one edge
-           - indegree(v) = outdegree(v) for every vertex
-           - the graph is connected, when viewed as an undirected graph
-             (ignoring isolated vertices)
-        """
-        # Condition 0: at least 1 Edge
-        if g.get_E() == 0:
-            return False
-        # Condition 1: indegree(v) == outdegree(v) for every vertex
-        for v in range(g.get_V()):
-            if g.outdegree() != g.indegree(v):
-                return False
-        # Condition 2: graph is connected, ignoring isolated vertices
-        h = Graph(g.get_V())
-        for v in range(g.get_V()):
-            for w in g.adj_vertices(v):
-                h.add_edge(v, w)
-        # check that all non-isolated vertices are connected
-        s = DirectedEulerianCycle.__non_isolated_vertex(g)
-        bfs = BreadthFirstPaths(h, s)
-        for v in range(g.get_V()):
-            if h.degree(v) > 0 and not bfs.has_path_to(v):
-                return False
-            return True
-
-    def __certify_solution(self, g):
-        if self.has_eulerian_cycle() == (self.cycle() is None):
-            return False
-        if self.has_eulerian_cycle() \
-                != DirectedEulerianCycle.__satisfies_necessary_and_sufficient_conditions(g):
-            return False
-        if self._cycle is None:
-            return True
-        if len(self._cycle) != g.get_E() + 1:
-            return False
-
-        return True
-
     def __repr__(self):
         return f'<{self.__class__.__name__}(cycle={self._cycle}, g={self._g})>'
 
@@ -125,7 +63,7 @@ def main():
     print("Eulerian cycle: ")
     if euler.has_eulerian_cycle():
         for v in euler.cycle():
-            print(v + " ")
+            print(f'{v} ')
         print()
     else:
         print("none")
@@ -135,12 +73,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
-
-
-
-
-
-
-
@@ -7,53 +7,36 @@ The DirectedEulerianPath class represents a data type
  *  An Eulerian path is a path (not necessarily simple) that
  *  uses every edge in the digraph exactly once.
  *
- *  This implementation uses a nonrecursive depth-first search.
+ *  This implementation uses Hierholzer's algorithm (see hierholzer.py):
+ *  a nonrecursive depth-first search over the CSR arrays of the
+ *  reverse digraph with one adjacency cursor per vertex. A digraph
+ *  whose edges are not connected is detected by the search itself
+ *  leaving edges unused.
  *  The constructor take Theta(E + V) time
  *  in the worst case, where E is the number of edges and
  *  V is the number of vertices.
- *  It uses Theta(V) extra space (not including the digraph).
+ *  It uses Theta(E + V) extra space (not including the digraph).
+ *  stream() yields the path in order without storing it.
 """
 
 from graphs.digraph import Digraph
-from graphs.graph import Graph
-from graphs.breadth_first_paths import BreadthFirstPaths
-from collections import deque
+from graphs.hierholzer import Hierholzer
 
 
 class DirectedEulerianPath:
 
-    _path = None
-
     def __init__(self, g):
         self._g = g
-        self.__run(g)
-
-    def __run(self, g):
-        deficit = 0
-        s = DirectedEulerianPath.__non_isolated_vertex(g)
-        for v in range(g.get_V()):
-            if g.outdegree(v) > g.indegree(v):
-                deficit += (g.outdegree(v) - g.indegree(v))
-                s = v
-        if deficit > 1:
-            return
-        if s == -1:
-            s = 0
-
-        adj = [g.adj_vertices(v) for v in range(g.get_V())]
-        stack = deque()
-        stack.append(s)
-        self._path = deque()
-        while stack:
-            v = stack.pop()
-            while next(adj[v], None) is not None:
-                stack.append(v)
-                v = next(adj[v])
-            self._path.append(v)
-        if len(self._path) != g.get_E() + 1:
-            self._path = None
+        engine = Hierholzer(g, path=True)
+        self._path = engine.vertices()
 
-        assert self.__check(g)
+    @staticmethod
+    def stream(g):
+        """
+        Yields the vertices of an Eulerian path of {g} one at a time.
+        :raises ValueError: if {g} has no Eulerian path
+        """
+        return Hierholzer(g, path=True).tour()
 
     def path(self):
         return self._path
@@ -61,61 +44,6 @@ class DirectedEulerianPath:
     def has_eulerian_path(self):
         return self._path is not None
 
-    @staticmethod
-    def __non_isolated_vertex(g):
-        for v in range(g.get_V()):
-            if g.outdegree(v) > 0:
-                return v
-        return -1
-
-    @staticmethod
-    def __satisfies_necessary_and_sufficient_conditions(g):
-        """
-        Determines whether a digraph has an Eulerian path using necessary
-        and sufficient conditions (without computing the path itself):
-            - indegree(v) = outdegree(v) for every vertex,
-              except one vertex v may have outdegree(v) = indegree(v) + 1
-              (and one vertex v may have indegree(v) = outdegree(v) + 1)
-            - the graph is connected, when viewed as an undirected graph
-              (ignoring isolated vertices)
-        """
-        # Condition 0: at least 1 Edge
-        if g.get_E() == 0:
-            return True
-        # Condition 1: indegree(v) == outdegree(v) for every vertex,
-        # except one vertex may have outdegree(v) = indegree(v) + 1
-        deficit = 0
-        for v in range(g.get_V()):
-            if g.outdegree() > g.indegree(v):
-                deficit += (g.outdegree() - g.indegree(v))
-        if deficit > 1:
-            return False
-        # Condition 2: graph is connected, ignoring isolated vertices
-        h = Graph(g.get_V())
-        for v in range(g.get_V()):
-            for w in g.adj_vertices(v):
-                h.add_edge(v, w)
-        # check that all non-isolated vertices are connected
-        s = DirectedEulerianPath.__non_isolated_vertex(g)
-        bfs = BreadthFirstPaths(h, s)
-        for v in range(g.get_V()):
-            if h.degree(v) > 0 and not bfs.has_path_to(v):
-                return False
-            return True
-
-    def __check(self, g):
-        if self.has_eulerian_path() == (self.path() is None):
-            return False
-        if self.has_eulerian_path() \
-                != DirectedEulerianPath.__satisfies_necessary_and_sufficient_conditions(g):
-            return False
-        if self._path is None:
-            return True
-        if len(self._path) != g.get_E() + 1:
-            return False
-
-        return True
-
     def __repr__(self):
         return f'<{self.__class__.__name__}(path={self._path}, g={self._g})>'
 
@@ -136,7 +64,7 @@ def main():
     print("Eulerian path: ")
     if euler.has_eulerian_path():
         for v in euler.path():
-            print(v + " ")
+            print(f'{v} ')
         print()
     else:
         print("none")
@@ -146,12 +74,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
-
-
-
-
-
-
-
@@ -0,0 +1,275 @@
+"""
+direction_optimizing_bfs.py
+Run direction-optimizing breadth-first search on a graph or digraph.
+ *  Inspects far fewer than E edges on low-diameter graphs.
+The DirectionOptimizingBFS class represents a data type for finding
+ *  shortest paths (number of edges) from a source vertex s
+ *  (or a set of source vertices) to every other vertex in a graph
+ *  or digraph, with the API of BreadthFirstDirectedPaths.
+ *
+ *  This implementation is Beamer's direction-optimizing breadth-first
+ *  search. A level is expanded either top-down, following the edges
+ *  out of every frontier vertex, or bottom-up, where every unvisited
+ *  vertex looks through its incoming edges for a parent in the
+ *  frontier and stops at the first one. Top-down is cheap while the
+ *  frontier is small; bottom-up is cheap once the frontier holds a
+ *  large share of the edges, because most unvisited vertices then find
+ *  a parent after a few probes. The search switches to bottom-up when
+ *  the edges out of the frontier exceed 1 / alpha of the edges out of
+ *  unvisited vertices, and back to top-down when the frontier holds
+ *  fewer than V / beta vertices.
+ *
+ *  The graph is frozen to CSR form if it is not already. The bottom-up
+ *  steps read a reverse adjacency view: the graph itself if undirected,
+ *  and the reverse CSRDigraph (built the first time it is needed) for
+ *  a digraph. The frontier of a bottom-up step is a bitmap of V bits.
+ *  dist_to and edge_to are array('i') with -1 for unreached vertices.
+ *  The constructor takes O(E + V * L) time in the worst case, where L
+ *  is the number of bottom-up levels.
+ *  Each instance method takes Theta(1) time, except path_to.
+ *  It uses Theta(V) extra space (not including the graph and, for a
+ *  digraph, its reverse).
+"""
+import math
+import random
+import time
+from array import array
+from queue import LifoQueue
+
+from graphs.breadth_first_paths import BreadthFirstPaths
+from graphs.csr_graph import CSRDigraph, CSRGraph
+from graphs.graph import Graph
+
+
+class DirectionOptimizingBFS:
+
+    def __init__(self, g, s=None, sources=None, alpha=15, beta=18, direction_optimizing=True):
+        """
+        :param g: the graph or digraph (Bag-based or CSR)
+        :param s: the source vertex
+        :param sources: the source vertices, instead of {s}
+        :param alpha: switch to bottom-up when frontier edges > unexplored edges / alpha
+        :param beta: switch back to top-down when the frontier has < V / beta vertices
+        :param direction_optimizing: False runs every level top-down
+        """
+        if not isinstance(g, (CSRGraph, CSRDigraph)):
+            g = g.freeze()
+        self._g = g
+        self._V = g.get_V()
+        self._s = s
+        self._sources = sources
+        self._alpha, self._beta = alpha, beta
+        self._direction_optimizing = direction_optimizing
+        self._dist_to = array('i', [-1]) * self._V
+        self._edge_to = array('i', [-1]) * self._V
+        self._edges_inspected = 0
+        self._bottom_up_levels = 0
+        if sources is None:
+            self.__validate_vertex(s)
+            sources = [s]
+        else:
+            self.__validate_vertices(sources)
+        self.__bfs(sources)
+
+    def __reverse(self):
+        if isinstance(self._g, CSRGraph):
+            return self._g
+        if not hasattr(self, '_reverse'):
+            self._reverse = self._g.reverse()
+        return self._reverse
+
+    def __bfs(self, sources):
+        offsets = self._g.offsets
+        dist_to = self._dist_to
+        frontier = list()
+        for s in sources:
+            if dist_to[s] == -1:
+                dist_to[s] = 0
+                frontier.append(s)
+        # edges out of the vertices not yet reached
+        unexplored = len(self._g.targets) - sum(offsets[v + 1] - offsets[v] for v in frontier)
+        bottom_up = False
+        level = 0
+        while frontier:
+            if self._direction_optimizing:
+                if bottom_up:
+                    bottom_up = len(frontier) * self._beta >= self._V
+                else:
+                    out = sum(offsets[v + 1] - offsets[v] for v in frontier)
+                    bottom_up = out * self._alpha > unexplored
+            if bottom_up:
+                self._bottom_up_levels += 1
+                frontier = self.__bottom_up_step(frontier, level)
+            else:
+                frontier = self.__top_down_step(frontier, level)
+            unexplored -= sum(offsets[v + 1] - offsets[v] for v in frontier)
+            level += 1
+
+    def __top_down_step(self, frontier, level):
+        offsets, targets = self._g.offsets, self._g.targets
+        dist_to, edge_to = self._dist_to, self._edge_to
+        following = list()
+        for v in frontier:
+            lo, hi = offsets[v], offsets[v + 1]
+            self._edges_inspected += hi - lo
+            for i in range(lo, hi):
+                w = targets[i]
+                if dist_to[w] == -1:
+                    dist_to[w] = level + 1
+                    edge_to[w] = v
+                    following.append(w)
+        return following
+
+    def __bottom_up_step(self, frontier, level):
+        reverse = self.__reverse()
+        offsets, targets = reverse.offsets, reverse.targets
+        dist_to, edge_to = self._dist_to, self._edge_to
+        bits = bytearray((self._V + 7) >> 3)
+        for v in frontier:
+            bits[v >> 3] |= 1 << (v & 7)
+        following = list()
+        inspected = 0
+        for w in range(self._V):
+            if dist_to[w] != -1:
+                continue
+            lo, hi = offsets[w], offsets[w + 1]
+            for i in range(lo, hi):
+                v = targets[i]
+                if bits[v >> 3] >> (v & 7) & 1:
+                    dist_to[w] = level + 1
+                    edge_to[w] = v
+                    following.append(w)
+                    inspected += i - lo + 1
+                    break
+            else:
+                inspected += hi - lo
+        self._edges_inspected += inspected
+        return following
+
+    def get_dist_to(self):
+        return self._dist_to
+
+    def get_edge_to(self):
+        return self._edge_to
+
+    def edges_inspected(self):
+        """
+        :returns: the number of adjacency entries the search looked at
+        """
+        return self._edges_inspected
+
+    def bottom_up_levels(self):
+        """
+        :returns: the number of levels expanded bottom-up
+        """
+        return self._bottom_up_levels
+
+    def has_path_to(self, v):
+        self.__validate_vertex(v)
+        return self._dist_to[v] != -1
+
+    def dist_to(self, v):
+        """
+        :returns: the number of edges on a shortest path from a source to {v},
+                  or infinity if there is none
+        """
+        self.__validate_vertex(v)
+        return self._dist_to[v] if self._dist_to[v] != -1 else math.inf
+
+    def distance_to(self, v):
+        return self.dist_to(v)
+
+    def path_to(self, v):
+        self.__validate_vertex(v)
+        if not self.has_path_to(v):
+            return None
+        path = LifoQueue()  # stack
+        x = v
+        while self._dist_to[x] != 0:
+            path.put(x)
+            x = self._edge_to[x]
+        path.put(x)
+        return path
+
+    def __validate_vertex(self, v):
+        n = self._V
+        if v is None or v < 0 or v >= n:
+            raise AttributeError(f'vertex {v} is not between 0 and {n - 1}')
+
+    def __validate_vertices(self, vertices):
+        if vertices is None:
+            raise AttributeError('argument is None')
+        for v in vertices:
+            if v is None:
+                raise AttributeError('vertex is None')
+            self.__validate_vertex(v)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'V={self._V}, ' \
+               f's={self._s}, ' \
+               f'sources={self._sources}, ' \
+               f'edges_inspected={self._edges_inspected}, ' \
+               f'bottom_up_levels={self._bottom_up_levels})>'
+
+
+def power_law_graph(n, m, seed=0):
+    """
+    Generates a Barabasi-Albert preferential-attachment graph: each new
+    vertex attaches {m} edges to existing vertices chosen with probability
+    proportional to their degree, so the degrees follow a power law.
+    :returns: the ends of the edges as two array('i')
+    """
+    rnd = random.Random(seed)
+    ends_a, ends_b = array('i'), array('i')
+    endpoints = list(range(m))  # every vertex appears once per incident edge
+    for v in range(m, n):
+        chosen = {endpoints[rnd.randrange(len(endpoints))] for _ in range(m)}
+        for w in chosen:
+            ends_a.append(v)
+            ends_b.append(w)
+            endpoints.append(w)
+        endpoints.extend([v] * len(chosen))
+    return ends_a, ends_b
+
+
+def _benchmark(n=200000, m=8, seed=1):
+    """
+    Times BreadthFirstPaths on a Bag graph and DirectionOptimizingBFS with and
+    without direction switching on a power-law graph with {n} vertices.
+    """
+    ends_a, ends_b = power_law_graph(n, m, seed)
+    csr = CSRGraph.from_edges(n, ends_a, ends_b)
+    g = Graph(n)
+    for v, w in zip(ends_a, ends_b):
+        g.add_edge(v, w)
+    print(f'power-law graph V={n} E={len(ends_a)}')
+    start = time.perf_counter()
+    classic = BreadthFirstPaths(g, 0)
+    print(f'BreadthFirstPaths           {time.perf_counter() - start:6.2f} s')
+    for name, flag in (('top-down only', False), ('direction-optimizing', True)):
+        start = time.perf_counter()
+        bfs = DirectionOptimizingBFS(csr, 0, direction_optimizing=flag)
+        elapsed = time.perf_counter() - start
+        assert all(bfs.dist_to(v) == classic.distance_to(v) for v in range(n))
+        print(f'{name:27} {elapsed:6.2f} s  {bfs.edges_inspected():9} edges inspected, '
+              f'{bfs.bottom_up_levels()} bottom-up levels')
+
+
+def main():
+    g = CSRDigraph.from_edges(6, [0, 0, 1, 2, 3, 4, 5], [1, 2, 3, 3, 4, 1, 5])
+    sources = [0, 5]
+    bfs = DirectionOptimizingBFS(g, sources=sources, alpha=1)
+    print(bfs)
+    for v in range(g.get_V()):
+        if bfs.has_path_to(v):
+            path = bfs.path_to(v)
+            print(f'{sources} to {v} ({bfs.dist_to(v)}): '
+                  + '->'.join(str(path.get()) for _ in range(path.qsize())))
+        else:
+            print(f'{sources} to {v} (-): not connected')
+    _benchmark()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+dynamic_acyclic_paths.py
+Maintain shortest or longest paths from a source in an edge-weighted DAG
+ *  as edges are added and removed.
+The DynamicAcyclicSP and DynamicAcyclicLP classes have the API of
+ *  AcyclicSP and AcyclicLP, plus add_edge and remove_edge.
+ *  The edge weights can be positive, negative, or zero.
+ *
+ *  This implementation keeps a DynamicTopological order of the DAG, so an
+ *  edge that would create a cycle is rejected with a ValueError before
+ *  anything changes. After a change to the edges into vertex w, only the
+ *  vertices whose distance can change are revisited: w first, and then
+ *  the heads of the edges out of every vertex whose distance did change,
+ *  taken from a priority queue in topological order so that each vertex
+ *  is recomputed once, from the final distances of its predecessors. The
+ *  recomputation of a vertex takes the best of its incoming edges, so
+ *  insertions, deletions and weight changes are handled alike.
+ *  An update takes O(A log A + E_A) time, where A is the number of
+ *  vertices revisited and E_A the edges into and out of them.
+"""
+import heapq
+import math
+from queue import LifoQueue
+
+from graphs.directed_edge import DirectedEdge
+from graphs.dynamic_topological import DynamicTopological
+from graphs.edge_list_loader import load_edge_weighted_digraph
+
+
+class _DynamicAcyclicPaths:
+
+    _UNREACHED = math.inf
+
+    def __init__(self, g, s):
+        """
+        :param g: the edge-weighted DAG (Bag-based, not frozen)
+        :param s: the source vertex
+        :raises ValueError: if g has a directed cycle
+        """
+        v = g.get_V()
+        self._dist_to = [self._UNREACHED] * v
+        self._edge_to = [None] * v
+        self.__validate_vertex(s)
+        self._s = s
+        self._in = [list() for _ in range(v)]
+        self._out = [list() for _ in range(v)]
+        for x in range(v):
+            for e in g.adj_items(x):
+                self._out[x].append(e)
+                self._in[e.head()].append(e)
+        self._topological = DynamicTopological(g)
+        self._dist_to[s] = 0.0
+        self._touched = 0
+        self.__update(self._topological.order())
+
+    def _better(self, d, best):
+        raise NotImplementedError
+
+    def __recompute(self, w):
+        """
+        :returns: True if the distance to {w} changed
+        """
+        if w == self._s:
+            return False
+        best, best_edge = self._UNREACHED, None
+        for e in self._in[w]:
+            d = self._dist_to[e.tail()]
+            if d != self._UNREACHED and self._better(d + e.weight(), best):
+                best, best_edge = d + e.weight(), e
+        self._edge_to[w] = best_edge
+        if best != self._dist_to[w]:
+            self._dist_to[w] = best
+            return True
+        return False
+
+    def __update(self, changed):
+        rank = self._topological.rank
+        heap = [(rank(w), w) for w in changed]
+        heapq.heapify(heap)
+        queued = set(changed)
+        self._touched = 0
+        while heap:
+            _, w = heapq.heappop(heap)
+            self._touched += 1
+            if self.__recompute(w) or w == self._s:
+                for e in self._out[w]:
+                    x = e.head()
+                    if x not in queued:
+                        queued.add(x)
+                        heapq.heappush(heap, (rank(x), x))
+
+    def add_edge(self, e: DirectedEdge):
+        """
+        Adds the edge {e} and updates the distances it affects.
+        :raises ValueError: if {e} would create a cycle; nothing is changed
+        """
+        self._topological.add_edge(e.tail(), e.head())
+        self._out[e.tail()].append(e)
+        self._in[e.head()].append(e)
+        self.__update([e.head()])
+
+    def remove_edge(self, e: DirectedEdge):
+        """
+        Removes the edge {e}, or an edge with the same endpoints and weight,
+        and updates the distances it affects.
+        :raises ValueError: if there is no such edge
+        """
+        out = self._out[e.tail()]
+        for i, f in enumerate(out):
+            if f is e or (f.head() == e.head() and f.weight() == e.weight()):
+                break
+        else:
+            raise ValueError(f'no edge {e}')
+        f = out.pop(i)
+        self._in[e.head()].remove(f)
+        self._topological.remove_edge(e.tail(), e.head())
+        self.__update([e.head()])
+
+    def touched(self):
+        """
+        :returns: the number of vertices revisited by the last update
+        """
+        return self._touched
+
+    def topological(self):
+        """
+        :returns: the DynamicTopological order of the DAG
+        """
+        return self._topological
+
+    def dist_to(self, v):
+        self.__validate_vertex(v)
+        return self._dist_to[v]
+
+    def has_path_to(self, v):
+        self.__validate_vertex(v)
+        return self._dist_to[v] != self._UNREACHED
+
+    def path_to(self, v):
+        self.__validate_vertex(v)
+        e = self._edge_to[v]
+        path = LifoQueue()
+        while e is not None:
+            path.put(e)
+            e = self._edge_to[e.tail()]
+        return path
+
+    def __validate_vertex(self, v):
+        n = len(self._dist_to)
+        if v < 0 or v >= n:
+            raise AttributeError(f'vertex {v} is not between 0 and {n - 1}')
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(\n' \
+               f'_dist_to={self._dist_to}, \n' \
+               f'_edge_to={self._edge_to})>'
+
+
+class DynamicAcyclicSP(_DynamicAcyclicPaths):
+
+    _UNREACHED = math.inf
+
+    def _better(self, d, best):
+        return d < best
+
+
+class DynamicAcyclicLP(_DynamicAcyclicPaths):
+
+    _UNREACHED = -math.inf  # -inf not inf
+
+    def _better(self, d, best):
+        # > not <
+        return d > best
+
+
+def main():
+    g = load_edge_weighted_digraph("../resources/tinyEWDAG.txt")
+    V = g.get_V()
+    s = 5
+    lp = DynamicAcyclicLP(g, s)
+    print(' '.join(f'{lp.dist_to(t):.2f}' for t in range(V)))
+    e = DirectedEdge(5, 6, 2.0)
+    lp.add_edge(e)
+    print(f'after adding {e}, {lp.touched()} vertices revisited:')
+    print(' '.join(f'{lp.dist_to(t):.2f}' for t in range(V)))
+    lp.remove_edge(e)
+    print(f'after removing it again, {lp.touched()} vertices revisited:')
+    print(' '.join(f'{lp.dist_to(t):.2f}' for t in range(V)))
+    try:
+        lp.add_edge(DirectedEdge(2, 5, 1.0))
+    except ValueError as error:
+        print(error)
+
+
+if __name__ == '__main__':
+    main()
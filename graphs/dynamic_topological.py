@@ -0,0 +1,232 @@
+"""
+dynamic_topological.py
+Maintain a topological order of a DAG under edge insertions and deletions.
+The DynamicTopological class represents a directed acyclic graph
+ *  together with a topological order of its vertices that is kept up to
+ *  date as edges are added and removed. add_edge rejects an edge that
+ *  would create a cycle with a ValueError, leaving the DAG unchanged, so
+ *  the digraph is acyclic at all times and DirectedCycle never has to be
+ *  rerun.
+ *
+ *  This implementation uses the Pearce-Kelly algorithm. An edge v->w
+ *  that already points forward in the order needs no work. Otherwise a
+ *  forward search from w, restricted to vertices ranked at most rank(v),
+ *  and a backward search from v, restricted to vertices ranked at least
+ *  rank(w), find the affected region; if the forward search reaches v the
+ *  edge closes a cycle. The vertices of both searches are then moved onto
+ *  the ranks they already occupy, backward ones first, each group in its
+ *  old relative order. The cost is proportional to the size of the
+ *  affected region and the edges leaving it, not to V + E.
+ *  Removing an edge never invalidates the order.
+ *  Parallel edges are counted, and removing one leaves the others.
+ *  rank and has_edge take Theta(1) time; order takes Theta(V) time.
+"""
+from array import array
+from collections import deque
+
+from graphs.csr_graph import CSRDigraph, CSREdgeWeightedDigraph
+from graphs.digraph import Digraph
+
+
+class DynamicTopological:
+
+    def __init__(self, g=0):
+        """
+        :param g: a DAG (Bag-based or CSR, weighted or not) to start from,
+                  or the number of vertices of an empty DAG
+        :raises ValueError: if g has a directed cycle
+        """
+        if isinstance(g, int):
+            if g < 0:
+                raise ValueError('Number of vertices must be non-negative')
+            v = g
+            g = None
+        else:
+            if not isinstance(g, (CSRDigraph, CSREdgeWeightedDigraph)):
+                g = g.freeze()
+            v = g.get_V()
+        self._E = 0
+        self._succ = [dict() for _ in range(v)]  # succ[v][w] = number of edges v->w
+        self._pred = [dict() for _ in range(v)]
+        if g is None:
+            self._rank = array('i', range(v))
+        else:
+            offsets, targets = g.offsets, g.targets
+            for x in range(v):
+                for i in range(offsets[x], offsets[x + 1]):
+                    self.__link(x, targets[i])
+            self._rank = self.__kahn()
+        self._vertex = array('i', bytes(4 * v))  # vertex[r] = the vertex of rank r
+        for x in range(v):
+            self._vertex[self._rank[x]] = x
+
+    def __kahn(self):
+        v = len(self._succ)
+        indegree = [sum(p.values()) for p in self._pred]
+        queue = deque(x for x in range(v) if indegree[x] == 0)
+        rank = array('i', [-1]) * v
+        r = 0
+        while queue:
+            x = queue.popleft()
+            rank[x] = r
+            r += 1
+            for y, k in self._succ[x].items():
+                indegree[y] -= k
+                if indegree[y] == 0:
+                    queue.append(y)
+        if r < v:
+            raise ValueError('Digraph is not acyclic')
+        return rank
+
+    def __link(self, v, w):
+        self._succ[v][w] = self._succ[v].get(w, 0) + 1
+        self._pred[w][v] = self._pred[w].get(v, 0) + 1
+        self._E += 1
+
+    def get_V(self):
+        return len(self._succ)
+
+    def get_E(self):
+        return self._E
+
+    def add_vertex(self):
+        """
+        Adds a vertex with no edges at the end of the order.
+        :returns: the new vertex
+        """
+        v = len(self._succ)
+        self._succ.append(dict())
+        self._pred.append(dict())
+        self._rank.append(v)
+        self._vertex.append(v)
+        return v
+
+    def add_edge(self, v, w):
+        """
+        Adds the edge v->w and updates the order.
+        :raises ValueError: if the edge would create a cycle; the DAG is left unchanged
+        """
+        self.__validate_vertex(v)
+        self.__validate_vertex(w)
+        if v == w:
+            raise ValueError(f'edge {v}->{w} would create a cycle')
+        lower, upper = self._rank[w], self._rank[v]
+        if lower < upper:
+            forward = self.__search(w, self._succ, lambda r: r <= upper, v)
+            if forward is None:
+                raise ValueError(f'edge {v}->{w} would create a cycle')
+            backward = self.__search(v, self._pred, lambda r: r >= lower)
+            self.__reorder(backward, forward)
+        self.__link(v, w)
+
+    def remove_edge(self, v, w):
+        """
+        Removes one edge v->w; the order stays valid.
+        :raises ValueError: if there is no such edge
+        """
+        self.__validate_vertex(v)
+        self.__validate_vertex(w)
+        k = self._succ[v].get(w, 0)
+        if k == 0:
+            raise ValueError(f'no edge {v}->{w}')
+        if k == 1:
+            del self._succ[v][w]
+            del self._pred[w][v]
+        else:
+            self._succ[v][w] = k - 1
+            self._pred[w][v] = k - 1
+        self._E -= 1
+
+    def __search(self, s, adj, inside, target=None):
+        """
+        Depth-first search from {s} over the vertices whose rank satisfies {inside}.
+        :returns: the vertices found, or None if {target} is among them
+        """
+        rank = self._rank
+        found = {s}
+        stack = [s]
+        while stack:
+            x = stack.pop()
+            for y in adj[x]:
+                if y == target:
+                    return None
+                if y not in found and inside(rank[y]):
+                    found.add(y)
+                    stack.append(y)
+        return found
+
+    def __reorder(self, backward, forward):
+        rank, vertex = self._rank, self._vertex
+        moved = sorted(backward, key=rank.__getitem__) + sorted(forward, key=rank.__getitem__)
+        slots = sorted(rank[x] for x in moved)
+        for x, r in zip(moved, slots):
+            rank[x] = r
+            vertex[r] = x
+
+    def has_edge(self, v, w):
+        self.__validate_vertex(v)
+        self.__validate_vertex(w)
+        return w in self._succ[v]
+
+    def successors(self, v):
+        """
+        :returns: the distinct heads of the edges out of {v}
+        """
+        self.__validate_vertex(v)
+        return self._succ[v].keys()
+
+    def predecessors(self, v):
+        """
+        :returns: the distinct tails of the edges into {v}
+        """
+        self.__validate_vertex(v)
+        return self._pred[v].keys()
+
+    def order(self):
+        """
+        :returns: the vertices in topological order
+        """
+        return list(self._vertex)
+
+    def has_order(self):
+        return True
+
+    def rank(self, v):
+        """
+        :returns: the position of {v} in the topological order, from 0
+        """
+        self.__validate_vertex(v)
+        return self._rank[v]
+
+    def __validate_vertex(self, v):
+        n = len(self._succ)
+        if v < 0 or v >= n:
+            raise ValueError(f'vertex {v} is not between 0 and {n - 1}')
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(V={self.get_V()}, E={self._E}, order={self.order()})>'
+
+
+def main():
+    with open("../resources/tinyDAG.txt") as f:
+        values = f.read().split('\n')
+        g = Digraph(int(values[0]))
+        for line in values[2:]:
+            vertices = line.split(' ')
+            if len(vertices) < 2:
+                continue
+            g.add_edge(int(vertices[0]), int(vertices[1]))
+    dag = DynamicTopological(g)
+    print(dag)
+    for v, w in ((12, 2), (1, 8), (10, 0)):
+        try:
+            dag.add_edge(v, w)
+            print(f'added {v}->{w}: {dag.order()}')
+        except ValueError as e:
+            print(e)
+    dag.remove_edge(0, 6)
+    print(f'removed 0->6: {dag}')
+
+
+if __name__ == '__main__':
+    main()
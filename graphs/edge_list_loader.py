@@ -0,0 +1,402 @@
+"""
+edge_list_loader.py
+Bulk loading of edge-list files into the graph classes.
+ *  A text edge list is the format of the resources/tiny*.txt files:
+ *  the number of vertices V, the number of edges E, then one edge
+ *  per line as "v w" or "v w weight", separated by any whitespace.
+ *  A binary edge list stores the same data column by column:
+ *
+ *      header   magic b'EDGL', version, flags, V, E   ('<4sBB2xqq')
+ *      tails    E little-endian int32
+ *      heads    E little-endian int32
+ *      weights  E little-endian float64 (only if flags & WEIGHTED)
+ *
+ *  Both formats are memory-mapped and parsed in blocks straight into
+ *  array('i')/array('d') columns, so no per-line strings or edge objects
+ *  are created while parsing. iter_edge_chunks() yields the columns a
+ *  block at a time for files that do not fit in memory, and the frozen
+ *  loaders build CSR graphs in two streaming passes (degree count, then
+ *  fill) so only the CSR arrays themselves are ever resident.
+"""
+import mmap
+import struct
+import sys
+from array import array
+
+from graphs.csr_graph import CSRDigraph, CSRGraph, CSREdgeWeightedDigraph, CSREdgeWeightedGraph
+from graphs.digraph import Digraph
+from graphs.directed_edge import DirectedEdge
+from graphs.edge import Edge
+from graphs.edge_weighted_digraph import EdgeWeightedDigraph
+from graphs.edge_weighted_graph import EdgeWeightedGraph
+from graphs.flow_edge import FlowEdge
+from graphs.flow_network import FlowNetwork
+from graphs.graph import Graph
+
+MAGIC = b'EDGL'
+VERSION = 1
+WEIGHTED = 0x01
+_HEADER = struct.Struct('<4sBB2xqq')
+_CHUNK_EDGES = 1 << 20
+
+
+class EdgeListFormatError(ValueError):
+    pass
+
+
+def _le(column):
+    """ Converts an array between native and little-endian byte order in place. """
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+class _EdgeListFile:
+    """
+    A memory-mapped edge-list file of either format.
+    Reads the header on open and exposes the edge columns in blocks.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise EdgeListFormatError(f'{path} is empty')
+        self.binary = self._mm[:len(MAGIC)] == MAGIC
+        try:
+            if self.binary:
+                self.__read_binary_header()
+            else:
+                self.__read_text_header()
+        except EdgeListFormatError:
+            self.close()
+            raise
+
+    def __read_binary_header(self):
+        if len(self._mm) < _HEADER.size:
+            raise EdgeListFormatError('truncated binary header')
+        _, version, flags, self.V, self.E = _HEADER.unpack_from(self._mm, 0)
+        if version != VERSION:
+            raise EdgeListFormatError(f'unsupported binary edge-list version {version}')
+        self.weighted = bool(flags & WEIGHTED)
+        expected = _HEADER.size + self.E * (8 + (8 if self.weighted else 0))
+        if len(self._mm) != expected:
+            raise EdgeListFormatError(f'binary edge list has {len(self._mm)} bytes, expected {expected}')
+
+    def __read_text_header(self):
+        try:
+            self.V = int(self._mm.readline())
+            self.E = int(self._mm.readline())
+        except ValueError:
+            raise EdgeListFormatError('text edge list must start with V and E lines')
+        self._body = self._mm.tell()
+        # the number of columns comes from the first non-blank edge line
+        self.weighted = False
+        while self.E > 0:
+            line = self._mm.readline()
+            if not line:
+                break
+            columns = len(line.split())
+            if columns:
+                if columns not in (2, 3):
+                    raise EdgeListFormatError(f'edge lines must have 2 or 3 columns, not {columns}')
+                self.weighted = columns == 3
+                break
+        self._mm.seek(self._body)
+
+    def chunks(self, chunk_edges=_CHUNK_EDGES):
+        """
+        Yields (tails, heads, weights) column blocks of at most about
+        chunk_edges edges; weights is None for unweighted files.
+        """
+        if self.binary:
+            yield from self.__binary_chunks(chunk_edges)
+        else:
+            yield from self.__text_chunks(chunk_edges)
+
+    def __binary_chunks(self, chunk_edges):
+        for lo in range(0, self.E, chunk_edges):
+            yield self.edge_range(lo, min(self.E, lo + chunk_edges))
+
+    def edge_range(self, lo, hi):
+        """
+        Returns the (tails, heads, weights) columns of the edges lo to hi of
+        a binary file.
+        """
+        n = self.E
+        lo, hi = max(0, lo), max(lo, min(n, hi))
+        tails_at = _HEADER.size
+        heads_at = tails_at + 4 * n
+        weights_at = heads_at + 4 * n
+        tails, heads = array('i'), array('i')
+        tails.frombytes(self._mm[tails_at + 4 * lo:tails_at + 4 * hi])
+        heads.frombytes(self._mm[heads_at + 4 * lo:heads_at + 4 * hi])
+        weights = None
+        if self.weighted:
+            weights = array('d')
+            weights.frombytes(self._mm[weights_at + 8 * lo:weights_at + 8 * hi])
+            _le(weights)
+        return _le(tails), _le(heads), weights
+
+    def __text_chunks(self, chunk_edges):
+        columns = 3 if self.weighted else 2
+        # about 16 bytes per edge line keeps the blocks near chunk_edges edges
+        block_size = max(1 << 16, 16 * chunk_edges)
+        mm, pos, end = self._mm, self._body, len(self._mm)
+        seen = 0
+        while pos < end:
+            stop = min(end, pos + block_size)
+            if stop < end:
+                # cut the block after its last complete line
+                newline = mm.rfind(b'\n', pos, stop)
+                stop = newline + 1 if newline >= pos else mm.find(b'\n', stop) + 1 or end
+            tokens = mm[pos:stop].split()
+            pos = stop
+            if len(tokens) % columns != 0:
+                raise EdgeListFormatError(f'edge lines must all have {columns} columns')
+            if not tokens:
+                continue
+            tails = array('i', map(int, tokens[0::columns]))
+            heads = array('i', map(int, tokens[1::columns]))
+            weights = array('d', map(float, tokens[2::columns])) if self.weighted else None
+            seen += len(tails)
+            yield tails, heads, weights
+        if seen != self.E:
+            raise EdgeListFormatError(f'header says {self.E} edges but the file has {seen}')
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_edge_chunks(path, chunk_edges=_CHUNK_EDGES):
+    """
+    Streams an edge-list file in blocks.
+    :param path: a text or binary edge-list file
+    :param chunk_edges: the approximate number of edges per block
+    :returns: a generator of (tails, heads, weights) arrays; weights is None
+              for unweighted files
+    """
+    with _EdgeListFile(path) as f:
+        yield from f.chunks(chunk_edges)
+
+
+def read_edge_list(path):
+    """
+    Reads a whole edge-list file into columns.
+    :param path: a text or binary edge-list file
+    :returns: (V, tails, heads, weights); weights is None for unweighted files
+    """
+    with _EdgeListFile(path) as f:
+        tails, heads = array('i'), array('i')
+        weights = array('d') if f.weighted else None
+        for t, h, w in f.chunks():
+            tails.extend(t)
+            heads.extend(h)
+            if weights is not None:
+                weights.extend(w)
+        return f.V, tails, heads, weights
+
+
+def edge_list_header(path):
+    """
+    :param path: a text or binary edge-list file
+    :returns: (V, E, weighted) without reading the edges of a binary file
+    """
+    with _EdgeListFile(path) as f:
+        return f.V, f.E, f.weighted
+
+
+def read_edge_range(path, lo, hi):
+    """
+    Reads the edges lo (inclusive) to hi (exclusive) of a binary edge list
+    without touching the rest of the file, so that workers can each read
+    their own shard.
+    :param path: a binary edge-list file
+    :returns: (tails, heads, weights); weights is None for unweighted files
+    :raises EdgeListFormatError: if the file is a text edge list
+    """
+    with _EdgeListFile(path) as f:
+        if not f.binary:
+            raise EdgeListFormatError(f'{path} is not a binary edge list')
+        return f.edge_range(lo, hi)
+
+
+def write_binary(path, v, tails, heads, weights=None):
+    """
+    Writes edge columns in the binary edge-list format.
+    :param path: the output file
+    :param v: the number of vertices
+    :param tails: sequence of edge tails
+    :param heads: sequence of edge heads
+    :param weights: sequence of edge weights, or None for an unweighted list
+    """
+    n = len(tails)
+    if len(heads) != n or (weights is not None and len(weights) != n):
+        raise ValueError('edge arrays must have the same length')
+    flags = WEIGHTED if weights is not None else 0
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, flags, v, n))
+        columns = [array('i', tails), array('i', heads)]
+        if weights is not None:
+            columns.append(array('d', weights))
+        for column in columns:
+            _le(column).tofile(f)
+
+
+def convert_to_binary(text_path, binary_path, chunk_edges=_CHUNK_EDGES):
+    """
+    Converts a text edge list to the binary format without loading it whole.
+    The columns are streamed to the output one at a time.
+    """
+    with _EdgeListFile(text_path) as f, open(binary_path, 'wb') as out:
+        out.write(_HEADER.pack(MAGIC, VERSION, WEIGHTED if f.weighted else 0, f.V, f.E))
+        for column in range(3 if f.weighted else 2):
+            for block in f.chunks(chunk_edges):
+                _le(block[column]).tofile(out)
+
+
+def _stream_csr(path, symmetric, chunk_edges):
+    """
+    Builds CSR arrays from an edge-list file in two streaming passes.
+    The first pass counts degrees, the second places each edge.
+    """
+    with _EdgeListFile(path) as f:
+        v = f.V
+        offsets = array('q', bytes(8 * (v + 1)))
+        for tails, heads, _ in f.chunks(chunk_edges):
+            for column in ((tails, heads) if symmetric else (tails,)):
+                for t in column:
+                    if t < 0 or t >= v:
+                        raise ValueError(f'vertex {t} is not between 0 and {v - 1}')
+                    offsets[t + 1] += 1
+            if not symmetric:
+                for h in heads:
+                    if h < 0 or h >= v:
+                        raise ValueError(f'vertex {h} is not between 0 and {v - 1}')
+        for i in range(v):
+            offsets[i + 1] += offsets[i]
+        m = offsets[v]
+        targets = array('i', bytes(4 * m))
+        weights = array('d', bytes(8 * m)) if f.weighted else None
+        cursor = offsets[:-1]
+        for tails, heads, w in f.chunks(chunk_edges):
+            for i in range(len(tails)):
+                a, b = tails[i], heads[i]
+                p = cursor[a]
+                targets[p] = b
+                cursor[a] = p + 1
+                if weights is not None:
+                    weights[p] = w[i]
+                if symmetric:
+                    p = cursor[b]
+                    targets[p] = a
+                    cursor[b] = p + 1
+                    if weights is not None:
+                        weights[p] = w[i]
+        return v, offsets, targets, weights
+
+
+def _require_weighted(weighted, path):
+    if not weighted:
+        raise EdgeListFormatError(f'{path} has no edge weights')
+
+
+def load_graph(path, frozen=False, chunk_edges=_CHUNK_EDGES):
+    """
+    Loads an undirected graph; frozen=True returns a CSRGraph.
+    """
+    if frozen:
+        v, offsets, targets, _ = _stream_csr(path, True, chunk_edges)
+        return CSRGraph(v, offsets, targets)
+    with _EdgeListFile(path) as f:
+        g = Graph(f.V)
+        for tails, heads, _ in f.chunks(chunk_edges):
+            for i in range(len(tails)):
+                g.add_edge(tails[i], heads[i])
+        return g
+
+
+def load_digraph(path, frozen=False, chunk_edges=_CHUNK_EDGES):
+    """
+    Loads a digraph; frozen=True returns a CSRDigraph.
+    """
+    if frozen:
+        v, offsets, targets, _ = _stream_csr(path, False, chunk_edges)
+        return CSRDigraph(v, offsets, targets)
+    with _EdgeListFile(path) as f:
+        g = Digraph(f.V)
+        for tails, heads, _ in f.chunks(chunk_edges):
+            for i in range(len(tails)):
+                g.add_edge(tails[i], heads[i])
+        return g
+
+
+def load_edge_weighted_digraph(path, frozen=False, chunk_edges=_CHUNK_EDGES):
+    """
+    Loads an edge-weighted digraph; frozen=True returns a CSREdgeWeightedDigraph.
+    """
+    if frozen:
+        v, offsets, targets, weights = _stream_csr(path, False, chunk_edges)
+        _require_weighted(weights is not None, path)
+        return CSREdgeWeightedDigraph(v, offsets, targets, weights)
+    with _EdgeListFile(path) as f:
+        _require_weighted(f.weighted, path)
+        g = EdgeWeightedDigraph(f.V)
+        for tails, heads, weights in f.chunks(chunk_edges):
+            for i in range(len(tails)):
+                g.add_edge(DirectedEdge(tails[i], heads[i], weights[i]))
+        return g
+
+
+def load_edge_weighted_graph(path, frozen=False, chunk_edges=_CHUNK_EDGES):
+    """
+    Loads an edge-weighted graph; frozen=True returns a CSREdgeWeightedGraph.
+    """
+    if frozen:
+        v, offsets, targets, weights = _stream_csr(path, True, chunk_edges)
+        _require_weighted(weights is not None, path)
+        return CSREdgeWeightedGraph(v, offsets, targets, weights)
+    with _EdgeListFile(path) as f:
+        _require_weighted(f.weighted, path)
+        g = EdgeWeightedGraph(f.V)
+        for tails, heads, weights in f.chunks(chunk_edges):
+            for i in range(len(tails)):
+                g.add_edge(Edge(tails[i], heads[i], weights[i]))
+        return g
+
+
+def load_flow_network(path, chunk_edges=_CHUNK_EDGES):
+    """
+    Loads a flow network; the third column is the edge capacity.
+    """
+    with _EdgeListFile(path) as f:
+        _require_weighted(f.weighted, path)
+        g = FlowNetwork(f.V)
+        for tails, heads, capacities in f.chunks(chunk_edges):
+            for i in range(len(tails)):
+                g.add_edge(FlowEdge(tails[i], heads[i], capacities[i]))
+        return g
+
+
+def main():
+    g = load_edge_weighted_digraph('../resources/tinyEWD.txt')
+    print(g)
+    csr = load_edge_weighted_digraph('../resources/tinyEWD.txt', frozen=True)
+    print(csr)
+    v, tails, heads, weights = read_edge_list('../resources/tinyEWD.txt')
+    print(f'{v} vertices, {len(tails)} edges')
+    print(list(zip(tails, heads, weights)))
+    print(load_flow_network('../resources/tinyFN.txt'))
+
+
+if __name__ == '__main__':
+    main()
@@ -27,7 +27,9 @@ The EdgeWeightedDigraph class represents a edge-weighted
  *  Theta(E + V) time.
 """
 
+from array import array
 from graphs.bag import Bag
+from graphs.csr_graph import CSREdgeWeightedDigraph
 from graphs.directed_edge import DirectedEdge
 from collections import defaultdict
 import random
@@ -108,6 +110,17 @@ class EdgeWeightedDigraph:
         self._validate_vertex(v)
         return self.adj[v]
 
+    def adj_items(self, v):
+        """
+        Returns the edges incident from the vertex {v} instead of Bag nodes.
+        CSREdgeWeightedDigraph has the same method, so clients written
+        against it accept both.
+        :param v: v the vertex
+        :returns: the DirectedEdge objects incident from vertex {v}
+        """
+        self._validate_vertex(v)
+        return (node.item for node in self.adj[v])
+
     def get_indegree(self):
         return self._indegree
 
@@ -129,6 +142,31 @@ class EdgeWeightedDigraph:
                 adj_list.add(e)
         return adj_list
 
+    def reverse(self):
+        """
+        :returns: the reverse of this edge-weighted digraph, in which
+                  each edge v->w of weight x becomes w->v of weight x
+        """
+        reverse = EdgeWeightedDigraph(self.get_V())
+        for v in range(self.get_V()):
+            for e in self.adj_items(v):
+                reverse.add_edge(DirectedEdge(e.head(), e.tail(), e.weight()))
+        return reverse
+
+    def freeze(self):
+        """
+        Returns an immutable compressed sparse row copy of this digraph.
+        The adjacency of each vertex keeps its Bag iteration order.
+        :returns: a CSREdgeWeightedDigraph
+        """
+        offsets, targets, weights = array('q', [0]), array('i'), array('d')
+        for v in range(self.get_V()):
+            for node in self.adj[v]:
+                targets.append(node.item.head())
+                weights.append(node.item.weight())
+            offsets.append(len(targets))
+        return CSREdgeWeightedDigraph(self.get_V(), offsets, targets, weights)
+
     def __repr__(self):
         return f'<{self.__class__.__name__}(' \
                f'V={self.get_V()}, ' \
@@ -26,8 +26,10 @@ The EdgeWeightedGraph class represents an edge-weighted
  *  E edges and V vertices takes
  *  Theta(E + V) time.
 """
+from array import array
 from graphs.edge import Edge
 from graphs.bag import Bag
+from graphs.csr_graph import CSREdgeWeightedGraph
 from collections import defaultdict
 
 
@@ -46,6 +48,17 @@ class EdgeWeightedGraph:
         self.__validate_vertex(v)
         return self.adj[v]
 
+    def adj_items(self, v):
+        """
+        Returns the edges incident to the vertex {v} instead of Bag nodes.
+        CSREdgeWeightedGraph has the same method, so clients written
+        against it accept both.
+        :param v: v the vertex
+        :returns: the Edge objects incident to vertex {v}
+        """
+        self.__validate_vertex(v)
+        return (node.item for node in self.adj[v])
+
     # outdegree i.e. size of Bag (LL of Nodes)
     def degree(self, v):
         self.__validate_vertex(v)
@@ -80,6 +93,20 @@ class EdgeWeightedGraph:
                     self_loops += 1
         return adj_list
 
+    def freeze(self):
+        """
+        Returns an immutable compressed sparse row copy of this graph.
+        The adjacency of each vertex keeps its Bag iteration order.
+        :returns: a CSREdgeWeightedGraph
+        """
+        offsets, targets, weights = array('q', [0]), array('i'), array('d')
+        for v in range(self.get_V()):
+            for node in self.adj[v]:
+                targets.append(node.item.other(v))
+                weights.append(node.item.weight())
+            offsets.append(len(targets))
+        return CSREdgeWeightedGraph(self.get_V(), offsets, targets, weights)
+
     def __validate_vertex(self, v):
         if v < 0 or v >= self.V:
             raise ValueError(f'vertex {v} is not between 0 and {self.V - 1}')
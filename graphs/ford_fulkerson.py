@@ -22,7 +22,7 @@ import math
 from queue import Queue
 
 from graphs.flow_edge import FlowEdge
-from graphs.flow_network import FlowNetwork
+from graphs.edge_list_loader import load_flow_network
 
 
 class FordFulkerson:
@@ -157,35 +157,25 @@ class FordFulkerson:
 
 
 def main():
-    with open("../resources/tinyFN.txt", ) as f:
-        values = "".join(f.readlines()).splitlines()
-        print(values)
-        V, E = int(values[0]), int(values[1])
-        s, t = 0, V - 1
-        g = FlowNetwork(V, E)
-
-        for line in values[2:]:
-            vertices = line.split(' ')
-            v, w, capacity = int(vertices[0]), int(vertices[1]), float(vertices[2])
-            e = FlowEdge(v, w, capacity)
-            g.add_edge(e)
-        print(g)
-
-        # compute maximum flow and minimum cut
-        max_flow = FordFulkerson(g, s, t)
-        print(max_flow)
-        print(f'max flow from {s} to {t}')
-        for v in range(g.get_V()):
-            for e in g.adj(v):
-                if v == e.item.tail() and e.item.flow() > 0:
-                    print(f'     {e}')
-
-        print('min cut: ')
-        for v in range(g.get_V()):
-            if max_flow.in_cut(v):
-                print(f'{v}  ')
-        print()
-        print(f'max flow value = {max_flow.value()}')
+    g = load_flow_network("../resources/tinyFN.txt")
+    s, t = 0, g.get_V() - 1
+    print(g)
+
+    # compute maximum flow and minimum cut
+    max_flow = FordFulkerson(g, s, t)
+    print(max_flow)
+    print(f'max flow from {s} to {t}')
+    for v in range(g.get_V()):
+        for e in g.adj(v):
+            if v == e.item.tail() and e.item.flow() > 0:
+                print(f'     {e}')
+
+    print('min cut: ')
+    for v in range(g.get_V()):
+        if max_flow.in_cut(v):
+            print(f'{v}  ')
+    print()
+    print(f'max flow value = {max_flow.value()}')
 
 
 
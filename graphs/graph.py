@@ -2,8 +2,10 @@
 # uses an adjacency list representation 
 # Uses Theta(E + V) space
 # All instance methods take Theta(1) time 
+from array import array
 from collections import defaultdict, deque
 from graphs.bag import Bag
+from graphs.csr_graph import CSRGraph
 
 
 class Graph:
@@ -59,11 +61,34 @@ class Graph:
         self._validate_vertex(v)
         return self.adj[v]
 
+    def adj_items(self, v):
+        """
+        Returns the vertices adjacent to the vertex {v} as ints instead of Bag nodes.
+        CSRGraph has the same method, so clients written against it accept both.
+        :param v: v the vertex
+        :returns: the vertices adjacent to vertex {v}
+        """
+        self._validate_vertex(v)
+        return (node.item for node in self.adj[v])
+
     def degree(self, v):
         self._validate_vertex(v)
         return self.adj[v].size()
         # return len(self.adj[v])
 
+    def freeze(self):
+        """
+        Returns an immutable compressed sparse row copy of this graph.
+        The adjacency of each vertex keeps its Bag iteration order.
+        :returns: a CSRGraph
+        """
+        offsets, targets = array('q', [0]), array('i')
+        for v in range(self.get_V()):
+            for node in self.adj[v]:
+                targets.append(node.item)
+            offsets.append(len(targets))
+        return CSRGraph(self.get_V(), offsets, targets)
+
     def __repr__(self):
         return f"<Graph(V={self.V}, adj={self.adj})>"
 
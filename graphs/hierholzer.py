@@ -0,0 +1,281 @@
+"""
+hierholzer.py
+Find an Eulerian cycle or path in a graph or digraph, if one exists.
+The Hierholzer class is the engine behind EulerianCycle, EulerianPath,
+ *  DirectedEulerianCycle and DirectedEulerianPath.
+ *  An Eulerian cycle (path) uses every edge exactly once and ends
+ *  (need not end) where it starts.
+ *
+ *  This implementation uses Hierholzer's algorithm over the CSR arrays of
+ *  the frozen graph: a stack of vertices and one adjacency cursor per
+ *  vertex, with no per-vertex iterator or per-edge object. In an
+ *  undirected graph each edge gets an id and the two adjacency entries
+ *  of an edge are matched through those ids, so a used-edge bitmap
+ *  (one bit per edge) lets the other endpoint skip an edge already taken.
+ *  The degree conditions are checked up front in Theta(V) time; instead
+ *  of a separate connectivity search, the walk itself tells whether the
+ *  non-isolated vertices are connected, since it uses every edge iff
+ *  they are.
+ *
+ *  A vertex is output when its edges are exhausted, which produces the
+ *  tour backwards. In a digraph the walk is therefore run on the reverse
+ *  digraph from the last vertex of the tour, so tour() streams the
+ *  vertices in order without collecting them into a list of objects; the
+ *  only state is the array('i') stack of vertices whose edges are not yet
+ *  exhausted, 4 bytes per vertex, which can still reach E + 1 entries
+ *  (on a de Bruijn graph the first closed walk already covers almost
+ *  every edge).
+ *  The constructor takes Theta(E + V) time and a walk takes Theta(E + V)
+ *  time; the engine uses 8 bytes per vertex plus 8 bytes per edge in a
+ *  digraph (the reverse) and 16 bytes per edge in a graph.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+from graphs.csr_graph import CSRDigraph, CSRGraph
+
+
+class Hierholzer:
+
+    def __init__(self, g, path=False):
+        """
+        :param g: the graph or digraph (Bag-based or CSR)
+        :param path: True to look for an Eulerian path, False for a cycle
+        """
+        if not isinstance(g, (CSRGraph, CSRDigraph)):
+            g = g.freeze()
+        self._g = g
+        self._directed = isinstance(g, CSRDigraph)
+        self._path = path
+        self._V, self._E = g.get_V(), g.get_E()
+        if self._directed:
+            self._start, self._end = self.__directed_endpoints()
+        else:
+            self._start, self._end = self.__undirected_endpoints()
+
+    def __first_non_isolated(self):
+        offsets = self._g.offsets
+        for v in range(self._V):
+            if offsets[v + 1] > offsets[v]:
+                return v
+        # a graph with no edges has the degenerate Eulerian path (0)
+        return 0 if self._path and self._V > 0 else -1
+
+    def __directed_endpoints(self):
+        offsets = self._g.offsets
+        balance = array('i', bytes(4 * self._V))  # outdegree - indegree
+        for v in range(self._V):
+            balance[v] = offsets[v + 1] - offsets[v]
+        for w in self._g.targets:
+            balance[w] -= 1
+        if not self._path:
+            if self._E == 0 or any(balance):
+                return -1, -1
+            s = self.__first_non_isolated()
+            return s, s
+        start = end = -1
+        for v in range(self._V):
+            if balance[v] == 0:
+                continue
+            if balance[v] == 1 and start == -1:
+                start = v
+            elif balance[v] == -1 and end == -1:
+                end = v
+            else:
+                return -1, -1
+        if start == -1:
+            s = self.__first_non_isolated()
+            return s, s
+        return start, end
+
+    def __undirected_endpoints(self):
+        offsets = self._g.offsets
+        odd = [v for v in range(self._V) if (offsets[v + 1] - offsets[v]) % 2 != 0]
+        if not self._path:
+            if self._E == 0 or odd:
+                return -1, -1
+        elif len(odd) > 2:
+            return -1, -1
+        if odd:
+            return odd[0], odd[1]
+        s = self.__first_non_isolated()
+        return s, s
+
+    def __incidence(self):
+        """
+        Numbers the edges of the undirected graph.
+        :returns: the arrays of edge endpoints and, for every adjacency
+                  entry, the id of its edge
+        """
+        offsets, targets = self._g.offsets, self._g.targets
+        ends_a, ends_b = array('i'), array('i')
+        for v in range(self._V):
+            self_loops = 0
+            for i in range(offsets[v], offsets[v + 1]):
+                w = targets[i]
+                # a self loop appears twice in the adjacency of v
+                if v < w or (v == w and self_loops % 2 == 0):
+                    ends_a.append(v)
+                    ends_b.append(w)
+                if v == w:
+                    self_loops += 1
+        cursor = offsets[:-1]
+        incident = array('i', bytes(4 * len(targets)))
+        for e in range(len(ends_a)):
+            for x in (ends_a[e], ends_b[e]):
+                incident[cursor[x]] = e
+                cursor[x] += 1
+        return ends_a, ends_b, incident
+
+    def __walk_directed(self):
+        g = self._g.reverse()
+        offsets, targets = g.offsets, g.targets
+        cursor = offsets[:-1]
+        stack = array('i', [self._end])
+        while stack:
+            v = stack[-1]
+            i = cursor[v]
+            if i < offsets[v + 1]:
+                cursor[v] = i + 1
+                stack.append(targets[i])
+            else:
+                stack.pop()
+                yield v
+
+    def __walk_undirected(self):
+        offsets = self._g.offsets
+        ends_a, ends_b, incident = self.__incidence()
+        used = bytearray((len(ends_a) + 7) >> 3)
+        cursor = offsets[:-1]
+        stack = array('i', [self._start])
+        while stack:
+            v = stack[-1]
+            i, hi = cursor[v], offsets[v + 1]
+            while i < hi and used[incident[i] >> 3] >> (incident[i] & 7) & 1:
+                i += 1
+            if i < hi:
+                e = incident[i]
+                used[e >> 3] |= 1 << (e & 7)
+                cursor[v] = i + 1
+                stack.append(ends_a[e] ^ ends_b[e] ^ v)
+            else:
+                cursor[v] = i
+                stack.pop()
+                yield v
+
+    def __walk(self):
+        return self.__walk_directed() if self._directed else self.__walk_undirected()
+
+    def has_candidate(self):
+        """
+        :returns: True if the degrees allow an Eulerian cycle (path); the
+                  graph must also be connected, ignoring isolated vertices
+        """
+        return self._start >= 0
+
+    def tour(self):
+        """
+        Streams the vertices of the Eulerian cycle (path) in order.
+        :raises ValueError: if the degrees rule it out (before anything is
+                yielded) or, after the walk, if the edges are not connected
+        """
+        if not self.has_candidate():
+            raise ValueError(f'degrees rule out an Eulerian {"path" if self._path else "cycle"}')
+        n = 0
+        for v in self.__walk():
+            n += 1
+            yield v
+        if n != self._E + 1:
+            raise ValueError(f'edges are not connected: the walk used {n - 1} of {self._E}')
+
+    def vertices(self):
+        """
+        :returns: an array of the vertices of the Eulerian cycle (path),
+                  or None if there is none
+        """
+        if not self.has_candidate():
+            return None
+        vertices = array('i', self.__walk())
+        return vertices if len(vertices) == self._E + 1 else None
+
+    def check(self, vertices):
+        """
+        :returns: True if {vertices} uses every edge exactly once
+        """
+        if vertices is None:
+            return True
+        if len(vertices) != self._E + 1 or (not self._path and vertices[0] != vertices[-1]):
+            return False
+        offsets = self._g.offsets
+        # a copy of the adjacency with every list sorted, so the copies of
+        # an edge v->w are one run, and taken[i] counts the uses of the run
+        # that starts at i: two flat arrays instead of an object per edge
+        adjacent = array('i', self._g.targets)
+        for v in range(self._V):
+            lo, hi = offsets[v], offsets[v + 1]
+            if hi - lo > 1:
+                adjacent[lo:hi] = array('i', sorted(adjacent[lo:hi]))
+        taken = array('i', bytes(4 * len(adjacent)))
+        for i in range(1, len(vertices)):
+            v, w, step = vertices[i - 1], vertices[i], 1
+            if not self._directed:
+                # an undirected edge is counted in the list of its smaller end
+                if v > w:
+                    v, w = w, v
+                elif v == w:
+                    step = 2  # a self-loop appears twice in the list of v
+            lo, hi = offsets[v], offsets[v + 1]
+            first = bisect_left(adjacent, w, lo, hi)
+            if first == hi or adjacent[first] != w:
+                return False
+            taken[first] += step
+            if taken[first] > bisect_right(adjacent, w, first, hi) - first:
+                return False
+        # E steps and no run used more often than it has copies: every edge once
+        return True
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'g={self._g}, ' \
+               f'path={self._path}, ' \
+               f'start={self._start})>'
+
+
+def de_bruijn_graph(k, sigma=4):
+    """
+    Builds the de Bruijn digraph of order k over an alphabet of size sigma:
+    one vertex per (k - 1)-mer and one edge per k-mer, v->w when the last
+    k - 2 symbols of v are the first k - 2 of w.
+    """
+    v = sigma ** (k - 1)
+    offsets = array('q', range(0, v * sigma + 1, sigma))
+    targets = array('i', bytes(4 * v * sigma))
+    for x in range(v):
+        base = x * sigma % v
+        for c in range(sigma):
+            targets[x * sigma + c] = base + c
+    return CSRDigraph(v, offsets, targets)
+
+
+def de_bruijn_sequence(k, sigma=4):
+    """
+    Streams a de Bruijn sequence of order k: every k-mer over the alphabet
+    occurs exactly once as a (cyclic) substring of the sigma ** k symbols.
+    """
+    tour = Hierholzer(de_bruijn_graph(k, sigma)).tour()
+    next(tour)
+    for w in tour:
+        yield w % sigma
+
+
+def main():
+    print(''.join(map(str, de_bruijn_sequence(4, 2))))
+    print(''.join('ACGT'[c] for c in de_bruijn_sequence(3)))
+    import time
+    start = time.perf_counter()
+    n = sum(1 for _ in de_bruijn_sequence(11))
+    print(f'{n} symbols of an order-11 DNA de Bruijn sequence streamed in {time.perf_counter() - start:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+hopcroft_karp.py
+ *  Find a maximum cardinality matching (and minimum cardinality vertex cover)
+ *  in a bipartite graph using the Hopcroft-Karp algorithm.
+ *  The HopcroftKarp class represents a data type for computing a
+ *  maximum (cardinality) matching and a
+ *  minimum (cardinality) vertex cover in a bipartite graph.
+ *  It has the API of BipartiteMatching.
+ *
+ *  This implementation uses the Hopcroft-Karp algorithm: each phase runs
+ *  a breadth-first search from all unmatched vertices on one side that
+ *  stops at the first layer with an unmatched vertex on the other side,
+ *  then augments along a maximal set of vertex-disjoint shortest
+ *  alternating paths with an iterative depth-first search that never
+ *  looks at an edge twice in a phase. There are O(sqrt(V)) phases, so the
+ *  constructor takes O(E sqrt(V)) time.
+ *
+ *  The constructor can start from a previous matching, e.g. get_mate() of
+ *  a HopcroftKarp computed before a batch of edge insertions or deletions.
+ *  Pairs whose edge is gone are dropped, so only the disturbed vertices
+ *  start out unmatched, and the number of phases is at most one more than
+ *  the number of augmentations still needed instead of O(sqrt(V)).
+ *  The bipartition is a breadth-first 2-coloring of the CSR arrays.
+ *  It uses Theta(V) extra space (not including the graph, which is
+ *  frozen to CSR form if it is not already).
+"""
+import random
+import time
+from array import array
+from collections import deque
+
+from graphs.bipartite_matching import bipartite_generator
+from graphs.csr_graph import CSRGraph
+
+
+class HopcroftKarp:
+
+    UNMATCHED = -1
+    _INFINITY = 2 ** 31 - 1
+
+    def __init__(self, g, mate=None):
+        """
+        :param g: the bipartite graph (Bag-based or CSR)
+        :param mate: a previous matching, mate[v] = the vertex matched to v
+                     or UNMATCHED; pairs that are not edges of g are ignored
+        """
+        if not isinstance(g, CSRGraph):
+            g = g.freeze()
+        self._offsets, self._targets = g.offsets, g.targets
+        self._V = g.get_V()
+        self._color = self.__two_color()
+        # the vertices of color 1 are the ones the searches start from
+        self._left = [v for v in range(self._V) if self._color[v]]
+        self._mate = array('i', [self.UNMATCHED]) * self._V
+        self._cardinality = 0
+        if mate is not None:
+            self.__warm_start(mate)
+        self._phases = 0
+        self._dist = array('i', [self._INFINITY]) * self._V
+        while self.__has_augmenting_path():
+            self._phases += 1
+            self.__augment_all()
+        self._dist = None
+        self._in_min_vertex_cover = self.__min_vertex_cover()
+
+        assert self.__check()
+
+    def __two_color(self):
+        offsets, targets = self._offsets, self._targets
+        color, marked = bytearray(self._V), bytearray(self._V)
+        for s in range(self._V):
+            if marked[s]:
+                continue
+            marked[s], color[s] = 1, 1
+            queue = deque([s])
+            while queue:
+                v = queue.popleft()
+                for i in range(offsets[v], offsets[v + 1]):
+                    w = targets[i]
+                    if not marked[w]:
+                        marked[w], color[w] = 1, color[v] ^ 1
+                        queue.append(w)
+                    elif color[w] == color[v]:
+                        raise AttributeError('graph is not bipartite')
+        return color
+
+    def __is_edge(self, v, w):
+        offsets, targets = self._offsets, self._targets
+        return any(targets[i] == w for i in range(offsets[v], offsets[v + 1]))
+
+    def __warm_start(self, mate):
+        for v in self._left:
+            w = mate[v] if v < len(mate) else self.UNMATCHED
+            if w == self.UNMATCHED or not 0 <= w < self._V or w >= len(mate) or mate[w] != v:
+                continue
+            if self._mate[w] == self.UNMATCHED and self.__is_edge(v, w):
+                self._mate[v], self._mate[w] = w, v
+                self._cardinality += 1
+
+    def __has_augmenting_path(self):
+        """
+        Layers the unmatched left vertices and the left vertices reachable
+        from them by alternating paths, up to the first layer that reaches
+        an unmatched right vertex.
+        """
+        offsets, targets, mate, dist = self._offsets, self._targets, self._mate, self._dist
+        queue = deque()
+        for v in self._left:
+            if mate[v] == self.UNMATCHED:
+                dist[v] = 0
+                queue.append(v)
+            else:
+                dist[v] = self._INFINITY
+        self._free_dist = self._INFINITY  # layer of the first unmatched right vertex
+        while queue:
+            v = queue.popleft()
+            if dist[v] >= self._free_dist:
+                continue
+            for i in range(offsets[v], offsets[v + 1]):
+                x = mate[targets[i]]
+                if x == self.UNMATCHED:
+                    if self._free_dist == self._INFINITY:
+                        self._free_dist = dist[v] + 1
+                elif dist[x] == self._INFINITY:
+                    dist[x] = dist[v] + 1
+                    queue.append(x)
+        return self._free_dist != self._INFINITY
+
+    def __augment_all(self):
+        offsets, targets, mate, dist = self._offsets, self._targets, self._mate, self._dist
+        current = array('q', offsets[:-1])  # current[v] = next edge of v to try
+        for root in self._left:
+            if mate[root] != self.UNMATCHED:
+                continue
+            # iterative depth-first search along the layers
+            stack, chosen = [root], list()
+            while stack:
+                v = stack[-1]
+                i, end = current[v], offsets[v + 1]
+                advanced = False
+                while i < end:
+                    w = targets[i]
+                    i += 1
+                    x = mate[w]
+                    if x == self.UNMATCHED:
+                        if dist[v] + 1 == self._free_dist:
+                            chosen.append(w)
+                            for u, y in zip(stack, chosen):
+                                mate[u], mate[y] = y, u
+                            self._cardinality += 1
+                            stack = None
+                            break
+                    elif dist[x] == dist[v] + 1:
+                        current[v] = i
+                        chosen.append(w)
+                        stack.append(x)
+                        advanced = True
+                        break
+                if stack is None:
+                    break
+                if not advanced:
+                    # dead end for the rest of this phase
+                    current[v] = end
+                    dist[v] = self._INFINITY
+                    stack.pop()
+                    if chosen:
+                        chosen.pop()
+
+    def __min_vertex_cover(self):
+        """
+        Konig's theorem: with L the left vertices reachable from unmatched
+        left vertices by alternating paths and R the right vertices they
+        reach, (left - L) + R is a minimum vertex cover.
+        """
+        offsets, targets, mate = self._offsets, self._targets, self._mate
+        marked = bytearray(self._V)
+        queue = deque()
+        for v in self._left:
+            if mate[v] == self.UNMATCHED:
+                marked[v] = 1
+                queue.append(v)
+        while queue:
+            v = queue.popleft()
+            for i in range(offsets[v], offsets[v + 1]):
+                w = targets[i]
+                if not marked[w] and mate[v] != w:
+                    marked[w] = 1
+                    x = mate[w]
+                    if x != self.UNMATCHED and not marked[x]:
+                        marked[x] = 1
+                        queue.append(x)
+        return [self._color[v] != marked[v] for v in range(self._V)]
+
+    def is_matched(self, v):
+        self.__validate(v)
+        return self._mate[v] != self.UNMATCHED
+
+    def mate(self, v):
+        self.__validate(v)
+        return self._mate[v]
+
+    def get_mate(self):
+        """
+        :returns: a copy of the matching, for warm-starting another HopcroftKarp
+        """
+        return list(self._mate)
+
+    def size(self):
+        return self._cardinality
+
+    def is_perfect(self):
+        return self._cardinality * 2 == self._V
+
+    def phases(self):
+        """
+        :returns: the number of augmenting phases the constructor ran
+        """
+        return self._phases
+
+    def in_min_vertex_cover(self, v):
+        self.__validate(v)
+        return self._in_min_vertex_cover[v]
+
+    def __validate(self, v):
+        if v < 0 or v >= self._V:
+            raise AttributeError(f'vertex {v} is not between 0 and {self._V - 1}')
+
+    def __check(self):
+        # the matching is consistent and as large as the vertex cover
+        matched = 0
+        for v in range(self._V):
+            w = self._mate[v]
+            if w != self.UNMATCHED:
+                if self._mate[w] != v:
+                    print(f'mate[{v}] = {w} but mate[{w}] = {self._mate[w]}')
+                    return False
+                matched += 1
+        if matched != 2 * self._cardinality:
+            print(f'{matched} matched vertices but cardinality {self._cardinality}')
+            return False
+        if sum(self._in_min_vertex_cover) != self._cardinality:
+            print('vertex cover and matching have different sizes')
+            return False
+        for v in range(self._V):
+            for i in range(self._offsets[v], self._offsets[v + 1]):
+                w = self._targets[i]
+                if not self._in_min_vertex_cover[v] and not self._in_min_vertex_cover[w]:
+                    print(f'edge {v}-{w} not covered')
+                    return False
+        return True
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'V={self._V}, ' \
+               f'size={self._cardinality}, ' \
+               f'phases={self._phases})>'
+
+
+def main():
+    g = bipartite_generator(10, 10, .5)
+    matching = HopcroftKarp(g)
+    print(f'number of edges in max matching:  {matching.size()}')
+    print('max matching: ')
+    for v in range(g.get_V()):
+        w = matching.mate(v)
+        if matching.is_matched(v) and v < w:  # print each edge only once
+            print(f'{v}-{w}  ')
+    print('min vertex cover:  ')
+    print(' '.join(str(v) for v in range(g.get_V()) if matching.in_min_vertex_cover(v)))
+
+    # re-match after deleting a batch of edges, cold and warm
+    n, degree = 50000, 10
+    rnd = random.Random(3)
+    edges = [(v, n + rnd.randrange(n)) for v in range(n) for _ in range(degree)]
+    g = CSRGraph.from_edges(2 * n, [e[0] for e in edges], [e[1] for e in edges])
+    before = HopcroftKarp(g)
+    kept = [e for e in edges if rnd.random() > 0.001]
+    g = CSRGraph.from_edges(2 * n, [e[0] for e in kept], [e[1] for e in kept])
+    for name, mate in (('cold', None), ('warm', before.get_mate())):
+        start = time.perf_counter()
+        after = HopcroftKarp(g, mate)
+        print(f'{name}: size {after.size()} after deleting {len(edges) - len(kept)} edges, '
+              f'{after.phases()} phases, {time.perf_counter() - start:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
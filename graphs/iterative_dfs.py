@@ -0,0 +1,235 @@
+"""
+iterative_dfs.py
+Depth-first search with an explicit stack.
+The IterativeDFS class runs depth-first search on a graph, digraph,
+ *  edge-weighted graph or edge-weighted digraph without recursion, and
+ *  reports the search to its client through optional hooks:
+ *
+ *    pre(v)              v is marked (preorder)
+ *    tree_edge(v, w)     v-w leads to the unmarked vertex w, before pre(w)
+ *    non_tree_edge(v, w) v-w leads to the already marked vertex w
+ *    post(v)             every edge from v has been followed (postorder)
+ *
+ *  A hook that returns True stops the search. The hooks are called in
+ *  the same order as in the recursive DepthFirstSearch, so clients built
+ *  on this engine visit vertices and edges in the same order as before;
+ *  they just no longer hit the recursion limit on long paths.
+ *
+ *  A Bag-based graph is frozen to CSR form once (freeze() keeps the
+ *  adjacency order); a CSR graph is used as is. The stack holds a vertex
+ *  and a position in its adjacency in an array('i') and an array('q'),
+ *  so a path of 10^7 vertices takes 12 bytes per vertex of stack.
+ *  Marks live in a bytearray that is shared by all searches of an engine,
+ *  so searches from several sources continue where the last one stopped.
+ *  Each search takes time proportional to the number of vertices it
+ *  marks plus the number of edges leaving them.
+"""
+import random
+import sys
+import time
+from array import array
+
+from graphs.csr_graph import CSRDigraph, CSRGraph, CSREdgeWeightedGraph
+from graphs.digraph import Digraph
+
+
+class IterativeDFS:
+
+    def __init__(self, g, parents=False):
+        """
+        :param g: the graph (Bag-based or CSR)
+        :param parents: record the tree edge into every marked vertex
+        """
+        if not isinstance(g, (CSRGraph, CSRDigraph, CSREdgeWeightedGraph)):
+            g = g.freeze()
+        self._V = g.get_V()
+        self._offsets, self._targets = g.offsets, g.targets
+        self._marked = bytearray(self._V)
+        self._count = 0
+        self._edge_to = array('i', [-1]) * self._V if parents else None
+        self._stopped = False
+
+    def get_V(self):
+        return self._V
+
+    def get_marked(self):
+        return self._marked
+
+    def get_edge_to(self):
+        return self._edge_to
+
+    def marked(self, v):
+        self._validate_vertex(v)
+        return self._marked[v] == 1
+
+    def count(self):
+        """
+        :returns: the number of vertices marked so far
+        """
+        return self._count
+
+    def stopped(self):
+        """
+        :returns: True if a hook has stopped the search
+        """
+        return self._stopped
+
+    def _validate_vertex(self, v):
+        if v < 0 or v >= self._V:
+            raise AttributeError(f'vertex {v} is not between 0 and {self._V - 1}')
+
+    def search(self, s, pre=None, post=None, tree_edge=None, non_tree_edge=None):
+        """
+        Runs depth-first search from {s} unless {s} is already marked.
+        :returns: False if a hook stopped the search, True otherwise
+        """
+        self._validate_vertex(s)
+        if self._stopped:
+            return False
+        if self._marked[s]:
+            return True
+        offsets, targets, marked, edge_to = self._offsets, self._targets, self._marked, self._edge_to
+        marked[s] = 1
+        self._count += 1
+        if pre is not None and pre(s):
+            return self.__stop()
+        vertices, positions = array('i', [s]), array('q', [offsets[s]])
+        while vertices:
+            v = vertices[-1]
+            i, end = positions[-1], offsets[v + 1]
+            while i < end:
+                w = targets[i]
+                i += 1
+                if not marked[w]:
+                    positions[-1] = i
+                    if edge_to is not None:
+                        edge_to[w] = v
+                    if tree_edge is not None and tree_edge(v, w):
+                        return self.__stop()
+                    marked[w] = 1
+                    self._count += 1
+                    if pre is not None and pre(w):
+                        return self.__stop()
+                    vertices.append(w)
+                    positions.append(offsets[w])
+                    break
+                if non_tree_edge is not None and non_tree_edge(v, w):
+                    return self.__stop()
+            else:
+                vertices.pop()
+                positions.pop()
+                if post is not None and post(v):
+                    return self.__stop()
+        return True
+
+    def search_all(self, order=None, **hooks):
+        """
+        Runs depth-first search from every unmarked vertex, in vertex
+        order or in the given {order}, until a hook stops it.
+        :returns: False if a hook stopped the search, True otherwise
+        """
+        for v in range(self._V) if order is None else order:
+            if not self._marked[v] and not self.search(v, **hooks):
+                return False
+        return not self._stopped
+
+    def __stop(self):
+        self._stopped = True
+        return False
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'V={self._V}, ' \
+               f'marked={self._count}, ' \
+               f'stopped={self._stopped})>'
+
+
+def _recursive_order(g):
+    """
+    Preorder and postorder by recursive depth-first search, the way
+    DepthFirstOrder computed them before it moved to IterativeDFS.
+    """
+    marked = [False] * g.get_V()
+    pre, post = list(), list()
+
+    def dfs(v):
+        marked[v] = True
+        pre.append(v)
+        for w in g.adj_items(v):
+            if not marked[w]:
+                dfs(w)
+        post.append(v)
+
+    for v in range(g.get_V()):
+        if not marked[v]:
+            dfs(v)
+    return pre, post
+
+
+def _benchmark(n=200000, degree=4, seed=5):
+    """
+    Times preorder and postorder of a random digraph with {n} vertices and
+    {degree} * {n} edges, and of a path of {n} vertices, with the recursive
+    search and with IterativeDFS (freezing the digraph included), and the
+    strong components of each with KosarajuSharirSCC, which runs two
+    searches on IterativeDFS.
+    The recursive search gets a recursion limit of 2 * n, and may still
+    overflow the C stack on long paths.
+    """
+    # imported here: kosaraju_sharir_scc itself imports this module
+    from graphs.kosaraju_sharir_scc import KosarajuSharirSCC
+
+    rnd = random.Random(seed)
+    graphs = list()
+    g = Digraph(n)
+    for _ in range(degree * n):
+        g.add_edge(rnd.randrange(n), rnd.randrange(n))
+    graphs.append(('random', g))
+    g = Digraph(n)
+    for v in range(n - 1):
+        g.add_edge(v, v + 1)
+    graphs.append(('path', g))
+
+    limit = sys.getrecursionlimit()
+    for name, g in graphs:
+        start = time.perf_counter()
+        dfs = IterativeDFS(g)
+        pre, post = list(), list()
+        dfs.search_all(pre=pre.append, post=post.append)
+        iterative = time.perf_counter() - start
+        try:
+            sys.setrecursionlimit(max(limit, 2 * n + 100))
+            start = time.perf_counter()
+            expected = _recursive_order(g)
+            recursive = f'{time.perf_counter() - start:7.3f} s'
+            assert expected == (pre, post)
+        except RecursionError:
+            recursive = 'RecursionError'
+        finally:
+            sys.setrecursionlimit(limit)
+        print(f'{name:7} V={n} E={g.get_E()}  iterative {iterative:7.3f} s   recursive {recursive}')
+        start = time.perf_counter()
+        scc = KosarajuSharirSCC(g)
+        print(f'{name:7} KosarajuSharirSCC: {scc.count()} strong components in {time.perf_counter() - start:7.3f} s')
+
+
+def main():
+    g = Digraph(13)
+    with open("../resources/tinyDG.txt", ) as f:
+        for line in f.readlines():
+            vertices = " ".join(line.splitlines()).split(' ')
+            if len(vertices) < 2:
+                continue
+            else:
+                v1, v2 = int(vertices[0]), int(vertices[1])
+                g.add_edge(v1, v2)
+    dfs = IterativeDFS(g)
+    pre, post = list(), list()
+    dfs.search_all(pre=pre.append, post=post.append)
+    print(f'preorder:  {pre}')
+    print(f'postorder: {post}')
+    _benchmark()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,17 +11,17 @@ The KruskalMST class represents a data type for computing a
  *  returns its edges.
  *
  *  This implementation uses Krusal's algorithm and the
- *  union-find data type.
+ *  union-find data type (ArrayUF, whose union reports whether it merged).
  *  The constructor takes Theta(E log E) time in
  *  the worst case.
  *  Each instance method takes Theta(1) time.
  *  It uses Theta(E) extra space (not including the graph).
 """
 import heapq
-from graphs.edge import Edge
+from graphs.edge_list_loader import load_edge_weighted_graph
 from graphs.edge_weighted_graph import EdgeWeightedGraph
 from queue import Queue
-from unionfind.uf import UF
+from unionfind.array_uf import ArrayUF
 
 
 class KruskalMST:
@@ -33,15 +33,14 @@ class KruskalMST:
         self._pq = list()  # min priority queue in ascending order of Edge weights
         for e in g.edges():
             heapq.heappush(self._pq, e.item)
-        uf = UF(g.get_V())
+        uf = ArrayUF(g.get_V())
         # 1. Consider edges in ascending order of edge weight (sort weights).
         # 2. Add the next Edge, e, to tree, _mst, unless doing so would create a cycle.
         while self._pq and self._mst.qsize() < g.get_V() - 1:
             e = heapq.heappop(self._pq)
             v = e.either()
             w = e.other(v)
-            if not uf.connected(v, w):  # no cycle because v-w are not in the same set
-                uf.union(v, w)  # merge sets containing v-w to add v-w to _mst
+            if uf.union(v, w):  # no cycle because v-w were not in the same set; now merged
                 self._mst.put(e)
                 self._weight += e.weight()
 
@@ -61,7 +60,7 @@ class KruskalMST:
             print(f'Weight of edges does not equal weight(): {total} vs {self.weight()}')
             return False
 
-        uf = UF(g.get_V())
+        uf = ArrayUF(g.get_V())
         # check that it is acyclic
         for e in self.edges():
             v = e.either()
@@ -79,7 +78,7 @@ class KruskalMST:
                 return False
         # check that it is a minimal spanning forest (cut optimality conditions)
         for e in self.edges():
-            uf = UF(g.get_V())
+            uf = ArrayUF(g.get_V())
             for f in self._mst.queue:
                 x = f.either()
                 y = f.other(x)
@@ -102,15 +101,7 @@ class KruskalMST:
 
 
 def main():
-    with open("../resources/tinyEWG.txt", ) as f:
-        values = "".join(f.readlines()).splitlines()
-        V, E = int(values[0]), int(values[1])
-        g = EdgeWeightedGraph(V)
-        for line in values[2:]:
-            vertices = line.split(' ')
-            v, w, weight = int(vertices[0]), int(vertices[1]), float(vertices[2])
-            e = Edge(v, w, weight)
-            g.add_edge(e)
+    g = load_edge_weighted_graph("../resources/tinyEWG.txt")
     print(g)
     mst = KruskalMST(g)
     print(mst)
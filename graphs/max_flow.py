@@ -0,0 +1,412 @@
+"""
+max_flow.py
+Maximum flow and minimum cut on an array-based residual network.
+The Dinic and PushRelabel classes compute a maximum st-flow and a
+ *  minimum st-cut in a FlowNetwork, with the FordFulkerson API:
+ *  value() is the value of the maximum flow and in_cut(v) tells whether
+ *  v is on the source side of the minimum cut (the vertices reachable
+ *  from s in the residual network). Like FordFulkerson, they start from
+ *  the flow already on the edges, which must be feasible, and leave the
+ *  maximum flow on the FlowEdge objects when they are done.
+ *
+ *  Both build the residual network once as arrays: every FlowEdge v->w
+ *  becomes a forward arc v->w with residual capacity capacity - flow and
+ *  a backward arc w->v with residual capacity flow, stored in CSR order
+ *  by tail in array('i') heads and tails, an array('d') of residual
+ *  capacities and an array('i') pairing each arc with its reverse.
+ *
+ *  Dinic alternates a breadth-first search that builds the level graph
+ *  with a blocking flow found by an iterative depth-first search that
+ *  never looks at an arc twice in a phase (current-arc pointers).
+ *  It takes O(V^2 E) time in the worst case.
+ *
+ *  PushRelabel is the highest-label push-relabel algorithm. Active
+ *  vertices sit in buckets by height, and the highest one is discharged
+ *  first. The gap heuristic lifts every vertex above an emptied height
+ *  out of reach of the sink. Global relabeling recomputes exact heights
+ *  by breadth-first search from the sink every V relabels. Once the
+ *  maximum preflow is known, a second phase returns the excess that
+ *  cannot reach the sink to the source. It takes O(V^2 sqrt(E)) time in
+ *  the worst case.
+ *
+ *  If the capacities are floating-point numbers, residual capacities at
+ *  most FLOATING_POINT_EPSILON are treated as zero.
+"""
+import random
+import time
+from array import array
+from collections import deque
+
+from graphs.edge_list_loader import load_flow_network
+from graphs.flow_edge import FlowEdge
+from graphs.flow_network import FlowNetwork
+from graphs.ford_fulkerson import FordFulkerson
+
+
+class _ArrayMaxFlow:
+    FLOATING_POINT_EPSILON = 1E-11
+
+    def __init__(self, g, s, t):
+        self._V = g.get_V()
+        self.__validate(s)
+        self.__validate(t)
+        if s == t:
+            raise AttributeError('source equals sink')
+        self.__build(g)
+        self._value = self.__initial_excess(s, t)
+        self._solve(s, t)
+        self._marked = self.__residual_reachable(s)
+        self.__write_back()
+        assert self.__check(s, t)
+
+    def __build(self, g):
+        """
+        Counting-sorts the forward and backward arcs of every edge by tail.
+        """
+        V = self._V
+        edges = list()
+        for v in range(V):
+            for node in g.adj(v):
+                e = node.item
+                # each edge is in the adjacency of both ends; self-loops carry no flow
+                if e.tail() == v and e.head() != v:
+                    edges.append(e)
+        m = 2 * len(edges)
+        offsets = array('q', bytes(8 * (V + 1)))
+        for e in edges:
+            offsets[e.tail() + 1] += 1
+            offsets[e.head() + 1] += 1
+        for v in range(V):
+            offsets[v + 1] += offsets[v]
+        cursor = offsets[:-1]
+        heads, tails = array('i', bytes(4 * m)), array('i', bytes(4 * m))
+        residual, rev = array('d', bytes(8 * m)), array('i', bytes(4 * m))
+        forward = array('q', bytes(8 * len(edges)))
+        for k, e in enumerate(edges):
+            v, w = e.tail(), e.head()
+            if e.flow() < -self.FLOATING_POINT_EPSILON or e.flow() > e.capacity() + self.FLOATING_POINT_EPSILON:
+                raise AttributeError('initial flow is infeasible')
+            a, b = cursor[v], cursor[w]
+            cursor[v], cursor[w] = a + 1, b + 1
+            heads[a], tails[a], residual[a] = w, v, e.capacity() - e.flow()
+            heads[b], tails[b], residual[b] = v, w, e.flow()
+            rev[a], rev[b] = b, a
+            forward[k] = a
+        self._edges, self._forward = edges, forward
+        self._offsets, self._heads, self._tails = offsets, heads, tails
+        self._residual, self._rev = residual, rev
+
+    def __initial_excess(self, s, t):
+        excess = [0.0] * self._V
+        for e in self._edges:
+            excess[e.tail()] -= e.flow()
+            excess[e.head()] += e.flow()
+        for v in range(self._V):
+            if v != s and v != t and abs(excess[v]) > self.FLOATING_POINT_EPSILON:
+                raise AttributeError('initial flow is infeasible')
+        return excess[t]
+
+    def _solve(self, s, t):
+        raise NotImplementedError
+
+    def _push(self, a, delta):
+        self._residual[a] -= delta
+        self._residual[self._rev[a]] += delta
+
+    def _levels_from(self, s):
+        """
+        Breadth-first search from {s} along arcs with residual capacity.
+        :returns: the distance of every vertex from s, -1 if unreachable
+        """
+        offsets, heads, residual = self._offsets, self._heads, self._residual
+        eps = self.FLOATING_POINT_EPSILON
+        level = array('i', [-1]) * self._V
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            for a in range(offsets[v], offsets[v + 1]):
+                w = heads[a]
+                if level[w] < 0 and residual[a] > eps:
+                    level[w] = level[v] + 1
+                    queue.append(w)
+        return level
+
+    def _levels_to(self, t):
+        """
+        Breadth-first search into {t} along arcs with residual capacity.
+        :returns: the distance of every vertex to t, -1 if t is unreachable
+        """
+        offsets, heads, residual, rev = self._offsets, self._heads, self._residual, self._rev
+        eps = self.FLOATING_POINT_EPSILON
+        level = array('i', [-1]) * self._V
+        level[t] = 0
+        queue = deque([t])
+        while queue:
+            w = queue.popleft()
+            for a in range(offsets[w], offsets[w + 1]):
+                v = heads[a]
+                # rev[a] is the arc v->w
+                if level[v] < 0 and residual[rev[a]] > eps:
+                    level[v] = level[w] + 1
+                    queue.append(v)
+        return level
+
+    def __residual_reachable(self, s):
+        level = self._levels_from(s)
+        return [d >= 0 for d in level]
+
+    def __write_back(self):
+        for k, e in enumerate(self._edges):
+            flow = e.capacity() - self._residual[self._forward[k]]
+            if flow > e.flow():
+                e.add_residual_flow_to(e.head(), min(flow - e.flow(), e.capacity() - e.flow()))
+            elif flow < e.flow():
+                e.add_residual_flow_to(e.tail(), min(e.flow() - flow, e.flow()))
+
+    def value(self):
+        return self._value
+
+    def in_cut(self, v):
+        self.__validate(v)
+        return self._marked[v]
+
+    def __validate(self, v):
+        n = self._V
+        if v < 0 or v >= n:
+            raise AttributeError(f'vertex {v} is not between 0 and {n - 1}')
+
+    def __check(self, s, t):
+        if not self.in_cut(s):
+            print(f'source {s} is not on source side of min cut')
+            return False
+        if self.in_cut(t):
+            print(f'sink {t} is on source side of min cut')
+            return False
+        excess = [0.0] * self._V
+        min_cut_value = 0.0
+        for e in self._edges:
+            excess[e.tail()] -= e.flow()
+            excess[e.head()] += e.flow()
+            if self.in_cut(e.tail()) and not self.in_cut(e.head()):
+                min_cut_value += e.capacity()
+        tolerance = self.FLOATING_POINT_EPSILON * max(1, len(self._edges))
+        for v in range(self._V):
+            if v != s and v != t and abs(excess[v]) > tolerance:
+                print(f'Net flow out of {v} does not equal zero')
+                return False
+        if abs(excess[t] - self._value) > tolerance:
+            print(f'Excess at sink = {excess[t]}, max flow = {self._value}')
+            return False
+        if abs(min_cut_value - self._value) > tolerance * max(1.0, abs(self._value)):
+            print(f'Max flow value = {self._value}, min cut value = {min_cut_value}')
+            return False
+        return True
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'_V={self._V}, ' \
+               f'_value={self._value})>'
+
+
+class Dinic(_ArrayMaxFlow):
+
+    def _solve(self, s, t):
+        while True:
+            self._level = self._levels_from(s)
+            if self._level[t] < 0:
+                break
+            self._value += self.__blocking_flow(s, t)
+        self._level = None
+
+    def __blocking_flow(self, s, t):
+        offsets, heads, tails, residual = self._offsets, self._heads, self._tails, self._residual
+        level, eps = self._level, self.FLOATING_POINT_EPSILON
+        current = offsets[:-1]  # current[v] = next arc of v to try
+        path = list()  # arcs from s to v
+        total = 0.0
+        v = s
+        while True:
+            if v == t:
+                bottle = min(residual[a] for a in path)
+                for a in path:
+                    self._push(a, bottle)
+                total += bottle
+                # retreat to the tail of the first saturated arc
+                k = 0
+                while residual[path[k]] > eps:
+                    k += 1
+                v = tails[path[k]]
+                del path[k:]
+                continue
+            a, end = current[v], offsets[v + 1]
+            while a < end and (residual[a] <= eps or level[heads[a]] != level[v] + 1):
+                a += 1
+            current[v] = a
+            if a < end:
+                path.append(a)
+                v = heads[a]
+            elif v == s:
+                return total
+            else:
+                # dead end: no path to t goes through v in this phase
+                level[v] = -1
+                a = path.pop()
+                v = tails[a]
+                current[v] += 1
+
+
+class PushRelabel(_ArrayMaxFlow):
+
+    def _solve(self, s, t):
+        V = self._V
+        self._excess = [0.0] * V
+        self._height = array('i', bytes(4 * V))
+        self._current = self._offsets[:-1]
+        self._relabels = 0
+        # phase 1: a maximum preflow; vertices at height V or more cannot reach t
+        eps = self.FLOATING_POINT_EPSILON
+        for a in range(self._offsets[s], self._offsets[s + 1]):
+            if self._residual[a] > eps:
+                w = self._heads[a]
+                self._excess[w] += self._residual[a]
+                self._excess[s] -= self._residual[a]
+                self._push(a, self._residual[a])
+        self.__global_relabel(s, t, t, V)
+        self.__discharge_all(s, t, V, True)
+        self._value += self._excess[t]
+        # phase 2: return the excess that cannot reach t to s
+        self.__global_relabel(s, t, s, 2 * V + 1)
+        self.__discharge_all(s, t, 2 * V + 1, False)
+        self._excess = self._height = self._current = None
+
+    def __global_relabel(self, s, t, target, limit):
+        """
+        Sets exact heights (distances to {target} in the residual network),
+        refills the buckets of active vertices and the height counts.
+        """
+        V, eps = self._V, self.FLOATING_POINT_EPSILON
+        level = self._levels_to(target)
+        height, excess = self._height, self._excess
+        self._buckets = [list() for _ in range(limit + 1)]
+        self._counts = array('i', bytes(4 * (limit + 1)))
+        self._highest = 0
+        for v in range(V):
+            if v == s or v == t:
+                height[v] = level[v] if v == target else limit if v == t else V
+                continue
+            height[v] = level[v] if level[v] >= 0 else limit
+            if height[v] < limit:
+                self._counts[height[v]] += 1
+                if excess[v] > eps:
+                    self._buckets[height[v]].append(v)
+                    self._highest = max(self._highest, height[v])
+            self._current[v] = self._offsets[v]
+
+    def __activate(self, w, limit):
+        h = self._height[w]
+        if h < limit:
+            self._buckets[h].append(w)
+            if h > self._highest:
+                self._highest = h
+
+    def __discharge_all(self, s, t, limit, gap):
+        V, eps = self._V, self.FLOATING_POINT_EPSILON
+        offsets, heads, residual, rev = self._offsets, self._heads, self._residual, self._rev
+        height, excess, current = self._height, self._excess, self._current
+        while True:
+            while self._highest >= 0 and not self._buckets[self._highest]:
+                self._highest -= 1
+            if self._highest < 0:
+                return
+            h = self._highest
+            v = self._buckets[h].pop()
+            if height[v] != h or excess[v] <= eps:
+                continue  # stale entry
+            end = offsets[v + 1]
+            while excess[v] > eps:
+                a = current[v]
+                while a < end:
+                    w = heads[a]
+                    if residual[a] > eps and height[v] == height[w] + 1:
+                        delta = min(excess[v], residual[a])
+                        residual[a] -= delta
+                        residual[rev[a]] += delta
+                        if excess[w] <= eps and w != s and w != t:
+                            self.__activate(w, limit)
+                        excess[w] += delta
+                        excess[v] -= delta
+                        if excess[v] <= eps:
+                            break
+                    a += 1
+                current[v] = a
+                if excess[v] <= eps:
+                    break
+                # relabel: one above the lowest neighbor in the residual network
+                old = height[v]
+                new = limit
+                for b in range(offsets[v], end):
+                    if residual[b] > eps and height[heads[b]] + 1 < new:
+                        new = height[heads[b]] + 1
+                self._counts[old] -= 1
+                if gap and self._counts[old] == 0:
+                    # nothing at height old is left, so nothing above it reaches t
+                    for u in range(V):
+                        if old < height[u] < limit and u != s and u != t:
+                            self._counts[height[u]] -= 1
+                            height[u] = limit
+                    new = limit
+                height[v] = new
+                current[v] = offsets[v]
+                self._relabels += 1
+                if new >= limit:
+                    break
+                self._counts[new] += 1
+                if self._relabels % V == 0:
+                    # refills the buckets, v included
+                    self.__global_relabel(s, t, t if gap else s, limit)
+                    break
+
+
+def _random_network(V, E, seed, integral=True):
+    rnd = random.Random(seed)
+    g = FlowNetwork(V)
+    for _ in range(E):
+        v, w = rnd.randrange(V), rnd.randrange(V)
+        capacity = float(rnd.randint(1, 100)) if integral else rnd.uniform(0.5, 100.0)
+        g.add_edge(FlowEdge(v, w, capacity))
+    return g
+
+
+def main():
+    g = load_flow_network("../resources/tinyFN.txt")
+    s, t = 0, g.get_V() - 1
+    for cls in (Dinic, PushRelabel):
+        max_flow = cls(g, s, t)
+        print(f'{cls.__name__}: max flow from {s} to {t} = {max_flow.value()}, '
+              f'min cut {[v for v in range(g.get_V()) if max_flow.in_cut(v)]}')
+    for v in range(g.get_V()):
+        for e in g.adj(v):
+            if v == e.item.tail() and e.item.flow() > 0:
+                print(f'     {e.item}')
+
+    # cross-check against FordFulkerson
+    for seed in range(20):
+        V = 10 + seed
+        values = list()
+        for cls in (FordFulkerson, Dinic, PushRelabel):
+            values.append(cls(_random_network(V, 4 * V, seed), 0, V - 1).value())
+        assert abs(values[0] - values[1]) < 1e-9 and abs(values[0] - values[2]) < 1e-9, values
+    print('Dinic and PushRelabel agree with FordFulkerson on 20 random networks')
+
+    V = 2000
+    for cls in (FordFulkerson, Dinic, PushRelabel):
+        g = _random_network(V, 10 * V, 7)
+        start = time.perf_counter()
+        max_flow = cls(g, 0, V - 1)
+        print(f'{cls.__name__:13} V={V} E={10 * V}  value {max_flow.value():8.1f}  '
+              f'{time.perf_counter() - start:6.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -13,15 +13,19 @@ class Outcast:
     def outcast(self, nouns):
         # which noun is the least related to the others?
         # compute the sum of the distances between each noun and every other one
+        n = len(nouns)
+        pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        # each distance is symmetric, so every unordered pair is looked up once, in one batch
+        distances = self._wordnet.distances([(nouns[i], nouns[j]) for i, j in pairs])
+        d = [0] * n  # d[i] = distance(xi, x1)   +   distance(xi, x2)   +   ...   +   distance(xi, xn)
+        for (i, j), dist in zip(pairs, distances):
+            d[i] += dist
+            d[j] += dist
         xt = None  # outcast noun
         dt = 0  # max(dt, di)
-        for i in range(len(nouns)):
-            di = 0  # distance(xi, x1)   +   distance(xi, x2)   +   ...   +   distance(xi, xn)
-            for j in range(len(nouns)):
-                xi, xj = nouns[i], nouns[j]
-                di += self._wordnet.distance(xi, xj)
-            if di > dt:
-                dt = di
+        for i in range(n):
+            if d[i] > dt:
+                dt = d[i]
                 xt = nouns[i]
         return xt
 
@@ -0,0 +1,293 @@
+"""
+point_to_point_sp.py
+Point-to-point shortest paths in edge-weighted digraphs with
+ *  non-negative weights.
+The AStarSP and BidirectionalSP classes answer shortest-path queries
+ *  between one source s and one target t without computing the whole
+ *  shortest-paths tree of s.
+ *
+ *  AStarSP runs Dijkstra's algorithm keyed by dist_to[v] + h(v, t),
+ *  where the heuristic h(v, w) is a lower bound on the length of any
+ *  path from v to w that satisfies h(v, x) <= weight(v->w) + h(w, x)
+ *  (consistency), e.g. the Euclidean distance between coordinates when
+ *  edge weights are road lengths. With no heuristic it is Dijkstra's
+ *  algorithm with early termination at t.
+ *
+ *  BidirectionalSP searches forward from s in the digraph and backward
+ *  from t in its reverse, always growing the side whose smallest key is
+ *  smaller, and stops once the two smallest keys add up to at least the
+ *  best s-t path seen where the searches meet. With a heuristic it is
+ *  bidirectional A*: both sides use the average potential
+ *  pf(v) = (h(v, t) - h(s, v)) / 2 and pr(v) = -pf(v), which keeps the
+ *  reduced weights non-negative in both directions.
+ *
+ *  Both classes build their state once and answer any number of queries
+ *  with search(s, t); per-query state lives in dicts, so a query costs
+ *  time proportional to the vertices it settles, never Theta(V).
+ *  After search(s, t), dist_to(v) and path_to(v) are available for t and
+ *  for every vertex the forward search settled.
+"""
+import heapq
+import math
+import random
+from queue import LifoQueue
+
+from graphs.directed_edge import DirectedEdge
+from graphs.dijkstra_sp import DijkstraSP
+from graphs.edge_weighted_digraph import EdgeWeightedDigraph
+from fundamentals.point2d import Point2D
+
+
+class EuclideanHeuristic:
+    """
+    Straight-line distance between vertex coordinates, scaled by {scale}.
+    It is admissible and consistent when every edge weight is at least
+    {scale} times the distance between its endpoints.
+    """
+
+    def __init__(self, points, scale=1.0):
+        """
+        :param points: a sequence of Point2D coordinates indexed by vertex
+        :param scale: the minimum weight per unit of distance
+        """
+        if scale < 0:
+            raise ValueError('scale must be non-negative')
+        self._points = points
+        self._scale = scale
+
+    def __call__(self, v, w):
+        return self._scale * self._points[v].distance_to(self._points[w])
+
+
+class _PointToPointSP:
+
+    def __init__(self, g, heuristic):
+        self._g = g
+        self._h = heuristic
+        self._s = self._t = None
+        self._dist_to = dict()
+        self._edge_to = dict()
+        self._settled = set()
+
+    def _validate_vertex(self, v):
+        n = self._g.get_V()
+        if v < 0 or v >= n:
+            raise AttributeError(f'vertex {v} is not between 0 and {n - 1}')
+
+    def _start(self, s, t):
+        self._validate_vertex(s)
+        self._validate_vertex(t)
+        self._s, self._t = s, t
+        self._dist_to = {s: 0.0}
+        self._edge_to = dict()
+        self._settled = set()
+
+    def _forward_path(self, v):
+        path = list()
+        e = self._edge_to.get(v)
+        while e is not None:
+            path.append(e)
+            e = self._edge_to.get(e.tail())
+        path.reverse()
+        return path
+
+    def _known(self, v):
+        self._validate_vertex(v)
+        if self._s is None:
+            raise ValueError('no search has been run')
+        if v != self._t and v not in self._settled:
+            raise ValueError(f'vertex {v} was not settled by the search from {self._s} to {self._t}')
+
+    def dist_to(self, v):
+        self._known(v)
+        return self._dist_to.get(v, math.inf)
+
+    def has_path_to(self, v):
+        return self.dist_to(v) < math.inf
+
+    def path_to(self, v):
+        """
+        Returns the edges of a shortest path from s to {v} as a stack,
+        first edge on top, like DijkstraSP.path_to().
+        """
+        if not self.has_path_to(v):
+            return None
+        path = LifoQueue()  # stack
+        for e in reversed(self._path_edges(v)):
+            path.put(e)
+        return path
+
+    def _path_edges(self, v):
+        return self._forward_path(v)
+
+    def settled_count(self):
+        """
+        :returns: the number of vertices settled by the last search
+        """
+        return len(self._settled)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'_s={self._s}, ' \
+               f'_t={self._t}, ' \
+               f'settled={self.settled_count()})>'
+
+
+class AStarSP(_PointToPointSP):
+
+    def __init__(self, g, heuristic=None):
+        """
+        :param g: the edge-weighted digraph
+        :param heuristic: a consistent lower bound h(v, w), or None for Dijkstra
+        """
+        super().__init__(g, heuristic)
+
+    def search(self, s, t):
+        """
+        Computes a shortest path from {s} to {t}.
+        :returns: this object
+        """
+        self._start(s, t)
+        g, h = self._g, self._h
+        dist_to, edge_to, settled = self._dist_to, self._edge_to, self._settled
+        pq = [(h(s, t) if h else 0.0, s)]
+        while pq:
+            _, v = heapq.heappop(pq)
+            if v in settled:
+                continue
+            settled.add(v)
+            if v == t:
+                break
+            d = dist_to[v]
+            for e in g.adj_items(v):
+                if e.weight() < 0:
+                    raise ValueError(f'edge {e} has negative weight')
+                w = e.head()
+                if w not in settled and d + e.weight() < dist_to.get(w, math.inf):
+                    dist_to[w] = d + e.weight()
+                    edge_to[w] = e
+                    heapq.heappush(pq, (dist_to[w] + (h(w, t) if h else 0.0), w))
+        return self
+
+
+class BidirectionalSP(_PointToPointSP):
+
+    def __init__(self, g, heuristic=None, reverse=None):
+        """
+        :param g: the edge-weighted digraph
+        :param heuristic: a consistent lower bound h(v, w), or None for Dijkstra
+        :param reverse: g.reverse(), if the caller already has it
+        """
+        super().__init__(g, heuristic)
+        self._reverse = g.reverse() if reverse is None else reverse
+        self._mu = math.inf
+        self._meet = None
+        self._dist_from = dict()
+        self._edge_from = dict()
+        self._settled_reverse = set()
+
+    def search(self, s, t):
+        """
+        Computes a shortest path from {s} to {t}.
+        :returns: this object
+        """
+        self._start(s, t)
+        self._dist_from = {t: 0.0}
+        self._edge_from = dict()
+        self._settled_reverse = set()
+        self._mu, self._meet = (0.0, s) if s == t else (math.inf, None)
+
+        h = self._h
+        potential = dict()
+
+        def pf(v):
+            # forward potential; the reverse search uses -pf(v)
+            if h is None:
+                return 0.0
+            if v not in potential:
+                potential[v] = (h(v, t) - h(s, v)) / 2
+            return potential[v]
+
+        forward = (self._g, self._dist_to, self._edge_to, self._settled, [(pf(s), s)], 1)
+        backward = (self._reverse, self._dist_from, self._edge_from, self._settled_reverse, [(-pf(t), t)], -1)
+        while forward[4] and backward[4]:
+            if forward[4][0][0] + backward[4][0][0] >= self._mu:
+                break
+            side, other = (forward, backward) if forward[4][0][0] <= backward[4][0][0] else (backward, forward)
+            g, dist, edge_to, settled, pq, sign = side
+            _, v = heapq.heappop(pq)
+            if v in settled:
+                continue
+            settled.add(v)
+            d = dist[v]
+            other_dist = other[1]
+            for e in g.adj_items(v):
+                if e.weight() < 0:
+                    raise ValueError(f'edge {e} has negative weight')
+                w = e.head()
+                nd = d + e.weight()
+                if w not in settled and nd < dist.get(w, math.inf):
+                    dist[w] = nd
+                    edge_to[w] = e
+                    heapq.heappush(pq, (nd + sign * pf(w), w))
+                    if w in other_dist and nd + other_dist[w] < self._mu:
+                        self._mu = nd + other_dist[w]
+                        self._meet = w
+        self._dist_to[t] = self._mu
+        return self
+
+    def _path_edges(self, v):
+        if v != self._t or self._meet is None:
+            return self._forward_path(v)
+        path = self._forward_path(self._meet)
+        # the reverse search's edges w->v stand for v->w in the digraph
+        e = self._edge_from.get(self._meet)
+        while e is not None:
+            path.append(DirectedEdge(e.head(), e.tail(), e.weight()))
+            e = self._edge_from.get(e.tail())
+        return path
+
+    def settled_count(self):
+        return len(self._settled) + len(self._settled_reverse)
+
+
+def _grid(n, seed=1):
+    """
+    An n-by-n grid road network with jittered coordinates and edge
+    weights equal to their Euclidean length.
+    """
+    rnd = random.Random(seed)
+    points = [Point2D(x + rnd.uniform(-0.3, 0.3), y + rnd.uniform(-0.3, 0.3))
+              for y in range(n) for x in range(n)]
+    g = EdgeWeightedDigraph(n * n)
+    for y in range(n):
+        for x in range(n):
+            v = y * n + x
+            for w in ((v + 1) if x + 1 < n else None, (v + n) if y + 1 < n else None):
+                if w is not None:
+                    length = points[v].distance_to(points[w])
+                    g.add_edge(DirectedEdge(v, w, length))
+                    g.add_edge(DirectedEdge(w, v, length))
+    return g, points
+
+
+def main():
+    n = 60
+    g, points = _grid(n)
+    s, t = 0, n * n - 1
+    h = EuclideanHeuristic(points)
+    dijkstra = DijkstraSP(g).search(s, target=t)
+    print(f'DijkstraSP         {dijkstra.dist_to(t):.4f}  settled '
+          f'{sum(dijkstra.is_settled(v) for v in range(g.get_V()))}')
+    reverse = g.reverse()
+    for name, sp in (('A*', AStarSP(g, h)),
+                     ('bidirectional', BidirectionalSP(g, reverse=reverse)),
+                     ('bidirectional A*', BidirectionalSP(g, h, reverse=reverse))):
+        sp.search(s, t)
+        print(f'{name:18} {sp.dist_to(t):.4f}  settled {sp.settled_count()}')
+    q = BidirectionalSP(g, h, reverse=reverse).search(s, t).path_to(t)
+    print(f'{q.qsize()} edges, first {q.get()}')
+
+
+if __name__ == '__main__':
+    main()
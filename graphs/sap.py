@@ -5,82 +5,143 @@ An ancestral path between two vertices v and w in a digraph is a directed path f
 together with a directed path from w to the same ancestor x. A shortest ancestral path is an ancestral path of
 minimum total length. We refer to the common ancestor in a shortest ancestral path as a shortest common ancestor.
 Note also that an ancestral path is a path, but not a directed path.
+ *
+ *  The same definitions apply to two sets of vertices A and B: the shortest
+ *  ancestral path between A and B is the shortest one between any a in A
+ *  and any b in B. Every method accepts a vertex or an iterable of vertices
+ *  on either side.
+ *
+ *  This implementation answers a query with two breadth-first searches of
+ *  the digraph, frozen to CSR form. The ancestor map of side A (each
+ *  ancestor and its distance from A) is found by one multi-source search
+ *  and kept in a least-recently-used cache of {cache_size} maps keyed by
+ *  the source set, so a synset that takes part in many queries is
+ *  searched once. Side B is searched level by level from all of its
+ *  vertices at once, looking each vertex up in the map of A, and stops
+ *  as soon as its level reaches the best length found: no later vertex
+ *  can do better. distances() answers a batch of queries, using for each
+ *  pair the side whose map is already cached.
 """
+from collections import OrderedDict
+
+from graphs.csr_graph import CSRDigraph
 from graphs.digraph import Digraph
-from collections import defaultdict
-from queue import Queue
 
 
 class SAP:
 
-    def __init__(self, g: Digraph):
+    def __init__(self, g: Digraph, cache_size=1024):
+        """
+        :param g: the digraph (Bag-based or CSR)
+        :param cache_size: the number of ancestor maps kept
+        """
+        if cache_size < 1:
+            raise ValueError('cache_size must be positive')
+        if not isinstance(g, CSRDigraph):
+            g = g.freeze()
         self._g = g
+        self._cache_size = cache_size
+        self._maps = OrderedDict()
 
-    def get_ancestors(self, v):
-        q = Queue()
-        m = defaultdict(int)
-        q.put(v)
-        m[v] = 0
-        while not q.empty():
-            to = q.get()
-            current_distance = m.get(to)
-            for w in self._g.adj_vertices(to):
-                if w.item not in m or m[w.item] > current_distance + 1:
-                    q.put(w.item)
-                    m[w.item] = current_distance + 1
+    def __sources(self, v):
+        if isinstance(v, int):
+            self.__validate_vertex(v)
+            return frozenset((v,))
+        if v is None:
+            raise AttributeError('argument is None')
+        sources = frozenset(v)
+        for x in sources:
+            if x is None:
+                raise AttributeError('vertex is None')
+            self.__validate_vertex(x)
+        return sources
+
+    def __ancestor_map(self, sources):
+        m = self._maps.get(sources)
+        if m is not None:
+            self._maps.move_to_end(sources)
+            return m
+        offsets, targets = self._g.offsets, self._g.targets
+        m = dict.fromkeys(sources, 0)
+        frontier, d = list(sources), 0
+        while frontier:
+            d += 1
+            following = list()
+            for x in frontier:
+                for i in range(offsets[x], offsets[x + 1]):
+                    y = targets[i]
+                    if y not in m:
+                        m[y] = d
+                        following.append(y)
+            frontier = following
+        self._maps[sources] = m
+        if len(self._maps) > self._cache_size:
+            self._maps.popitem(last=False)
         return m
 
+    def __search(self, a, b):
+        """
+        :returns: the length of a shortest ancestral path between the vertex
+                  sets {a} and {b} and its common ancestor, or (-1, -1)
+        """
+        if b in self._maps and a not in self._maps:
+            a, b = b, a
+        m = self.__ancestor_map(a)
+        offsets, targets = self._g.offsets, self._g.targets
+        best, ancestor = -1, -1
+        seen = set(b)
+        frontier, d = list(b), 0
+        while frontier:
+            for x in frontier:
+                length = m.get(x)
+                if length is not None and (best < 0 or length + d < best):
+                    best, ancestor = length + d, x
+            # every vertex of a later level is at least d + 1 away from b
+            if best >= 0 and d + 1 >= best:
+                break
+            d += 1
+            following = list()
+            for x in frontier:
+                for i in range(offsets[x], offsets[x + 1]):
+                    y = targets[i]
+                    if y not in seen:
+                        seen.add(y)
+                        following.append(y)
+            frontier = following
+        return best, ancestor
+
+    def get_ancestors(self, v):
+        """
+        :param v: a vertex or an iterable of vertices
+        :returns: a dict from every ancestor of {v} to its distance from {v};
+                  it is shared with the cache and must not be modified
+        """
+        return self.__ancestor_map(self.__sources(v))
+
     def length(self, v, w):
         # length of shortest ancestral path between v and w; -1 if no such path
-        self.__validate_vertex(v)
-        self.__validate_vertex(w)
-        ancestor_v = self.get_ancestors(v)
-        ancestor_w = self.get_ancestors(w)
-        distance = -1
-        for key, value in ancestor_v.items():
-            if key in ancestor_w:
-                current_distance = ancestor_w.get(key) + value
-                if distance < 0 or current_distance < distance:
-                    distance = current_distance
-        return distance
+        return self.__search(self.__sources(v), self.__sources(w))[0]
 
     def ancestor(self, v, w):
         # a common ancestor of v and w that participates in a shortest ancestral path; -1 if no such path
-        self.__validate_vertex(v)
-        self.__validate_vertex(w)
-        ancestor_v = self.get_ancestors(v)
-        ancestor_w = self.get_ancestors(w)
-        distance, ancestor = -1, -1
-        for key, value in ancestor_v.items():
-            if key in ancestor_w:
-                current_dist = ancestor_w.get(key) + value
-                if distance < 0 or current_dist < distance:
-                    distance = current_dist
-                    ancestor = key
-        return ancestor
+        return self.__search(self.__sources(v), self.__sources(w))[1]
 
     def any_length(self, v, w):
         # length of shortest ancestral path between any vertex in v and any vertex in w; -1 if no such path
-        distance = -1
-        for i in v:
-            for j in w:
-                current_distance = self.length(i, j)
-                if current_distance > 0:
-                    if distance < 0 or current_distance < distance:
-                        distance = current_distance
-        return distance
+        return self.length(v, w)
 
     def any_ancestor(self, v, w):
         # a common ancestor that participates in shortest ancestral path; -1 if no such path
-        distance, ancestor = -1, None
-        for i in v:
-            for j in w:
-                current_distance = self.length(i, j)
-                if current_distance > 0:
-                    if distance < 0 or current_distance < distance:
-                        distance = current_distance
-                        ancestor = self.ancestor(i, j)
-        return ancestor
+        return self.ancestor(v, w)
+
+    def distances(self, pairs):
+        """
+        Computes the lengths of many shortest ancestral paths.
+        :param pairs: an iterable of (v, w), where v and w are vertices or
+                      iterables of vertices
+        :returns: a list of the lengths, -1 where there is no ancestral path
+        """
+        return [self.__search(self.__sources(v), self.__sources(w))[0] for v, w in pairs]
 
     def __validate_vertex(self, v):
         n = self._g.get_V()
@@ -88,7 +149,7 @@ class SAP:
             raise AttributeError(f'vertex {v} is not between 0 and {n - 1}')
 
     def __repr__(self):
-        return f'<{self.__class__.__name__}(_g={self._g})>'
+        return f'<{self.__class__.__name__}(_g={self._g}, cached={len(self._maps)})>'
 
 
 def main():
@@ -96,23 +157,17 @@ def main():
         values = "".join(f.readlines()).split('\n')
         V, E = int(values[0]), int(values[1])
         g = Digraph(V)
-        sap = SAP(g)
-        for line in values:
+        for line in values[2:]:
             vertices = "".join(line).split(' ')
             if len(vertices) < 2:
                 continue
-            else:
-                v, w = int(vertices[0]), int(vertices[1])
-                g.add_edge(v, w)
-                length = sap.length(v, w)
-                ancestor = sap.ancestor(v, w)
-                print(f'length = {length}, ancestor={ancestor}')
-    # sap = SAP(g)
-    print(g)
+            g.add_edge(int(vertices[0]), int(vertices[1]))
+    sap = SAP(g)
+    for v, w in ((3, 11), (9, 11), (7, 2), (1, 6)):
+        print(f'length = {sap.length(v, w)}, ancestor={sap.ancestor(v, w)}')
+    print(f'any_length([3, 7], [11, 2]) = {sap.any_length([3, 7], [11, 2])}')
+    print(sap.distances([(3, 11), (9, 11), ([3, 7], [11, 2])]))
     print(sap)
-    # print(sap.get_ancestors(3))
-    # print(sap.get_ancestors(2))
-    # print(sap.ancestor(3, 2))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,369 @@
+"""
+scalable_mst.py
+Compute a minimum spanning forest of a large edge-weighted graph
+ *  with filter-Kruskal or with Boruvka's algorithm on a process pool.
+The FilterKruskalMST and BoruvkaMST classes represent data types for
+ *  computing a minimum spanning tree in an edge-weighted graph, with the
+ *  API of KruskalMST: the weight() method returns the weight of a minimum
+ *  spanning tree (a forest if the graph is not connected) and the edges()
+ *  method returns its edges.
+ *  The edge weights can be positive, zero, or negative and need not
+ *  be distinct.
+ *
+ *  Both work on parallel edge columns rather than Edge objects: the
+ *  graph may be an EdgeWeightedGraph, a CSREdgeWeightedGraph, or the
+ *  (V, ends_a, ends_b, weights) tuple of read_edge_list(), so a large
+ *  edge-list file never becomes a graph at all. An edge is named by its
+ *  index in the columns, and ties between equal weights are broken by
+ *  that index. Self-loops are dropped. Union-find is an ArrayUF.
+ *
+ *  FilterKruskalMST partitions the edges around a pivot weight sampled
+ *  from them, solves the light half first and then filters out of the
+ *  heavy half every edge whose endpoints are already connected before
+ *  recursing on it; only small partitions are sorted. On graphs with
+ *  many more edges than vertices most heavy edges are discarded without
+ *  ever being sorted, so it takes O(E + V log V log(E / V)) expected
+ *  time instead of Theta(E log E).
+ *
+ *  BoruvkaMST adds, in each of O(log V) rounds, the cheapest edge
+ *  leaving every component. The per-round scan over the edges is
+ *  split into contiguous shards on a pool of processes. The edge
+ *  columns are placed in shared memory once, together with the
+ *  component label of every vertex, which the parent rewrites after
+ *  each round. Each worker also compacts its shard in place, dropping
+ *  the edges that have become internal to a component, so later rounds
+ *  scan fewer edges, and returns only the components it found an edge
+ *  for, as (component, edge) columns, so the parent merges the shards
+ *  in time proportional to the candidates rather than to V per shard.
+ *  Both take Theta(E + V) extra space.
+"""
+import multiprocessing
+import os
+import random
+import time
+from array import array
+
+from graphs.csr_graph import CSREdgeWeightedGraph
+from graphs.edge import Edge
+from graphs.edge_list_loader import load_edge_weighted_graph
+from graphs.shared_array import attach, share
+from unionfind.array_uf import ArrayUF
+
+
+def _columns(g):
+    """
+    :returns: (V, ends_a, ends_b, weights) for a graph or for a tuple of columns
+    """
+    if isinstance(g, tuple):
+        v, ends_a, ends_b, weights = g
+        if weights is None:
+            raise ValueError('the edge list is not weighted')
+        return v, ends_a, ends_b, weights
+    if not isinstance(g, CSREdgeWeightedGraph):
+        g = g.freeze()
+    offsets, targets, weights = g.offsets, g.targets, g.weights
+    ends_a, ends_b, out_weights = array('i'), array('i'), array('d')
+    for v in range(g.get_V()):
+        for i in range(offsets[v], offsets[v + 1]):
+            # one copy of each edge; self-loops are never in a spanning forest
+            if targets[i] > v:
+                ends_a.append(v)
+                ends_b.append(targets[i])
+                out_weights.append(weights[i])
+    return g.get_V(), ends_a, ends_b, out_weights
+
+
+class _ColumnMST:
+    """
+    The edges(), weight() and checking code shared by the column-based MSTs.
+    """
+
+    FLOATING_POINT_EPSILON = 1E-12
+
+    def __init__(self, v):
+        self._V = v
+        self._uf = ArrayUF(v)
+        self._mst = array('q')  # indices of the tree edges in the columns
+        self._weight = 0.0
+
+    def edges(self):
+        """
+        :returns: the edges of the minimum spanning forest, as a list of Edge
+        """
+        return [Edge(self._ends_a[e], self._ends_b[e], self._weights[e]) for e in self._mst]
+
+    def weight(self):
+        return self._weight
+
+    def size(self):
+        """
+        :returns: the number of edges in the minimum spanning forest
+        """
+        return len(self._mst)
+
+    def _check(self):
+        # the tree edges form a forest that spans every component of the graph
+        total = sum(self._weights[e] for e in self._mst)
+        if abs(total - self._weight) > self.FLOATING_POINT_EPSILON * max(1.0, abs(total)):
+            print(f'Weight of edges does not equal weight(): {total} vs {self._weight}')
+            return False
+        uf = ArrayUF(self._V)
+        if uf.union_many((self._ends_a[e], self._ends_b[e]) for e in self._mst) < len(self._mst):
+            print('not a forest')
+            return False
+        find = uf._find
+        for e in range(len(self._weights)):
+            if find(self._ends_a[e]) != find(self._ends_b[e]):
+                print('not a spanning forest')
+                return False
+        return True
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'V={self._V}, ' \
+               f'edges={len(self._mst)}, ' \
+               f'weight={self._weight})>'
+
+
+class FilterKruskalMST(_ColumnMST):
+
+    def __init__(self, g, threshold=4096, seed=0):
+        """
+        :param g: the edge-weighted graph, or (V, ends_a, ends_b, weights) columns
+        :param threshold: partitions of at most this many edges are sorted
+        :param seed: seed of the pivot sampling
+        """
+        v, self._ends_a, self._ends_b, self._weights = _columns(g)
+        super().__init__(v)
+        self._threshold = max(1, threshold)
+        self._random = random.Random(seed)
+        self.__filter_kruskal()
+
+        assert self._check()
+
+    def __pivot(self, ids):
+        weights = self._weights
+        sample = sorted(weights[ids[self._random.randrange(len(ids))]] for _ in range(31))
+        return sample[15]
+
+    def __filter_kruskal(self):
+        weights, ends_a, ends_b = self._weights, self._ends_a, self._ends_b
+        find, link = self._uf._find, self._uf._link
+        # a stack of (edges, filter first?); the light half is popped first
+        stack = [(list(range(len(weights))), False)]
+        while stack and len(self._mst) < self._V - 1:
+            ids, heavy = stack.pop()
+            if heavy:
+                ids = [e for e in ids if find(ends_a[e]) != find(ends_b[e])]
+            if len(ids) > self._threshold:
+                pivot = self.__pivot(ids)
+                light = [e for e in ids if weights[e] <= pivot]
+                if len(light) < len(ids):
+                    stack.append(([e for e in ids if weights[e] > pivot], True))
+                    stack.append((light, False))
+                    continue
+            # Kruskal's algorithm on a small (or single-weight) partition
+            ids.sort(key=weights.__getitem__)
+            for e in ids:
+                root_p, root_q = find(ends_a[e]), find(ends_b[e])
+                if root_p != root_q:
+                    link(root_p, root_q)
+                    self._mst.append(e)
+                    self._weight += weights[e]
+                    if len(self._mst) == self._V - 1:
+                        break
+
+
+# state of a pool worker: the shared edge columns and component labels
+_worker = dict()
+
+
+def _init_worker(columns):
+    """
+    Attaches a pool worker to the shared columns and component labels.
+    """
+    blocks, views = zip(*(attach(c) for c in columns))
+    _worker['blocks'] = blocks
+    _worker['views'] = views
+
+
+def _close_worker():
+    """
+    Detaches from shared memory; views must be released before their blocks close.
+    """
+    for view in _worker.pop('views'):
+        view.release()
+    for block in _worker.pop('blocks'):
+        block.close()
+    _worker.clear()
+
+
+def _cheapest(task):
+    """
+    Compacts the live edges in ids[lo:hi] to those between two components
+    and finds the cheapest of them leaving each of the {c} components.
+    :returns: the new end of the shard, and the components that have an
+              edge in the shard with the cheapest such edge of each, as
+              array('i') and array('q') bytes
+    """
+    lo, hi, c = task
+    ends_a, ends_b, weights, label, ids = _worker['views']
+    best = array('q', [-1]) * c
+    best_weight = array('d', [float('inf')]) * c
+    touched = array('i')  # the components with an edge in the shard
+    live = lo
+    for j in range(lo, hi):
+        e = ids[j]
+        p, q = label[ends_a[e]], label[ends_b[e]]
+        if p == q:
+            continue
+        ids[live] = e
+        live += 1
+        w = weights[e]
+        # ties are broken by edge index, so the choices never form a cycle;
+        # the edges of a shard come in increasing index order, so an equal
+        # weight never beats the edge already found
+        if w < best_weight[p]:
+            if best[p] == -1:
+                touched.append(p)
+            best_weight[p], best[p] = w, e
+        if w < best_weight[q]:
+            if best[q] == -1:
+                touched.append(q)
+            best_weight[q], best[q] = w, e
+    return live, touched.tobytes(), array('q', (best[p] for p in touched)).tobytes()
+
+
+class BoruvkaMST(_ColumnMST):
+
+    def __init__(self, g, processes=None, shard_size=None):
+        """
+        :param g: the edge-weighted graph, or (V, ends_a, ends_b, weights) columns
+        :param processes: the number of worker processes, default os.cpu_count();
+                          1 runs in this process without a pool
+        :param shard_size: the number of edges per task
+        """
+        v, ends_a, ends_b, weights = _columns(g)
+        super().__init__(v)
+        m = len(weights)
+        processes = processes or os.cpu_count() or 1
+        if shard_size is None:
+            # several shards per worker keeps the pool balanced; in this
+            # process one shard gives each component a single candidate
+            shard_size = max(1, -(-m // (4 * processes if processes > 1 else 1)))
+        self._rounds = 0
+        label = array('i', range(v))
+        ids = array('i', range(m))
+        blocks, columns = zip(*(share(c) for c in (array('i', ends_a), array('i', ends_b),
+                                                   array('d', weights), label, ids)))
+        try:
+            views = [block.buf[:n * array(typecode).itemsize].cast(typecode)
+                     for block, (_, typecode, n) in zip(blocks[:4], columns[:4])]
+            self._ends_a, self._ends_b, self._weights, self._label = views
+            shards = [[lo, min(m, lo + shard_size)] for lo in range(0, m, shard_size)]
+            if processes == 1:
+                _init_worker(columns)
+                try:
+                    self.__boruvka(map, shards)
+                finally:
+                    _close_worker()
+            else:
+                with multiprocessing.Pool(processes, _init_worker, (columns,)) as pool:
+                    self.__boruvka(pool.map, shards)
+            # keep private copies of the columns for edges()
+            self._label.release()
+            self._ends_a, self._ends_b, self._weights = (array(view.format, view.tobytes()) for view in views[:3])
+            for view in views[:3]:
+                view.release()
+            self._label = None
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        assert self._check()
+
+    def __boruvka(self, scan, shards):
+        ends_a, ends_b, weights, label = self._ends_a, self._ends_b, self._weights, self._label
+        uf = self._uf
+        find, link = uf._find, uf._link
+        c = self._V
+        while c > 1 and shards:
+            self._rounds += 1
+            results = scan(_cheapest, [(lo, hi, c) for lo, hi in shards])
+            best = array('q', [-1]) * c
+            # the shards hold increasing edge indices, so on equal weights
+            # the edge of an earlier shard is kept
+            for shard, (live, components, found) in zip(shards, results):
+                shard[1] = live
+                ps, es = array('i'), array('q')
+                ps.frombytes(components)
+                es.frombytes(found)
+                for p, e in zip(ps, es):
+                    f = best[p]
+                    if f == -1 or weights[e] < weights[f]:
+                        best[p] = e
+            shards = [shard for shard in shards if shard[1] > shard[0]]
+            merged = False
+            for e in best:
+                if e == -1:
+                    continue
+                root_p, root_q = find(ends_a[e]), find(ends_b[e])
+                if root_p != root_q:  # the same edge may be cheapest for both sides
+                    link(root_p, root_q)
+                    self._mst.append(e)
+                    self._weight += weights[e]
+                    merged = True
+            if not merged:
+                break
+            # renumber the components 0 through c - 1 for the next round
+            label[:] = uf.components()
+            c = uf.count()
+
+    def rounds(self):
+        """
+        :returns: the number of Boruvka rounds
+        """
+        return self._rounds
+
+
+def _random_columns(v, m, seed):
+    rnd = random.Random(seed)
+    ends_a = array('i', (rnd.randrange(v) for _ in range(m)))
+    ends_b = array('i', (rnd.randrange(v) for _ in range(m)))
+    weights = array('d', (rnd.random() for _ in range(m)))
+    return v, ends_a, ends_b, weights
+
+
+def main():
+    g = load_edge_weighted_graph("../resources/tinyEWG.txt")
+    for mst in (FilterKruskalMST(g), BoruvkaMST(g, processes=2)):
+        print(mst)
+        for e in mst.edges():
+            print(f'{e.either()}-{e.other(e.either())} {e.weight():.5f}')
+        print(f'{mst.weight():.5f}')
+
+    v, m = 100000, 2000000
+    columns = _random_columns(v, m, seed=11)
+    print(f'V={v} E={m}')
+    start = time.perf_counter()
+    ends_a, ends_b, weights = columns[1:]
+    baseline = _ColumnMST(v)
+    find, link = baseline._uf._find, baseline._uf._link
+    for e in sorted(range(m), key=weights.__getitem__):
+        root_p, root_q = find(ends_a[e]), find(ends_b[e])
+        if root_p != root_q:
+            link(root_p, root_q)
+            baseline._weight += weights[e]
+    print(f'sort + union-find   {time.perf_counter() - start:6.2f} s  weight {baseline.weight():.6f}')
+    processes = max(2, os.cpu_count() or 1)
+    for name, build in (('filter-Kruskal', lambda: FilterKruskalMST(columns)),
+                        ('Boruvka, 1 process', lambda: BoruvkaMST(columns, processes=1)),
+                        (f'Boruvka, {processes} processes', lambda: BoruvkaMST(columns, processes))):
+        start = time.perf_counter()
+        mst = build()
+        print(f'{name:19} {time.perf_counter() - start:6.2f} s  weight {mst.weight():.6f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+shared_array.py
+Typed arrays in shared memory, for handing graph columns to a process pool.
+ *  share() copies an array('i'), array('q'), array('d') or similar column
+ *  into a new multiprocessing.shared_memory block and returns a small
+ *  (name, typecode, length) descriptor that pickles cheaply; attach()
+ *  maps the block in another process and casts it back to a typed
+ *  memoryview, so the workers of a pool read the same pages instead of
+ *  each receiving a copy.
+ *  The process that called share() owns the block: it must close() and
+ *  unlink() it when the pool is done. An attached process must release()
+ *  its view before it closes the block.
+"""
+from array import array
+from multiprocessing import shared_memory
+
+
+def share(column):
+    """
+    Copies an array into a new shared memory block.
+    :param column: an array.array (or any buffer with typecode and itemsize)
+    :returns: the block and a (name, typecode, length) descriptor of it
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(column) * column.itemsize))
+    shm.buf[:len(column) * column.itemsize] = column.tobytes()
+    return shm, (shm.name, column.typecode, len(column))
+
+
+def attach(descriptor):
+    """
+    Maps a block made by share().
+    :param descriptor: the (name, typecode, length) descriptor of the block
+    :returns: the block and a memoryview of its elements, cast to the typecode
+    """
+    name, typecode, n = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, shm.buf[:n * array(typecode).itemsize].cast(typecode)
@@ -0,0 +1,128 @@
+"""
+snapshot.py
+Versioned binary snapshots of parsed data, loaded with mmap.
+ *  A snapshot holds named columns (arrays or byte strings) derived from
+ *  one or more source files, together with the size and modification
+ *  time of every source when it was written:
+ *
+ *      header   magic b'SNAP', version, metadata length   ('<4sHxxQ')
+ *      metadata UTF-8 JSON: kind, attrs, sources, byte order, and the
+ *               typecode, offset and length of every column
+ *      columns  raw native-order array data, each aligned to 8 bytes
+ *
+ *  read_snapshot() maps the file and returns memoryviews straight into
+ *  it, so loading takes time proportional to the metadata, not to the
+ *  data. It returns None instead of raising when the snapshot is missing,
+ *  of another version, kind or byte order, truncated, or stale because
+ *  a source file changed, so callers can fall back to parsing the
+ *  sources and write a fresh snapshot. write_snapshot() writes to a
+ *  temporary file and renames it, so readers never see half a snapshot.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+MAGIC = b'SNAP'
+VERSION = 1
+_HEADER = struct.Struct('<4sHxxQ')
+_ALIGN = 8
+
+
+def _fingerprint(sources):
+    fingerprint = list()
+    for path in sources:
+        st = os.stat(path)
+        fingerprint.append([os.path.abspath(path), st.st_size, st.st_mtime_ns])
+    return fingerprint
+
+
+def write_snapshot(path, kind, sources, columns, attrs=None):
+    """
+    Writes a snapshot.
+    :param path: the snapshot file
+    :param kind: the kind of data, checked when reading
+    :param sources: the paths of the files the data was parsed from
+    :param columns: a dict from column name to an array or bytes
+    :param attrs: a dict of JSON-serializable values, checked when reading
+    """
+    layout, offset = list(), 0
+    for name, column in columns.items():
+        typecode = column.typecode if isinstance(column, array) else 'B'
+        n = len(column)
+        layout.append([name, typecode, offset, n])
+        offset += -(-n * array(typecode).itemsize // _ALIGN) * _ALIGN
+    metadata = json.dumps({'kind': kind,
+                           'attrs': attrs or dict(),
+                           'sources': _fingerprint(sources),
+                           'byteorder': sys.byteorder,
+                           'columns': layout}).encode()
+    base = -(-(_HEADER.size + len(metadata)) // _ALIGN) * _ALIGN
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(metadata)))
+        f.write(metadata)
+        for (name, typecode, at, n), column in zip(layout, columns.values()):
+            f.seek(base + at)
+            f.write(column.tobytes() if isinstance(column, array) else bytes(column))
+        f.truncate(base + offset)
+    os.replace(temporary, path)
+
+
+def read_snapshot(path, kind, sources, attrs=None):
+    """
+    Maps a snapshot if it is current.
+    :param path: the snapshot file
+    :param kind: the kind of data expected
+    :param sources: the paths of the files the data is parsed from
+    :param attrs: the attrs the snapshot must have been written with
+    :returns: a dict from column name to a memoryview of the mapped data,
+              or None if the snapshot is missing, unreadable or stale
+    """
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        magic, version, size = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION:
+            return None
+        metadata = json.loads(mm[_HEADER.size:_HEADER.size + size])
+        if (metadata['kind'] != kind or metadata['attrs'] != (attrs or dict())
+                or metadata['byteorder'] != sys.byteorder
+                or metadata['sources'] != _fingerprint(sources)):
+            return None
+        base = -(-(_HEADER.size + size) // _ALIGN) * _ALIGN
+        view = memoryview(mm)
+        columns = dict()
+        for name, typecode, at, n in metadata['columns']:
+            lo = base + at
+            hi = lo + n * array(typecode).itemsize
+            if hi > len(mm):
+                return None
+            columns[name] = view[lo:hi].cast(typecode)
+        return columns
+    except (struct.error, ValueError, KeyError, TypeError, OSError):
+        return None
+
+
+def main():
+    import tempfile
+    directory = tempfile.mkdtemp()
+    source = os.path.join(directory, 'source.txt')
+    with open(source, 'w') as f:
+        f.write('3 1 4 1 5\n')
+    path = os.path.join(directory, 'source.snap')
+    with open(source) as f:
+        write_snapshot(path, 'ints', [source], {'ints': array('i', map(int, f.read().split()))})
+    print(list(read_snapshot(path, 'ints', [source])['ints']))
+    with open(source, 'a') as f:
+        f.write('9\n')
+    print(f'after the source changed: {read_snapshot(path, "ints", [source])}')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,74 +8,106 @@ The SymbolDigraph class represents a digraph, where the
  *  between 0 and V - 1.
  *  It also supports initializing a symbol digraph from a file.
  *
- *  This implementation uses an ST to map from strings to integers,
- *  an array to map from integers to strings, and a Digraph to store
- *  the underlying graph.
+ *  This implementation reads the file once: each name is interned the
+ *  first time it appears, in a dict that is then turned into a
+ *  SymbolTable (the names in one UTF-8 blob, with a sorted index), and
+ *  the edges are collected in arrays and built into a CSRDigraph.
+ *  digraph() returns the Digraph built from it the first time it is
+ *  called; csr() returns the CSRDigraph itself.
+ *  With a snapshot path the table and the CSR arrays are written to a
+ *  binary snapshot (see snapshot.py), and later constructions map it
+ *  instead of parsing as long as the file has not changed.
  *  The index_of and contains operations take time
  *  proportional to log V, where V is the number of vertices.
  *  The name_of operation takes constant time.
 """
-from collections import defaultdict
+from array import array
+
+from graphs.csr_graph import CSRDigraph
 from graphs.digraph import Digraph
+from graphs.snapshot import read_snapshot, write_snapshot
+from graphs.symbol_table import SymbolTable
 
 
 class SymbolDigraph:
 
-    def __init__(self, file_name, delimiter=" "):
-        self._st = defaultdict(int)
-
-        # First pass builds the index by reading strings to associate
-        # distinct strings with an index
-        with open(f"../resources/{file_name}.txt", ) as f:
-            for line in f.readlines():
-                a = " ".join(line.splitlines()).split(delimiter)
-                for i in range(len(a)):
-                    if a[i] not in self._st:
-                        self._st[a[i]] = len(self._st)
-
-        # inverted index to get string keys in an array
-        self._keys = ['' for _ in range(len(self._st))]
-        for name in self._st.keys():
-            self._keys[self._st.get(name)] = name
-
-        # second pass builds the digraph by connecting first vertex on each
-        # line to all others
-        self._graph = Digraph(len(self._st))
-        with open(f"../resources/{file_name}.txt", ) as f:
-            for line in f.readlines():
-                a = " ".join(line.splitlines()).split(delimiter)
-                v = self._st.get(a[0])
-                for i in range(1, len(a)):
-                    w = self._st.get(a[i])
-                    self._graph.add_edge(v, w)
+    _SNAPSHOT_KIND = 'symbol-digraph'
+
+    def __init__(self, file_name, delimiter=" ", snapshot=None):
+        """
+        :param file_name: the name of a file in resources/, without .txt
+        :param delimiter: the separator of the names on a line
+        :param snapshot: a binary snapshot file to load from if it is current
+                         and to write otherwise, or None to always parse
+        """
+        path = f"../resources/{file_name}.txt"
+        attrs = {'delimiter': delimiter}
+        columns = None
+        if snapshot is not None:
+            columns = read_snapshot(snapshot, self._SNAPSHOT_KIND, [path], attrs)
+        if columns is None:
+            columns = self.__parse(path, delimiter)
+            if snapshot is not None:
+                write_snapshot(snapshot, self._SNAPSHOT_KIND, [path], columns, attrs)
+        self._st = SymbolTable.from_columns(columns, 'name_')
+        self._csr = CSRDigraph(len(self._st), columns['offsets'], columns['targets'])
+        self._graph = None
+
+    @staticmethod
+    def __parse(path, delimiter):
+        st = dict()
+        tails, heads = array('i'), array('i')
+        with open(path, 'rb') as f:
+            lines = f.read().split(b'\n')
+        # connect the first vertex on each line to all others
+        for line in lines:
+            line = line.rstrip(b'\r')
+            if not line:
+                continue
+            a = line.split(delimiter.encode())
+            v = st.setdefault(a[0], len(st))
+            for name in a[1:]:
+                tails.append(v)
+                heads.append(st.setdefault(name, len(st)))
+        graph = CSRDigraph.from_edges(len(st), tails, heads)
+        columns = SymbolTable.from_names(list(st)).columns('name_')
+        columns['offsets'] = graph.offsets
+        columns['targets'] = graph.targets
+        return columns
 
     def contains(self, s):
-        return s in self._st
+        return self._st.contains(s)
 
     def index_of(self, s):
-        return self._st.get(s)
+        return self._st.index_of(s)
 
     def name_of(self, v):
+        if not isinstance(v, int):
+            v = v.item
         self.__validate_vertex(v)
-        if isinstance(v, int):
-            return self._keys[v]
-        else:
-            return self._keys[v.item]
+        return self._st.name_of(v)
 
     def digraph(self):
+        if self._graph is None:
+            # adding the edges in CSR order keeps the adjacency order of a
+            # digraph built while reading the file
+            offsets, targets = self._csr.offsets, self._csr.targets
+            self._graph = Digraph(self._csr.get_V())
+            for v in range(self._csr.get_V()):
+                for i in range(offsets[v], offsets[v + 1]):
+                    self._graph.add_edge(v, targets[i])
         return self._graph
 
+    def csr(self):
+        return self._csr
+
     def __validate_vertex(self, v):
-        n = self._graph.get_V()
-        if isinstance(v, int):
-            if v < 0 or v >= n:
-                raise ValueError(f'vertex {v} is not between 0 and {n - 1}')
-        else:
-            if v.item < 0 or v.item >= n:
-                raise ValueError(f'vertex {v} is not between 0 and {n - 1}')
+        n = self._csr.get_V()
+        if v < 0 or v >= n:
+            raise ValueError(f'vertex {v} is not between 0 and {n - 1}')
 
     def __repr__(self):
-        return f'<{self.__class__.__name__}(_st={self._st}, _graph={self._graph}, _keys={self._keys})>'
+        return f'<{self.__class__.__name__}(_st={self._st}, _graph={self._csr})>'
 
 
 def main():
@@ -88,5 +120,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
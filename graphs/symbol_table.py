@@ -0,0 +1,119 @@
+"""
+symbol_table.py
+An immutable table of interned strings with dense integer ids.
+The SymbolTable class maps between n distinct strings and the ids
+ *  0 through n - 1. The strings are stored once, UTF-8 encoded, in a
+ *  single byte blob with an array('q') of offsets, so a table takes one
+ *  byte per character plus 12 bytes per string instead of a str object
+ *  and a dict entry per string. An array('i') lists the ids in sorted
+ *  order of their encoded strings.
+ *
+ *  The name_of operation takes constant time and the index_of and
+ *  contains operations take time proportional to log n (binary search).
+ *  columns() returns the three arrays, and a table can be rebuilt over
+ *  any buffers with the same contents, for example memoryviews of a
+ *  snapshot (see snapshot.py), without touching the strings.
+"""
+from array import array
+
+
+class SymbolTable:
+
+    def __init__(self, blob, offsets, order=None):
+        """
+        :param blob: the concatenated UTF-8 encoded strings
+        :param offsets: string i is blob[offsets[i]:offsets[i + 1]]
+        :param order: the ids in sorted order of their strings, or None
+                      for a table that only supports name_of
+        """
+        self._blob = blob
+        self._offsets = offsets
+        self._order = order
+
+    @classmethod
+    def from_names(cls, names, searchable=True):
+        """
+        Builds a table from a sequence of strings (str or UTF-8 bytes);
+        string i gets id i.
+        """
+        encoded = [name if isinstance(name, bytes) else name.encode() for name in names]
+        offsets = array('q', [0])
+        total = 0
+        for key in encoded:
+            total += len(key)
+            offsets.append(total)
+        order = array('i', sorted(range(len(encoded)), key=encoded.__getitem__)) if searchable else None
+        return cls(b''.join(encoded), offsets, order)
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __key(self, i):
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def name_of(self, i):
+        self.__validate(i)
+        return self.__key(i).decode()
+
+    def index_of(self, name):
+        """
+        :returns: the id of {name}, or None if it is not in the table
+        """
+        if self._order is None:
+            raise AttributeError('table was built without a sorted index')
+        key = name.encode()
+        order = self._order
+        lo, hi = 0, len(order) - 1
+        while lo <= hi:
+            mid = (lo + hi) >> 1
+            i = order[mid]
+            found = self.__key(i)
+            if key < found:
+                hi = mid - 1
+            elif key > found:
+                lo = mid + 1
+            else:
+                return i
+        return None
+
+    def contains(self, name):
+        return self.index_of(name) is not None
+
+    def names(self):
+        """
+        :returns: a generator of the strings in id order
+        """
+        return (self.name_of(i) for i in range(len(self)))
+
+    def columns(self, prefix=''):
+        """
+        :returns: a dict of the blob, offsets and order arrays, with
+                  names starting with {prefix}
+        """
+        columns = {f'{prefix}blob': self._blob, f'{prefix}offsets': self._offsets}
+        if self._order is not None:
+            columns[f'{prefix}order'] = self._order
+        return columns
+
+    @classmethod
+    def from_columns(cls, columns, prefix=''):
+        return cls(columns[f'{prefix}blob'], columns[f'{prefix}offsets'], columns.get(f'{prefix}order'))
+
+    def __validate(self, i):
+        n = len(self)
+        if i < 0 or i >= n:
+            raise ValueError(f'index {i} is not between 0 and {n - 1}')
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(n={len(self)}, bytes={len(self._blob)})>'
+
+
+def main():
+    st = SymbolTable.from_names(['JFK', 'ORD', 'ATL', 'DEN'])
+    print(st)
+    print([st.name_of(i) for i in range(len(st))])
+    print(st.index_of('ATL'), st.index_of('LAX'), st.contains('DEN'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+tarjan_scc.py
+Compute the strongly-connected components of a digraph using
+ *  Tarjan's algorithm.
+ *  Runs in O(E + V) time.
+The TarjanSCC class represents a data type for
+ *  determining the strong components in a digraph.
+ *  The id operation determines in which strong component
+ *  a given vertex lies; the strongly_connected operation
+ *  determines whether two vertices are in the same strong component;
+ *  and the count operation determines the number of strong
+ *  components. The condensation operation returns the digraph of the
+ *  strong components.
+ *
+ *  The component identifiers are 0 through count - 1 in topological
+ *  order of the condensation: if there is an edge v->w, then
+ *  id(v) <= id(w). So the condensation has the same vertex numbering
+ *  and its vertices 0, 1, ..., count - 1 are a topological order.
+ *
+ *  This implementation uses Tarjan's algorithm in a single depth-first
+ *  search on an explicit stack (IterativeDFS). Unlike KosarajuSharirSCC
+ *  it needs neither the reverse digraph nor a second search.
+ *  The constructor takes Theta(V + E) time,
+ *  where V is the number of vertices and E
+ *  is the number of edges.
+ *  Each instance method takes Theta(1) time, except condensation,
+ *  which takes Theta(V + E) time.
+ *  It uses Theta(V) extra space (not including the digraph): four
+ *  array('i') of V entries and the component stack.
+"""
+from array import array
+from queue import Queue
+
+from graphs.csr_graph import CSRDigraph
+from graphs.digraph import Digraph
+from graphs.iterative_dfs import IterativeDFS
+
+
+class TarjanSCC:
+
+    def __init__(self, g):
+        """
+        :param g: the digraph (Bag-based or CSR)
+        """
+        if not isinstance(g, CSRDigraph):
+            g = g.freeze()
+        self._g = g
+        V = g.get_V()
+        dfs = IterativeDFS(g, parents=True)
+        self._edge_to = dfs.get_edge_to()
+        self._id = array('i', [-1]) * V
+        self._pre = array('i', bytes(4 * V))  # pre[v] = preorder number of v
+        self._low = array('i', bytes(4 * V))  # low[v] = low number of v
+        self._stack = array('i')
+        self._pre_counter = 0
+        self._count = 0
+        dfs.search_all(pre=self.__visit_pre, post=self.__visit_post, non_tree_edge=self.__non_tree_edge)
+        # Tarjan's algorithm finds the components in reverse topological order
+        last = self._count - 1
+        for v in range(V):
+            self._id[v] = last - self._id[v]
+        self._stack = None
+
+        assert self.__check()
+
+    def __visit_pre(self, v):
+        self._pre[v] = self._low[v] = self._pre_counter
+        self._pre_counter += 1
+        self._stack.append(v)
+
+    def __non_tree_edge(self, v, w):
+        # a marked vertex without a component is still on the stack
+        if self._id[w] == -1 and self._pre[w] < self._low[v]:
+            self._low[v] = self._pre[w]
+
+    def __visit_post(self, v):
+        low = self._low
+        if low[v] == self._pre[v]:
+            stack, component = self._stack, self._count
+            while True:
+                w = stack.pop()
+                self._id[w] = component
+                if w == v:
+                    break
+            self._count += 1
+        u = self._edge_to[v]
+        if u != -1 and low[v] < low[u]:
+            low[u] = low[v]
+
+    def count(self):
+        """
+        :returns: the number of strong components
+        """
+        return self._count
+
+    def __validate_vertex(self, v):
+        n = len(self._id)
+        if v < 0 or v >= n:
+            raise ValueError(f'vertex {v} is not between 0 and {n - 1}')
+
+    def strongly_connected(self, v, w):
+        """
+        Are vertices {v} and {w} in the same strong component?
+        """
+        self.__validate_vertex(v)
+        self.__validate_vertex(w)
+        return self._id[v] == self._id[w]
+
+    def is_strongly_connected(self, v, w):
+        return self.strongly_connected(v, w)
+
+    def id(self, v):
+        """
+        :returns: the component of {v}, in topological order of the condensation
+        """
+        self.__validate_vertex(v)
+        return self._id[v]
+
+    def condensation(self):
+        """
+        Returns the digraph with one vertex per strong component and an
+        edge c->d whenever some edge v->w has id(v) = c != d = id(w).
+        Parallel edges are merged. Its vertices 0, 1, ..., count - 1 are
+        in topological order.
+        :returns: the condensation as a Digraph
+        """
+        dag = Digraph(self._count)
+        seen = array('i', [-1]) * self._count  # seen[d] = last c with an edge c->d
+        members = self.__members()
+        for c in range(self._count):
+            for v in members[c]:
+                for w in self._g.adj_items(v):
+                    d = self._id[w]
+                    if d != c and seen[d] != c:
+                        seen[d] = c
+                        dag.add_edge(c, d)
+        return dag
+
+    def __members(self):
+        members = [list() for _ in range(self._count)]
+        for v in range(len(self._id)):
+            members[self._id[v]].append(v)
+        return members
+
+    def __check(self):
+        # every edge must go forward in the topological numbering
+        for v in range(len(self._id)):
+            for w in self._g.adj_items(v):
+                if self._id[v] > self._id[w]:
+                    print(f'edge {v}->{w} goes from component {self._id[v]} back to {self._id[w]}')
+                    return False
+        return True
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'count={self._count}, ' \
+               f'id={list(self._id)})>'
+
+
+def main():
+    file_name = '../resources/tinyDG.txt'
+    with open(file_name) as f:
+        ints = list()
+        for line in f.read().split('\n'):
+            ints.append(line)
+        vertices, edges = int(ints[0]), int(ints[1])
+
+    graph = Digraph(vertices)
+    inp = ints[2:]  # skip first 2 lines in tiny.DG.txt i.e. # of vertices and edges
+
+    for i in range(edges):
+        v, w = inp[i].split(' ')
+        graph.add_edge(int(v), int(w))
+
+    scc = TarjanSCC(graph)
+    m = scc.count()
+    print(f'{m} strong components')
+    components = [Queue() for _ in range(m)]
+    for v in range(graph.get_V()):
+        components[scc.id(v)].put(v)
+    for i in range(m):
+        for v in components[i].queue:
+            print(f'{v} ', end="")
+        print()
+
+    print('condensation (vertices in topological order):')
+    dag = scc.condensation()
+    for c in range(dag.get_V()):
+        print(f'{c}: ' + ' '.join(str(d) for d in dag.adj_items(c)))
+
+
+if __name__ == '__main__':
+    main()
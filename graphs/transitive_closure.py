@@ -2,25 +2,139 @@
 transitive_closure.py
 Compute transitive closure of a digraph and support
  *  reachability queries.
- *  Preprocessing time: O(V(E + V)) time.
+ *  Preprocessing time: O(V + E + C * (C + F) / w) time.
  *  Query time: O(1).
- *  Space: O(V^2).
+ *  Space: O(V + C^2 / 8) bytes.
+ *
+ *  Here C is the number of strong components, F the number of edges
+ *  between them and w the machine word size. All vertices of a strong
+ *  component reach the same vertices, so the closure is kept per
+ *  component: the digraph is condensed with TarjanSCC, whose component
+ *  ids are a topological order, and the row of component c is
+ *  the bitset {c} OR the rows of its successors, computed in reverse
+ *  topological order with word-parallel big-int ORs. Each row is stored
+ *  as bytes, so reachable(v, w) tests one bit in Theta(1) time.
+ *
+ *  In lazy mode no row is computed up front: the row of a source
+ *  component is built by a depth-first search of the condensation the
+ *  first time it is queried, and at most {cache_size} rows are kept,
+ *  least recently used first out.
 """
+from collections import OrderedDict
+
 from graphs.digraph import Digraph
-from graphs.directed_dfs import DirectedDFS
+from graphs.tarjan_scc import TarjanSCC
 
 
 class TransitiveClosure:
 
-    def __init__(self, g: Digraph):
-        self._tc = [DirectedDFS(g, v) for v in range(g.get_V())]
+    def __init__(self, g: Digraph, lazy=False, cache_size=1024):
+        """
+        :param g: the digraph (Bag-based or CSR)
+        :param lazy: compute rows only when they are queried
+        :param cache_size: the number of rows kept in lazy mode
+        """
+        if lazy and cache_size < 1:
+            raise ValueError('cache_size must be positive')
+        scc = TarjanSCC(g)
+        self._V = g.get_V()
+        self._id = [scc.id(v) for v in range(self._V)]
+        self._dag = scc.condensation().freeze()
+        self._lazy = lazy
+        self._cache_size = cache_size
+        if lazy:
+            self._rows = OrderedDict()
+        else:
+            self._rows = self.__all_rows()
+
+    def __row_bytes(self, bits):
+        return bits.to_bytes((self._dag.get_V() + 7) // 8, 'little')
+
+    def __all_rows(self):
+        C = self._dag.get_V()
+        offsets, targets = self._dag.offsets, self._dag.targets
+        rows = [None] * C
+        # successors have larger ids, so their rows are done first
+        for c in range(C - 1, -1, -1):
+            bits = 1 << c
+            for i in range(offsets[c], offsets[c + 1]):
+                bits |= int.from_bytes(rows[targets[i]], 'little')
+            rows[c] = self.__row_bytes(bits)
+        return rows
+
+    def __search_row(self, c):
+        offsets, targets = self._dag.offsets, self._dag.targets
+        marked = bytearray((self._dag.get_V() + 7) // 8)
+        marked[c >> 3] |= 1 << (c & 7)
+        stack = [c]
+        while stack:
+            d = stack.pop()
+            for i in range(offsets[d], offsets[d + 1]):
+                e = targets[i]
+                if not marked[e >> 3] >> (e & 7) & 1:
+                    marked[e >> 3] |= 1 << (e & 7)
+                    stack.append(e)
+        return bytes(marked)
+
+    def __row(self, c):
+        if not self._lazy:
+            return self._rows[c]
+        row = self._rows.get(c)
+        if row is None:
+            row = self._rows[c] = self.__search_row(c)
+            if len(self._rows) > self._cache_size:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(c)
+        return row
 
     def reachable(self, v, w):
+        """
+        Is there a directed path from vertex {v} to vertex {w}?
+        """
         self.__validate_vertex(v)
         self.__validate_vertex(w)
-        return self._tc[v].marked(w)
+        d = self._id[w]
+        return self.__row(self._id[v])[d >> 3] >> (d & 7) & 1 == 1
 
     def __validate_vertex(self, v):
-        n = len(self._tc)
+        n = self._V
         if v < 0 or v >= n:
-            raise ValueError(f'vertex {v} is not between 0 and {n - 1}')
\ No newline at end of file
+            raise ValueError(f'vertex {v} is not between 0 and {n - 1}')
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'V={self._V}, ' \
+               f'components={self._dag.get_V()}, ' \
+               f'lazy={self._lazy}, ' \
+               f'rows={len(self._rows)})>'
+
+
+def main():
+    file_name = '../resources/tinyDG.txt'
+    with open(file_name) as f:
+        ints = list()
+        for line in f.read().split('\n'):
+            ints.append(line)
+        vertices, edges = int(ints[0]), int(ints[1])
+
+    graph = Digraph(vertices)
+    inp = ints[2:]  # skip first 2 lines in tiny.DG.txt i.e. # of vertices and edges
+    for i in range(edges):
+        v, w = inp[i].split(' ')
+        graph.add_edge(int(v), int(w))
+
+    tc = TransitiveClosure(graph)
+    print('     ' + ''.join(f'{w:3}' for w in range(graph.get_V())))
+    print('--------------------------------------------')
+    for v in range(graph.get_V()):
+        print(f'{v:3}: ' + ''.join('  T' if tc.reachable(v, w) else '   ' for w in range(graph.get_V())))
+
+    lazy = TransitiveClosure(graph, lazy=True, cache_size=2)
+    assert all(lazy.reachable(v, w) == tc.reachable(v, w)
+               for v in range(graph.get_V()) for w in range(graph.get_V()))
+    print(lazy)
+
+
+if __name__ == '__main__':
+    main()
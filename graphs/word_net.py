@@ -7,57 +7,131 @@ synset: as set of synonyms
  One such relationship is the is-a relationship, which connects a hyponym (more specific synset)
  to a hypernym (more general synset). For example, the synset { gate, logic gate } is a hypernym
  of { AND circuit, AND gate } because an AND gate is a kind of logic gate.
+ *
+ *  The nouns are interned in a SymbolTable (one UTF-8 blob, sorted for
+ *  binary search) and each noun id maps to its synset ids through
+ *  array offsets, so there is no str, list or Bag per noun. The hypernym
+ *  digraph is a CSRDigraph. The files are read whole and split as bytes.
+ *
+ *  With a snapshot path, the parsed arrays are written to a binary
+ *  snapshot (see snapshot.py) after parsing, and later constructions map
+ *  the snapshot instead of parsing, in time independent of the size of
+ *  WordNet. A snapshot whose synsets or hypernyms file has changed since
+ *  it was written is ignored and rewritten.
 """
-from collections import defaultdict
-from graphs.bag import Bag
-from graphs.digraph import Digraph
-from graphs.sap import SAP
+from array import array
+
+from graphs.csr_graph import CSRDigraph
 from graphs.directed_cycle import DirectedCycle
+from graphs.sap import SAP
+from graphs.snapshot import read_snapshot, write_snapshot
+from graphs.symbol_table import SymbolTable
+
+
+def _lines(path):
+    with open(path, 'rb') as f:
+        for line in f.read().split(b'\n'):
+            line = line.rstrip(b'\r')
+            if line:
+                yield line
 
 
 class WordNet:
 
-    def __init__(self, synsets=None, hypernyms=None):
-        self._nouns_dict = defaultdict(Bag)
-        self._reverse_nouns_dict = defaultdict(str)
-        max_id = 0
-
-        with open(synsets) as f:
-            lines = f.readlines()
-            for line in lines:
-                items = "".join(line.splitlines()).split(',')
-                nouns = items[1].split(' ')
-
-                for i in range(len(nouns)):
-                    if nouns[i] not in self._nouns_dict:
-                        nouns_list = Bag()
-                    else:
-                        nouns_list = self._nouns_dict.get(nouns[i])
-                    nouns_list.add(int(items[0]))
-                    self._nouns_dict[nouns[i]] = nouns_list
-                self._reverse_nouns_dict[int(items[0])] = items[1]
-                max_id = max(max_id, int(items[0]))
-
-        self._dg = Digraph(max_id + 1)
-
-        with open(hypernyms) as f1:
-            lines = f1.readlines()
-            for line in lines:
-                items = "".join(line.splitlines()).split(',')
-                v = int(items[0])
-                for i in range(1, len(items)):
-                    w = int(items[i])
-                    self._dg.add_edge(v, w)
+    _SNAPSHOT_KIND = 'wordnet'
+
+    def __init__(self, synsets=None, hypernyms=None, snapshot=None):
+        """
+        :param synsets: the synsets file (id,nouns,gloss per line)
+        :param hypernyms: the hypernyms file (id,hypernym ids... per line)
+        :param snapshot: a binary snapshot file to load from if it is current
+                         and to write otherwise, or None to always parse
+        """
+        sources = [synsets, hypernyms]
+        columns = None
+        if snapshot is not None:
+            columns = read_snapshot(snapshot, self._SNAPSHOT_KIND, sources)
+        self._from_snapshot = columns is not None
+        if columns is None:
+            columns = self.__parse(synsets, hypernyms)
+            if snapshot is not None:
+                write_snapshot(snapshot, self._SNAPSHOT_KIND, sources, columns)
+        self._nouns = SymbolTable.from_columns(columns, 'noun_')
+        self._synsets = SymbolTable.from_columns(columns, 'synset_')
+        self._noun_offsets, self._noun_synsets = columns['noun_synset_offsets'], columns['noun_synsets']
+        self._dg = CSRDigraph(len(columns['hypernym_offsets']) - 1,
+                              columns['hypernym_offsets'], columns['hypernym_targets'])
 
         # if not self._is_dag(self._dg):
         #     raise AttributeError('digraph is not acyclic')
         self._sap = SAP(self._dg)
 
+    @staticmethod
+    def __parse(synsets, hypernyms):
+        """
+        :returns: the columns of the nouns, synsets and hypernym digraph
+        """
+        noun_ids = dict()  # interns each noun
+        noun_column, synset_column = array('i'), array('i')
+        texts = dict()
+        for line in _lines(synsets):
+            items = line.split(b',', 2)
+            _id = int(items[0])
+            texts[_id] = items[1]
+            for noun in items[1].split(b' '):
+                noun_column.append(noun_ids.setdefault(noun, len(noun_ids)))
+                synset_column.append(_id)
+        v = max(texts) + 1 if texts else 0
+
+        # counting sort of the (noun, synset) pairs by noun
+        offsets = array('q', bytes(8 * (len(noun_ids) + 1)))
+        for noun in noun_column:
+            offsets[noun + 1] += 1
+        for i in range(len(noun_ids)):
+            offsets[i + 1] += offsets[i]
+        cursor = offsets[:-1]
+        noun_synsets = array('i', bytes(4 * len(noun_column)))
+        for noun, _id in zip(noun_column, synset_column):
+            noun_synsets[cursor[noun]] = _id
+            cursor[noun] += 1
+
+        tails, heads = array('i'), array('i')
+        for line in _lines(hypernyms):
+            items = line.split(b',')
+            for w in items[1:]:
+                tails.append(int(items[0]))
+                heads.append(int(w))
+        dg = CSRDigraph.from_edges(v, tails, heads)
+
+        columns = SymbolTable.from_names(list(noun_ids)).columns('noun_')
+        columns.update(SymbolTable.from_names([texts.get(i, b'') for i in range(v)],
+                                              searchable=False).columns('synset_'))
+        columns['noun_synset_offsets'] = offsets
+        columns['noun_synsets'] = noun_synsets
+        columns['hypernym_offsets'] = dg.offsets
+        columns['hypernym_targets'] = dg.targets
+        return columns
+
     def nouns_dict(self):
-        return self._nouns_dict
+        """
+        :returns: a dict from every noun to the list of its synset ids
+        """
+        return {noun: self.__synsets(noun) for noun in self._nouns.names()}
 
     def rev_nouns_dict(self):
-        return self._reverse_nouns_dict
+        """
+        :returns: a dict from every synset id to its synset (nouns separated by spaces)
+        """
+        return {_id: self._synsets.name_of(_id) for _id in range(len(self._synsets))}
+
+    def digraph(self):
+        return self._dg
+
+    def from_snapshot(self):
+        """
+        :returns: True if this WordNet was loaded from a snapshot
+        """
+        return self._from_snapshot
 
     def _is_dag(self, dg):
         dc = DirectedCycle(dg)
@@ -65,38 +139,48 @@ class WordNet:
 
     def nouns(self):
         # returns all WordNet nouns
-        return list(self._nouns_dict.keys())
+        return list(self._nouns.names())
 
     def is_noun(self, word):
         # is the word a WordNet noun?
-        return True if word in self._nouns_dict else False
+        return self._nouns.contains(word)
+
+    def __synsets(self, noun):
+        i = self._nouns.index_of(noun)
+        if i is None:
+            raise AttributeError(f'noun {noun} not found')
+        return list(self._noun_synsets[self._noun_offsets[i]:self._noun_offsets[i + 1]])
 
     def distance(self, noun_a, noun_b):
-        # distance between noun_a and noun_b
-        if not self.is_noun(noun_a) or not self.is_noun(noun_b):
-            raise AttributeError(f'noun arguments to distance() not found')
-        return self._sap.length(self._nouns_dict.get(noun_a).first.item, self._nouns_dict.get(noun_b).first.item)
+        # distance between noun_a and noun_b: the length of a shortest ancestral path
+        # between any synset of noun_a and any synset of noun_b
+        return self._sap.length(self.__synsets(noun_a), self.__synsets(noun_b))
+
+    def distances(self, pairs):
+        """
+        Computes the distances between many pairs of nouns at once.
+        :param pairs: an iterable of (noun_a, noun_b)
+        :returns: a list of the distances
+        """
+        return self._sap.distances([(self.__synsets(a), self.__synsets(b)) for a, b in pairs])
 
     def sap(self, noun_a, noun_b):
         # a synset (second field of synsets.txt) that is the common ancestor of noun_a and noun_b
         # in a shortest ancestral path (defined below)
-        if not self.is_noun(noun_a) or not self.is_noun(noun_b):
-            raise AttributeError(f'noun arguments to distance() not found')
-        _id = self._sap.ancestor(
-            self._nouns_dict.get(noun_a).first.item,
-            self._nouns_dict.get(noun_b).first.item)
-        return self._reverse_nouns_dict.get(_id)
+        _id = self._sap.ancestor(self.__synsets(noun_a), self.__synsets(noun_b))
+        return self._synsets.name_of(_id) if _id >= 0 else None
 
     def __repr__(self):
         return f'<{self.__class__.__name__}(' \
-               f'_dg={self._dg})>'
+               f'nouns={len(self._nouns)}, ' \
+               f'_dg={self._dg}, ' \
+               f'from_snapshot={self._from_snapshot})>'
 
 
 def main():
     synsets, hypernyms = '../resources/synsets.txt', '../resources/hypernyms.txt'
-    wordnet = WordNet(synsets, hypernyms)
-    print(wordnet.nouns_dict())
-    # print(wordnet.rev_nouns_dict())
+    wordnet = WordNet(synsets, hypernyms, snapshot='../resources/wordnet.snap')
+    print(wordnet)
     print(wordnet.distance('velum', 'soft_option'))
     print(wordnet.sap('velum', 'soft_option'))
 
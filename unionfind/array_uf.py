@@ -0,0 +1,343 @@
+"""
+ * array_uf.py
+ * Weighted quick-union by rank with path compression by halving,
+ * on flat arrays, with bulk operations.
+ * The parents are an array('i') and the ranks a bytearray, so n elements
+ * take 5 bytes each instead of two lists of int objects. The bulk
+ * operations union_many, find_many and components validate their
+ * arguments once per call and run the find loop inline, which removes
+ * most of the per-call overhead of union and find on large inputs.
+ *
+ * With vectorized=True (requires numpy), union_many and find_many
+ * process a whole batch of pairs with array operations on a numpy view
+ * of the same parent array: every root is first pointed at directly by
+ * pointer jumping, then each pair that joins two different roots hooks
+ * the larger root under the smaller one, and the two steps repeat on
+ * the pairs that are still split. Every set touched by a split pair
+ * merges in each round, so a batch takes O(log n) rounds of
+ * Theta(n + batch) work; this pays off for batches of at least about n
+ * pairs (2M random pairs on 1M elements: about 0.5 s, against 3 s for
+ * the loop). Scalar and vectorized calls can be mixed.
+"""
+import random
+import time
+from array import array
+
+from unionfind.uf import IllegalArgumentException, UF
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for vectorized mode
+    np = None
+
+
+class ArrayUF:
+    """
+    This class represents a union–find data type
+    (also known as the disjoint-sets data type).
+    It supports the classic union and find operations,
+    along with a count operation that returns the total number
+    of sets, and bulk versions of union and find.
+    """
+
+    def __init__(self, n: int, vectorized: bool = False):
+        """
+        Initializes an empty union-find data structure with
+        {n} elements {0} through {n-1}.
+        Initially, each elements is in its own set.
+        :param n: the number of elements
+        :param vectorized: process union_many and find_many with numpy
+        :raises IllegalArgumentException: if {n < 0}
+        :raises ImportError: if {vectorized} and numpy is not installed
+        """
+        if n < 0:
+            raise IllegalArgumentException('The number of elements must be greater than 0')
+        if vectorized and np is None:
+            raise ImportError('vectorized mode requires numpy')
+        self._n = n
+        self._count = n
+        self._parent = array('i')
+        if vectorized:
+            self._parent.frombytes(np.arange(n, dtype=np.intc).tobytes())
+        else:
+            self._parent.extend(range(n))
+        self._rank = bytearray(n)
+        self._vectorized = vectorized
+
+    def _find(self, p: int) -> int:
+        parent = self._parent
+        while p != parent[p]:
+            parent[p] = parent[parent[p]]  # path compression by halving
+            p = parent[p]
+        return p
+
+    def find(self, p: int) -> int:
+        """
+        Returns the canonical element of the set containing element {p}.
+        :param p: an element
+        :raises IllegalArgumentException: unless {0 <= p < n}
+        :return: the canonical element of the set containing {p}
+        :rtype: int
+        """
+        self._validate(p)
+        return self._find(p)
+
+    def _validate(self, p: int):
+        """ Validate that p is a valid index. """
+        if p < 0 or p >= self._n:
+            raise IllegalArgumentException(f'index {p} is not between 0 and {self._n - 1}')
+
+    def _validate_all(self, ids):
+        """ Validate a sequence of indices with one pass for the minimum and one for the maximum. """
+        if len(ids) > 0:
+            if np is not None and isinstance(ids, np.ndarray):
+                lo, hi = int(ids.min()), int(ids.max())
+            else:
+                lo, hi = min(ids), max(ids)
+            if lo < 0 or hi >= self._n:
+                raise IllegalArgumentException(f'index {lo if lo < 0 else hi} is not between 0 and {self._n - 1}')
+
+    def count(self) -> int:
+        """
+        Returns the number of sets.
+        :return: the number of sets (between {1} and {n})
+        :rtype: int
+        """
+        return self._count
+
+    def connected(self, p: int, q: int) -> bool:
+        """
+        Returns True if the two elements are in the same set.
+        :param p: one element
+        :param q: the other element
+        :raises IllegalArgumentException: unless both {0 <= p < n} and {0 <= q < n}.
+        :return: {True} if {p} and {q} are in the same set; {False} otherwise.
+        :rtype: bool
+        """
+        return self.find(p) == self.find(q)
+
+    def _link(self, root_p: int, root_q: int) -> int:
+        """ Merges the sets of two different roots and returns the root of the merged set. """
+        # make root of smaller rank point to root of larger rank
+        parent, rank = self._parent, self._rank
+        self._count -= 1
+        if rank[root_p] < rank[root_q]:
+            parent[root_p] = root_q
+            return root_q
+        if rank[root_p] > rank[root_q]:
+            parent[root_q] = root_p
+        else:
+            parent[root_q] = root_p
+            rank[root_p] += 1
+        return root_p
+
+    def union(self, p: int, q: int) -> bool:
+        """
+        Merges the set containing element {p} with the set containing element {q}.
+        :param  p: one element
+        :param  q: the other element
+        :raises IllegalArgumentException: unless both {0 <= p < n} and {0 <= q < n}
+        :return: {True} if the sets were different and have been merged
+        :rtype: bool
+        """
+        root_p, root_q = self.find(p), self.find(q)
+        if root_p == root_q:
+            return False
+        self._link(root_p, root_q)
+        return True
+
+    def union_many(self, ps, qs=None) -> int:
+        """
+        Merges the sets of many pairs of elements.
+        :param ps: the first elements of the pairs, or an iterable of (p, q)
+                   pairs if {qs} is None
+        :param qs: the second elements of the pairs
+        :raises IllegalArgumentException: unless every element is between 0 and n - 1
+        :return: the number of merges, that is, the decrease in count()
+        :rtype: int
+        """
+        if qs is None:
+            if self._vectorized:
+                pairs = np.asarray(list(ps) if not hasattr(ps, '__len__') else ps, dtype=np.intc)
+                return self.union_many(pairs[:, 0], pairs[:, 1]) if len(pairs) else 0
+            return self.__union_pairs(ps)
+        if len(ps) != len(qs):
+            raise IllegalArgumentException('ps and qs must have the same length')
+        if self._vectorized:
+            ps, qs = np.asarray(ps, dtype=np.intc), np.asarray(qs, dtype=np.intc)
+        self._validate_all(ps)
+        self._validate_all(qs)
+        if self._vectorized:
+            return self.__union_vectorized(ps, qs)
+        return self.__union_pairs(zip(ps, qs), validated=True)
+
+    def __union_pairs(self, pairs, validated=False) -> int:
+        parent, rank, n = self._parent, self._rank, self._n
+        merges = 0
+        for p, q in pairs:
+            if not validated and not (0 <= p < n and 0 <= q < n):
+                self._count -= merges
+                raise IllegalArgumentException(f'index {p if not 0 <= p < n else q} is not between 0 and {n - 1}')
+            while p != parent[p]:
+                parent[p] = parent[parent[p]]
+                p = parent[p]
+            while q != parent[q]:
+                parent[q] = parent[parent[q]]
+                q = parent[q]
+            if p == q:
+                continue
+            # the body of _link, inlined
+            if rank[p] < rank[q]:
+                parent[p] = q
+            elif rank[p] > rank[q]:
+                parent[q] = p
+            else:
+                parent[q] = p
+                rank[p] += 1
+            merges += 1
+        self._count -= merges
+        return merges
+
+    def __view(self):
+        return np.frombuffer(self._parent, dtype=np.intc)
+
+    def __compress(self):
+        """ Point every element directly at its root by pointer jumping. """
+        parent = self.__view()
+        # only the elements whose parent is not a root take part in the next jump
+        active = np.flatnonzero(parent[parent] != parent)
+        while len(active) > 0:
+            jumped = parent[parent[active]]
+            parent[active] = jumped
+            active = active[parent[jumped] != jumped]
+        return parent
+
+    def __union_vectorized(self, ps, qs) -> int:
+        merges = 0
+        while len(ps) > 0:
+            parent = self.__compress()
+            root_p, root_q = parent[ps], parent[qs]
+            split = root_p != root_q
+            if not split.any():
+                break
+            ps, qs, root_p, root_q = ps[split], qs[split], root_p[split], root_q[split]
+            high, low = np.maximum(root_p, root_q), np.minimum(root_p, root_q)
+            # a root can be hooked by several pairs: keep the smallest target
+            np.minimum.at(parent, high, low)
+            # every hooked root is one merge; a mask counts them without sorting
+            hooked = np.zeros(self._n, dtype=np.bool_)
+            hooked[high] = True
+            merges += int(np.count_nonzero(hooked))
+        self._count -= merges
+        return merges
+
+    def find_many(self, ids):
+        """
+        Returns the canonical elements of many elements.
+        :param ids: a sequence of elements
+        :raises IllegalArgumentException: unless every element is between 0 and n - 1
+        :return: an array('i') with the canonical element of each of {ids}
+        """
+        if self._vectorized:
+            ids = np.asarray(ids, dtype=np.intc)
+            self._validate_all(ids)
+            roots = self.__compress()[ids]
+            out = array('i')
+            out.frombytes(roots.astype(np.intc).tobytes())
+            return out
+        self._validate_all(ids)
+        parent = self._parent
+        out = array('i', bytes(4 * len(ids)))
+        for i, p in enumerate(ids):
+            while p != parent[p]:
+                parent[p] = parent[parent[p]]
+                p = parent[p]
+            out[i] = p
+        return out
+
+    def components(self):
+        """
+        Labels every element with the number of its set.
+        :return: an array('i') of n labels between 0 and count() - 1; the
+                 sets are numbered in increasing order of their smallest element
+        """
+        if self._vectorized:
+            roots = self.__compress()
+            _, first, inverse = np.unique(roots, return_index=True, return_inverse=True)
+            number = np.empty(len(first), dtype=np.intc)
+            number[np.argsort(first)] = np.arange(len(first), dtype=np.intc)
+            out = array('i')
+            out.frombytes(number[inverse].astype(np.intc).tobytes())
+            return out
+        parent = self._parent
+        labels = array('i', [-1]) * self._n
+        next_label = 0
+        for p in range(self._n):
+            root = p
+            while root != parent[root]:
+                parent[root] = parent[parent[root]]
+                root = parent[root]
+            if labels[root] == -1:
+                labels[root] = next_label
+                next_label += 1
+            labels[p] = labels[root]
+        return labels
+
+    def forest(self):
+        """
+        Returns the links of the union-find forest: uniting every child with
+        its parent rebuilds the same sets, with at most n - count() pairs.
+        :return: array('i') columns of the children and their parents
+        """
+        parent = self._parent
+        children = array('i', (p for p in range(self._n) if parent[p] != p))
+        parents = array('i', (parent[p] for p in children))
+        return children, parents
+
+    def __len__(self):
+        return self._n
+
+    def __repr__(self):
+        return f'<ArrayUF(n={self._n}, _count={self._count}, vectorized={self._vectorized})>'
+
+
+def _benchmark(n=1000000, m=2000000, seed=0):
+    rnd = random.Random(seed)
+    ps = array('i', (rnd.randrange(n) for _ in range(m)))
+    qs = array('i', (rnd.randrange(n) for _ in range(m)))
+
+    start = time.perf_counter()
+    uf = UF(n)
+    for p, q in zip(ps, qs):
+        uf.union(p, q)
+    print(f'UF.union:            {uf.count()} components in {time.perf_counter() - start:.2f} s')
+
+    start = time.perf_counter()
+    auf = ArrayUF(n)
+    auf.union_many(ps, qs)
+    print(f'ArrayUF.union_many:  {auf.count()} components in {time.perf_counter() - start:.2f} s')
+
+    if np is not None:
+        start = time.perf_counter()
+        vuf = ArrayUF(n, vectorized=True)
+        vuf.union_many(ps, qs)
+        print(f'vectorized:          {vuf.count()} components in {time.perf_counter() - start:.2f} s')
+        assert vuf.components() == auf.components()
+
+
+def main():
+    file_name = 'tinyUF.txt'
+    with open(file_name) as f:
+        lines = [line.split() for line in f if line.strip()]
+
+    uf = ArrayUF(int(lines[0][0]))
+    for p, q in lines[1:]:
+        if uf.union(int(p), int(q)):
+            print(f'{p} {q}')
+    print(f'{uf.count()} components')
+    print(f'labels: {list(uf.components())}')
+    _benchmark()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+"""
+ * dynamic_connectivity.py
+ * Offline dynamic connectivity: connectivity queries over a timeline of
+ * edge insertions and deletions.
+ * OfflineDynamicConnectivity records a sequence of add_edge, remove_edge
+ * and query operations and answers all the queries at once with solve(),
+ * so a deleted link never forces a union-find to be rebuilt.
+ *
+ * Time is measured in queries: an edge added before query i and removed
+ * before query j is present for the queries i through j - 1, an interval
+ * that is stored in the O(log Q) nodes of a segment tree over the
+ * queries that cover it. A depth-first traversal of the tree then unites
+ * the edges of each node in a RollbackUF on the way down, answers the
+ * query of each leaf, and rolls the unions of a node back on the way up.
+ * Every edge is united O(log Q) times and every find takes O(log n), so
+ * solve() takes O((E + Q) log Q log n) time, where E is the number of
+ * additions and Q the number of queries, and Theta(n + (E + Q) log Q)
+ * space. Parallel edges are allowed; remove_edge removes one copy.
+"""
+import random
+import time
+from array import array
+
+from unionfind.array_uf import ArrayUF
+from unionfind.rollback_uf import RollbackUF
+from unionfind.uf import IllegalArgumentException
+
+_CONNECTED, _COUNT = 0, 1
+
+
+class OfflineDynamicConnectivity:
+
+    def __init__(self, n: int):
+        """
+        :param n: the number of vertices {0} through {n-1}
+        :raises IllegalArgumentException: if {n < 0}
+        """
+        if n < 0:
+            raise IllegalArgumentException('The number of elements must be greater than 0')
+        self._n = n
+        self._ends_a, self._ends_b = array('i'), array('i')
+        self._start, self._end = array('i'), array('i')  # edge e is present for queries [start, end)
+        self._alive = dict()  # (p, q) with p <= q -> ids of the present copies
+        self._kind = bytearray()
+        self._query_a, self._query_b = array('i'), array('i')
+
+    def _validate(self, p: int):
+        """ Validate that p is a valid vertex. """
+        if p < 0 or p >= self._n:
+            raise IllegalArgumentException(f'vertex {p} is not between 0 and {self._n - 1}')
+
+    def __key(self, p, q):
+        self._validate(p)
+        self._validate(q)
+        return (p, q) if p <= q else (q, p)
+
+    def add_edge(self, p: int, q: int):
+        """
+        Adds the edge p-q from the next query on.
+        """
+        key = self.__key(p, q)
+        self._alive.setdefault(key, list()).append(len(self._ends_a))
+        self._ends_a.append(key[0])
+        self._ends_b.append(key[1])
+        self._start.append(len(self._kind))
+        self._end.append(-1)
+
+    def remove_edge(self, p: int, q: int):
+        """
+        Removes one copy of the edge p-q from the next query on.
+        :raises ValueError: if there is no such edge
+        """
+        key = self.__key(p, q)
+        copies = self._alive.get(key)
+        if not copies:
+            raise ValueError(f'no edge {p}-{q}')
+        self._end[copies.pop()] = len(self._kind)
+        if not copies:
+            del self._alive[key]
+
+    def query_connected(self, p: int, q: int) -> int:
+        """
+        Asks whether p and q are connected by the edges present now.
+        :return: the index of the answer in solve()
+        """
+        self._validate(p)
+        self._validate(q)
+        return self.__query(_CONNECTED, p, q)
+
+    def query_count(self) -> int:
+        """
+        Asks for the number of connected components now.
+        :return: the index of the answer in solve()
+        """
+        return self.__query(_COUNT, 0, 0)
+
+    def __query(self, kind, p, q):
+        self._kind.append(kind)
+        self._query_a.append(p)
+        self._query_b.append(q)
+        return len(self._kind) - 1
+
+    def solve(self):
+        """
+        Answers every query recorded so far.
+        :return: a list with, for each query in order, a bool for
+                 query_connected and an int for query_count
+        """
+        q = len(self._kind)
+        size = 1
+        while size < q:
+            size <<= 1
+        nodes = [None] * (2 * size)
+        start, end = self._start, self._end
+        for e in range(len(start)):
+            lo, hi = start[e] + size, (end[e] if end[e] >= 0 else q) + size
+            while lo < hi:
+                if lo & 1:
+                    nodes[lo] = nodes[lo] or list()
+                    nodes[lo].append(e)
+                    lo += 1
+                if hi & 1:
+                    hi -= 1
+                    nodes[hi] = nodes[hi] or list()
+                    nodes[hi].append(e)
+                lo >>= 1
+                hi >>= 1
+
+        uf = RollbackUF(self._n)
+        find = uf._find
+        ends_a, ends_b = self._ends_a, self._ends_b
+        kind, query_a, query_b = self._kind, self._query_a, self._query_b
+        answers = [None] * q
+        snapshots = array('q')
+        stack = [1] if q > 0 else []
+        while stack:
+            x = stack.pop()
+            if x < 0:
+                uf.rollback(snapshots.pop())
+                continue
+            snapshots.append(uf.snapshot())
+            for e in nodes[x] or ():
+                uf._union_roots(find(ends_a[e]), find(ends_b[e]))
+            if x >= size:
+                i = x - size
+                if i < q:
+                    if kind[i] == _CONNECTED:
+                        answers[i] = find(query_a[i]) == find(query_b[i])
+                    else:
+                        answers[i] = uf.count()
+                uf.rollback(snapshots.pop())
+            else:
+                stack.append(~x)
+                # the leaves past the last query need no visit
+                if (2 * x + 1) << (size.bit_length() - (2 * x + 1).bit_length()) < size + q:
+                    stack.append(2 * x + 1)
+                stack.append(2 * x)
+        return answers
+
+    @classmethod
+    def run(cls, n, events):
+        """
+        Answers the queries of a timeline.
+        :param n: the number of vertices
+        :param events: an iterable of ('add', p, q), ('remove', p, q),
+                       ('connected', p, q) or ('count',) tuples
+        :return: the answers of the queries, in order
+        """
+        dc = cls(n)
+        operations = {'add': dc.add_edge, 'remove': dc.remove_edge,
+                      'connected': dc.query_connected, 'count': dc.query_count}
+        for event in events:
+            operation = operations.get(event[0])
+            if operation is None:
+                raise ValueError(f'unknown event {event[0]}')
+            operation(*event[1:])
+        return dc.solve()
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}(' \
+               f'n={self._n}, ' \
+               f'edges={len(self._ends_a)}, ' \
+               f'queries={len(self._kind)})>'
+
+
+def _random_timeline(n, m, seed=0):
+    rnd = random.Random(seed)
+    present = list()
+    for _ in range(m):
+        r = rnd.random()
+        if r < 0.45 or not present:
+            p, q = rnd.randrange(n), rnd.randrange(n)
+            present.append((p, q))
+            yield 'add', p, q
+        elif r < 0.7:
+            yield ('remove',) + present.pop(rnd.randrange(len(present)))
+        else:
+            yield 'connected', rnd.randrange(n), rnd.randrange(n)
+
+
+def _rebuild(n, events):
+    """
+    The baseline: a new union-find of the present edges at every query
+    that follows a removal.
+    """
+    present, answers, uf = dict(), list(), None
+    for event in events:
+        if event[0] == 'add':
+            key = (event[1], event[2])
+            present[key] = present.get(key, 0) + 1
+            if uf is not None:
+                uf.union(*key)
+        elif event[0] == 'remove':
+            key = (event[1], event[2])
+            present[key] -= 1
+            uf = None
+        else:
+            if uf is None:
+                uf = ArrayUF(n)
+                for (p, q), k in present.items():
+                    if k > 0:
+                        uf.union(p, q)
+            answers.append(uf.connected(event[1], event[2]))
+    return answers
+
+
+def main():
+    file_name = 'tinyUF.txt'
+    with open(file_name) as f:
+        lines = [line.split() for line in f if line.strip()]
+    n = int(lines[0][0])
+    events = [('add', int(p), int(q)) for p, q in lines[1:]]
+    events += [('connected', 4, 9), ('count',), ('remove', 4, 3), ('connected', 4, 9), ('count',),
+               ('remove', 2, 1), ('connected', 1, 7), ('add', 1, 0), ('connected', 1, 7), ('count',)]
+    print(OfflineDynamicConnectivity.run(n, events))
+
+    n, m = 5000, 20000
+    events = list(_random_timeline(n, m))
+    start = time.perf_counter()
+    answers = OfflineDynamicConnectivity.run(n, events)
+    print(f'offline: {len(answers)} queries in {time.perf_counter() - start:.2f} s')
+    start = time.perf_counter()
+    assert _rebuild(n, events) == answers
+    print(f'rebuild after each removal: {time.perf_counter() - start:.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+ * rollback_uf.py
+ * Weighted quick-union by rank without path compression, with undo.
+ * RollbackUF records every union on a stack, so the structure can be
+ * taken back to any earlier state. Path compression is left out because
+ * it changes parents during find, which would have to be undone as well;
+ * union by rank alone keeps every tree of height at most log n, so find
+ * takes O(log n) time and union and undo take O(log n) and Theta(1).
+ * The parents are an array('i'), the ranks a bytearray and the history
+ * an array('q') holding one entry per union: the root that was linked,
+ * plus n if the rank of the other root went up, or -1 if the union found
+ * the two elements already connected.
+"""
+from array import array
+
+from unionfind.uf import IllegalArgumentException
+
+
+class RollbackUF:
+    """
+    This class represents a union–find data type
+    (also known as the disjoint-sets data type)
+    whose unions can be undone in the reverse order.
+    It supports the classic union and find operations,
+    along with a count operation that returns the total number
+    of sets, and snapshot and rollback operations.
+    """
+
+    def __init__(self, n: int):
+        """
+        Initializes an empty union-find data structure with
+        {n} elements {0} through {n-1}.
+        Initially, each elements is in its own set.
+        :param n: the number of elements
+        :raises IllegalArgumentException: if {n < 0}
+        """
+        if n < 0:
+            raise IllegalArgumentException('The number of elements must be greater than 0')
+        self._n = n
+        self._count = n
+        self._parent = array('i', range(n))
+        self._rank = bytearray(n)
+        self._history = array('q')
+
+    def _find(self, p: int) -> int:
+        parent = self._parent
+        while p != parent[p]:
+            p = parent[p]
+        return p
+
+    def find(self, p: int) -> int:
+        """
+        Returns the canonical element of the set containing element {p}.
+        :param p: an element
+        :raises IllegalArgumentException: unless {0 <= p < n}
+        :return: the canonical element of the set containing {p}
+        :rtype: int
+        """
+        self._validate(p)
+        return self._find(p)
+
+    def _validate(self, p: int):
+        """ Validate that p is a valid index. """
+        if p < 0 or p >= self._n:
+            raise IllegalArgumentException(f'index {p} is not between 0 and {self._n - 1}')
+
+    def count(self) -> int:
+        """
+        Returns the number of sets.
+        :return: the number of sets (between {1} and {n})
+        :rtype: int
+        """
+        return self._count
+
+    def connected(self, p: int, q: int) -> bool:
+        """
+        Returns True if the two elements are in the same set.
+        :param p: one element
+        :param q: the other element
+        :raises IllegalArgumentException: unless both {0 <= p < n} and {0 <= q < n}.
+        :return: {True} if {p} and {q} are in the same set; {False} otherwise.
+        :rtype: bool
+        """
+        return self.find(p) == self.find(q)
+
+    def union(self, p: int, q: int) -> bool:
+        """
+        Merges the set containing element {p} with the set containing element {q},
+        and records the union so that undo() can take it back.
+        :param  p: one element
+        :param  q: the other element
+        :raises IllegalArgumentException: unless both {0 <= p < n} and {0 <= q < n}
+        :return: {True} if the sets were different and have been merged
+        :rtype: bool
+        """
+        root_p, root_q = self.find(p), self.find(q)
+        return self._union_roots(root_p, root_q)
+
+    def _union_roots(self, root_p: int, root_q: int) -> bool:
+        if root_p == root_q:
+            self._history.append(-1)
+            return False
+        rank = self._rank
+        # make root of smaller rank point to root of larger rank
+        if rank[root_p] > rank[root_q]:
+            root_p, root_q = root_q, root_p
+        self._parent[root_p] = root_q
+        if rank[root_p] == rank[root_q]:
+            rank[root_q] += 1
+            self._history.append(root_p + self._n)
+        else:
+            self._history.append(root_p)
+        self._count -= 1
+        return True
+
+    def undo(self):
+        """
+        Takes back the most recent union that has not been undone.
+        :raises IllegalArgumentException: if there is no such union
+        """
+        if not self._history:
+            raise IllegalArgumentException('no union to undo')
+        entry = self._history.pop()
+        if entry == -1:
+            return
+        root = entry - self._n if entry >= self._n else entry
+        parent = self._parent
+        if entry >= self._n:
+            self._rank[parent[root]] -= 1
+        parent[root] = root
+        self._count += 1
+
+    def snapshot(self) -> int:
+        """
+        Returns a marker of the current state for rollback().
+        :return: the number of unions recorded so far
+        :rtype: int
+        """
+        return len(self._history)
+
+    def rollback(self, snapshot: int):
+        """
+        Undoes every union made after {snapshot} was taken.
+        :param snapshot: a value returned by snapshot()
+        :raises IllegalArgumentException: unless {0 <= snapshot <= snapshot()}
+        """
+        if snapshot < 0 or snapshot > len(self._history):
+            raise IllegalArgumentException(f'snapshot {snapshot} is not between 0 and {len(self._history)}')
+        while len(self._history) > snapshot:
+            self.undo()
+
+    def __len__(self):
+        return self._n
+
+    def __repr__(self):
+        return f'<RollbackUF(n={self._n}, _count={self._count}, unions={len(self._history)})>'
+
+
+def main():
+    file_name = 'tinyUF.txt'
+    with open(file_name) as f:
+        lines = [line.split() for line in f if line.strip()]
+
+    uf = RollbackUF(int(lines[0][0]))
+    half = uf.snapshot()
+    for i, (p, q) in enumerate(lines[1:]):
+        if i == len(lines) // 2:
+            half = uf.snapshot()
+        uf.union(int(p), int(q))
+    print(f'{uf.count()} components')
+    uf.rollback(half)
+    print(f'{uf.count()} components after undoing the second half of the unions')
+    uf.rollback(0)
+    print(f'{uf.count()} components after undoing all of them')
+
+
+if __name__ == '__main__':
+    main()